@@ -7,6 +7,13 @@ from flask_jwt_extended import JWTManager
 from flask_restx import Api
 
 from .utils.blacklist_store import is_blacklisted
+from .utils.profiling import init_profiling
+from .utils.compression import init_compression
+from .utils.unit_of_work import init_unit_of_work
+from .utils.json_output import init_json_output
+from .utils.pubsub import init_pubsub
+from .utils.rate_limit import init_proxy_fix
+from .utils import config
 from .extensions import mail
 
 from .auth import auth_ns
@@ -29,6 +36,9 @@ from .upload import upload_ns
 from .tryout import tryout_ns
 from .soaltryout import soaltryout_ns
 from .hasiltryout import hasiltryout_ns
+from .realtime import realtime_ns
+from .sync import sync_ns
+from .metrics import init_metrics
 
 
 api = Flask(__name__)
@@ -52,6 +62,11 @@ api.config['MAIL_DEFAULT_SENDER'] = os.getenv("MAIL_DEFAULT_SENDER")
 
 jwt = JWTManager(api)
 mail.init_app(api)
+init_proxy_fix(api)  # IP client asli di balik reverse proxy (TRUSTED_PROXY_HOPS)
+init_compression(api)  # gzip/brotli; after_request terakhir yang dijalankan
+init_profiling(api)  # opt-in lewat PROFILING_ENABLED
+init_unit_of_work(api)  # satu koneksi DB bersama per request
+init_pubsub(config.engine)  # event realtime dikirim setelah commit
 
 @jwt.token_in_blocklist_loader
 def check_if_token_in_blacklist(jwt_header, jwt_payload):
@@ -80,6 +95,7 @@ restx_api = Api(
         {"url": "https://api.ukaisyndrome.id/", "description": "Production"}  # opsional
     ]
 )
+init_json_output(restx_api)  # encoder JSON cepat (orjson jika terpasang)
 
 restx_api.add_namespace(auth_ns, path="/auth")
 restx_api.add_namespace(profile_ns, path="/profile")
@@ -100,4 +116,8 @@ restx_api.add_namespace(forum_ns, path="/forum")
 restx_api.add_namespace(upload_ns, path="/upload")
 restx_api.add_namespace(tryout_ns, path="/tryout")
 restx_api.add_namespace(soaltryout_ns, path="/soal-tryout")
-restx_api.add_namespace(hasiltryout_ns, path="/hasil-tryout")
\ No newline at end of file
+restx_api.add_namespace(hasiltryout_ns, path="/hasil-tryout")
+restx_api.add_namespace(realtime_ns, path="/realtime")
+restx_api.add_namespace(sync_ns, path="/sync")
+
+init_metrics(api, restx_api)  # latency per namespace + GET /metrics (Prometheus)
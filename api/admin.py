@@ -6,7 +6,10 @@ from email_validator import validate_email, EmailNotValidError
 from sqlalchemy.exc import SQLAlchemyError
 
 from .query.q_admin import *
+from .query.q_forum import reconcile_forum_counters
 from .utils.decorator import role_required, session_required
+from .utils.metrics import snapshot_metrics
+from .utils.profiling import get_profile, list_profiles
 
 
 admin_ns = Namespace("admin", description="Admin related endpoints")
@@ -118,3 +121,41 @@ class AdminDetailResource(Resource):
         except SQLAlchemyError as e:
             logging.error(f"Database error: {str(e)}")
             return {'status': "Internal server error"}, 500
+
+
+@admin_ns.route('/metrics/db')
+class AdminDbMetricsResource(Resource):
+    @role_required('admin')
+    def get(self):
+        """Akses: (admin), Histogram latency query, jumlah row, pool wait & slow query per fungsi q_*"""
+        return {"status": "success", "data": snapshot_metrics("db.")}, 200
+
+
+@admin_ns.route('/profiles')
+class AdminProfileListResource(Resource):
+    @role_required('admin')
+    def get(self):
+        """Akses: (admin), Daftar hasil profiling request terbaru (sampling / header X-Profile: 1)"""
+        return {"status": "success", "data": list_profiles()}, 200
+
+
+@admin_ns.route('/profiles/<string:id_profile>')
+class AdminProfileDetailResource(Resource):
+    @role_required('admin')
+    def get(self, id_profile):
+        """Akses: (admin), Detail cProfile satu request"""
+        profile = get_profile(id_profile)
+        if not profile:
+            return {"status": "error", "message": "Profile tidak ditemukan"}, 404
+        return {"status": "success", "data": profile}, 200
+
+
+@admin_ns.route('/forum/reconcile-counters')
+class AdminForumReconcileResource(Resource):
+    @role_required('admin')
+    def post(self):
+        """Akses: (admin), Hitung ulang counter forum (vote_score, reply_count, comment_count) secara bulk"""
+        hasil = reconcile_forum_counters()
+        if hasil is None:
+            return {"status": "error", "message": "Gagal rekonsiliasi counter forum"}, 500
+        return {"status": "success", "data": hasil}, 200
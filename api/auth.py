@@ -8,7 +8,12 @@ from werkzeug.security import generate_password_hash
 from sqlalchemy.exc import SQLAlchemyError
 
 from .utils.mailer import send_recovery_email
-from .utils.decorator import session_required
+from .utils.decorator import role_required, session_required
+from .utils.metrics import get_counter, snapshot_metrics
+from .utils.password import PASSWORD_HASH_METHOD, PasswordVerifierBusy
+from .utils.rate_limit import (
+    LOGIN_LIMIT_EMAIL, LOGIN_LIMIT_IP, REGISTER_LIMIT_EMAIL, REGISTER_LIMIT_IP, rate_limit
+)
 
 from .query.q_auth import *
 from .utils.blacklist_store import blacklist
@@ -63,6 +68,7 @@ class ProtectedResource(Resource):
 @auth_ns.route('/login')
 class LoginAdminResource(Resource):
     @auth_ns.expect(login_model)
+    @rate_limit("login", ip_rule=LOGIN_LIMIT_IP, email_rule=LOGIN_LIMIT_EMAIL)
     def post(self):
         """Akses: (admin/mentor/peserta), login menggunakan email + password"""
         payload = request.get_json()
@@ -73,8 +79,12 @@ class LoginAdminResource(Resource):
         try:
             get_jwt_response = get_login(payload)
             if get_jwt_response is None:
+                get_counter("auth.logins", labels={"channel": "default", "result": "failed"}).inc()
                 return {'status': "Invalid email or password"}, 401
+            get_counter("auth.logins", labels={"channel": "default", "result": "success"}).inc()
             return get_jwt_response, 200
+        except PasswordVerifierBusy as e:
+            return {'status': "Server sedang sibuk, coba lagi"}, 503, {'Retry-After': str(e.retry_after)}
         except SQLAlchemyError as e:
             auth_ns.logger.error(f"Database error: {str(e)}")
             return {'status': "Internal server error"}, 500
@@ -83,19 +93,24 @@ class LoginAdminResource(Resource):
 @auth_ns.route('/login/web')
 class LoginWebResource(Resource):
     @auth_ns.expect(login_model)
+    @rate_limit("login", ip_rule=LOGIN_LIMIT_IP, email_rule=LOGIN_LIMIT_EMAIL)
     def post(self):
         payload = request.get_json()
 
         if not payload.get('email') or not payload.get('password'):
             return {'status': "Fields can't be blank"}, 400
 
-        result = get_login_web(payload)
+        try:
+            result = get_login_web(payload)
+        except PasswordVerifierBusy as e:
+            return {'status': "Server sedang sibuk, coba lagi"}, 503, {'Retry-After': str(e.retry_after)}
 
         if not result:
             return {'status': "Unknown error"}, 500
 
         # ❌ Handle error explicit
         if result.get("error"):
+            get_counter("auth.logins", labels={"channel": "web", "result": "failed"}).inc()
             error_map = {
                 "EMAIL_NOT_FOUND": ("Email tidak terdaftar", 404),
                 "INVALID_PASSWORD": ("Password salah", 401),
@@ -111,12 +126,14 @@ class LoginWebResource(Resource):
             return {"status": message}, code
 
         # ✅ Success
+        get_counter("auth.logins", labels={"channel": "web", "result": "success"}).inc()
         return result["data"], 200
 
 
 @auth_ns.route('/login/mobile')
 class LoginMobileResource(Resource):
     @auth_ns.expect(login_model)
+    @rate_limit("login", ip_rule=LOGIN_LIMIT_IP, email_rule=LOGIN_LIMIT_EMAIL)
     def post(self):
         """Login khusus untuk mobile (mentor/peserta), email + password"""
         payload = request.get_json()
@@ -127,12 +144,33 @@ class LoginMobileResource(Resource):
         try:
             get_jwt_response = get_login_mobile(payload)
             if get_jwt_response is None:
+                get_counter("auth.logins", labels={"channel": "mobile", "result": "failed"}).inc()
                 return {'status': "Invalid email or password"}, 401
+            get_counter("auth.logins", labels={"channel": "mobile", "result": "success"}).inc()
             return get_jwt_response, 200
+        except PasswordVerifierBusy as e:
+            return {'status': "Server sedang sibuk, coba lagi"}, 503, {'Retry-After': str(e.retry_after)}
         except SQLAlchemyError as e:
             auth_ns.logger.error(f"Database error: {str(e)}")
             return {'status': "Internal server error"}, 500
 
+
+
+@auth_ns.route('/metrics/password')
+class PasswordMetricsResource(Resource):
+    @role_required('admin')
+    def get(self):
+        """Akses: (admin), Latency per tahap verifikasi password (antri, verify, rehash)"""
+        return {"status": "success", "data": snapshot_metrics("password.")}, 200
+
+
+@auth_ns.route('/metrics/rate-limit')
+class RateLimitMetricsResource(Resource):
+    @role_required('admin')
+    def get(self):
+        """Akses: (admin), Jumlah request login/register yang diizinkan & ditolak rate limit"""
+        return {"status": "success", "data": snapshot_metrics("ratelimit.")}, 200
+
         
 @auth_ns.route('/logout')
 class LogoutKaryawanResource(Resource):
@@ -181,6 +219,7 @@ class LogoutKaryawanResource(Resource):
 @auth_ns.route('/register/email')
 class RegisterStep1Resource(Resource):
     @auth_ns.expect(register_email_model, validate=True)
+    @rate_limit("register", ip_rule=REGISTER_LIMIT_IP, email_rule=REGISTER_LIMIT_EMAIL)
     def post(self):
         """Step 1: Daftar dengan email (generate kode pemulihan)"""
         payload = request.get_json()
@@ -231,7 +270,7 @@ class RegisterStep3Resource(Resource):
         no_hp = payload.get("no_hp")
         password = payload.get("password")
 
-        hashed_password = generate_password_hash(password)
+        hashed_password = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
 
         try:
             updated = register_step3(email, nama, no_hp, hashed_password)
@@ -1,10 +1,12 @@
 from flask import logging, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, inputs, reqparse
 from sqlalchemy.exc import SQLAlchemyError
 
 from .query.q_forum import *
+from .query.q_forum_search import search_forum
 from .utils.decorator import role_required, session_required
+from .utils.request_context import get_request_context
 
 
 forum_ns = Namespace('forum', description='Endpoint untuk forum diskusi mahasiswa dan mentor')
@@ -31,23 +33,69 @@ comment_update_model = forum_ns.model('CommentUpdate', {
     'isi': fields.String(required=False, description='Isi komentar yang diperbarui (opsional)')
 })
 
+thread_list_parser = reqparse.RequestParser()
+thread_list_parser.add_argument('id_batch', type=int, required=False, help='Filter berdasarkan batch')
+thread_list_parser.add_argument('id_materi', type=int, required=False, help='Filter berdasarkan materi')
+thread_list_parser.add_argument('search', type=str, required=False, help='Search judul/isi thread')
+thread_list_parser.add_argument('is_solved', type=inputs.boolean, required=False, help='Filter thread solved / belum solved')
+thread_list_parser.add_argument('limit', type=int, default=20, help='Jumlah thread per halaman (maks. 100)')
+thread_list_parser.add_argument('cursor', type=str, required=False, help='next_cursor dari halaman sebelumnya')
+
+comment_list_parser = reqparse.RequestParser()
+comment_list_parser.add_argument('sort', type=str, default='old', choices=('old', 'new', 'top'), help='old | new | top (vote terbanyak)')
+comment_list_parser.add_argument('limit', type=int, default=20, help='Jumlah komentar per halaman (maks. 100)')
+comment_list_parser.add_argument('cursor', type=str, required=False, help='next_cursor dari halaman sebelumnya')
+
+reply_list_parser = reqparse.RequestParser()
+reply_list_parser.add_argument('limit', type=int, default=20, help='Jumlah balasan per halaman (maks. 100)')
+reply_list_parser.add_argument('cursor', type=str, required=False, help='next_cursor dari halaman sebelumnya')
+
+notification_parser = reqparse.RequestParser()
+notification_parser.add_argument('limit', type=int, default=20, help='Jumlah notifikasi per halaman (maks. 100)')
+notification_parser.add_argument('cursor', type=str, required=False, help='next_cursor dari halaman sebelumnya')
+notification_parser.add_argument('unread_only', type=inputs.boolean, default=False, help='Hanya yang belum dibaca')
+
+search_parser = reqparse.RequestParser()
+search_parser.add_argument('q', type=str, required=True, help='Kata kunci pencarian')
+search_parser.add_argument('id_batch', type=int, required=False, help='Filter berdasarkan batch')
+search_parser.add_argument('id_materi', type=int, required=False, help='Filter berdasarkan materi')
+search_parser.add_argument('page', type=int, default=1, help='Halaman')
+search_parser.add_argument('limit', type=int, default=20, help='Jumlah hasil per halaman (maks. 50)')
+
 
 """ #=== Endpoint Thread ===# """
 
 @forum_ns.route('/thread')
 class ForumThreadListResource(Resource):
     # @role_required(['mentor', 'peserta'])
+    @forum_ns.expect(thread_list_parser)
     @jwt_required()
     def get(self):
         """
         Akses: (mahasiswa, mentor, admin)
         Mengambil daftar thread forum (filter berdasarkan batch, materi, atau search keyword)
+        Paging keyset: kirim next_cursor sebagai ?cursor= untuk halaman berikutnya
         """
+        args = thread_list_parser.parse_args()
         try:
-            result = get_all_forum_thread()
-            if not result:
+            limit = min(max(args.get('limit') or 20, 1), 100)
+            try:
+                result = get_all_forum_thread(
+                    id_batch=args.get('id_batch'),
+                    id_materi=args.get('id_materi'),
+                    search=args.get('search'),
+                    is_solved=args.get('is_solved'),
+                    limit=limit,
+                    cursor=args.get('cursor')
+                )
+            except ValueError:
+                return {'status': 'error', 'message': 'Cursor tidak valid'}, 400
+
+            if result is None:
+                return {'status': 'error', 'message': 'Gagal mengambil thread'}, 500
+            if not result['data'] and not args.get('cursor'):
                 return {'status': 'error', 'message': 'Belum ada thread yang ditemukan'}, 404
-            return {'status': 'success', 'data': result}, 200
+            return {'status': 'success', **result}, 200
         except SQLAlchemyError as e:
             logging.error(f"Database error: {str(e)}")
             return {'status': 'error', 'message': 'Internal server error'}, 500
@@ -88,16 +136,45 @@ class ForumThreadListResource(Resource):
             return {'status': 'error', 'message': 'Internal server error'}, 500
 
 
+@forum_ns.route('/search')
+class ForumSearchResource(Resource):
+    @forum_ns.expect(search_parser)
+    @jwt_required()
+    def get(self):
+        """
+        Akses: (mahasiswa, mentor, admin)
+        Full-text search thread & komentar forum (diranking, snippet dengan <mark>)
+        """
+        args = search_parser.parse_args()
+        try:
+            q = (args.get('q') or '').strip()
+            if not q:
+                return {'status': 'error', 'message': 'Kata kunci pencarian wajib diisi'}, 400
+            page = max(args.get('page') or 1, 1)
+            limit = min(max(args.get('limit') or 20, 1), 50)
+
+            result = search_forum(q, id_batch=args.get('id_batch'), id_materi=args.get('id_materi'), page=page, limit=limit)
+            if result is None:
+                return {'status': 'error', 'message': 'Gagal melakukan pencarian'}, 500
+            return {'status': 'success', **result}, 200
+        except Exception as e:
+            logging.error(f"Unexpected error: {str(e)}")
+            return {'status': 'error', 'message': 'Internal server error'}, 500
+
+
 @forum_ns.route('/thread/<int:id_thread>')
 class ForumThreadDetailResource(Resource):
+    @forum_ns.expect(comment_list_parser)
     @jwt_required()
     def get(self, id_thread):
         """
         Akses: (mahasiswa, mentor, admin)
-        Mengambil detail thread beserta komentar (nested)
+        Mengambil detail thread beserta halaman pertama komentar level atas
         """
+        args = comment_list_parser.parse_args()
         try:
-            result = get_forum_thread_detail(id_thread)
+            limit = min(max(args.get('limit') or 20, 1), 100)
+            result = get_forum_thread_detail(id_thread, sort=args.get('sort'), limit=limit)
             if not result:
                 return {'status': 'error', 'message': 'Thread tidak ditemukan'}, 404
             return {'status': 'success', 'data': result}, 200
@@ -124,7 +201,7 @@ class ForumThreadDetailResource(Resource):
         Jika dikosongkan → data lama akan dipertahankan
         """
         try:
-            id_user = get_jwt_identity()
+            ctx = get_request_context()
 
             # Ambil parameter dari query atau form
             judul = request.args.get('judul') or request.form.get('judul')
@@ -138,7 +215,7 @@ class ForumThreadDetailResource(Resource):
 
             result = update_forum_thread(
                 id_thread=id_thread,
-                id_user=id_user,
+                ctx=ctx,
                 judul=judul,
                 isi=isi
             )
@@ -169,9 +246,9 @@ class ForumThreadDetailResource(Resource):
         Menghapus thread (soft delete)
         """
         try:
-            id_user = get_jwt_identity()
+            ctx = get_request_context()
 
-            result = delete_forum_thread(id_thread=id_thread, id_user=id_user)
+            result = delete_forum_thread(id_thread=id_thread, ctx=ctx)
 
             if result == 'not_found':
                 return {'status': 'error', 'message': 'Thread tidak ditemukan'}, 404
@@ -193,6 +270,40 @@ class ForumThreadDetailResource(Resource):
 
 """ #=== Endpoint Comment ===# """
 
+@forum_ns.route('/thread/<int:id_thread>/subscribe')
+class ForumThreadSubscribeResource(Resource):
+    @jwt_required()
+    def post(self, id_thread):
+        """
+        Akses: (mahasiswa, mentor, admin)
+        Berlangganan notifikasi komentar baru pada thread
+        """
+        try:
+            result = subscribe_thread(id_thread, get_jwt_identity())
+            if result == 'not_found':
+                return {'status': 'error', 'message': 'Thread tidak ditemukan'}, 404
+            elif result:
+                return {'status': 'success', 'message': 'Berhasil berlangganan thread'}, 200
+            return {'status': 'error', 'message': 'Gagal berlangganan thread'}, 500
+        except Exception as e:
+            logging.error(f"Unexpected error: {str(e)}")
+            return {'status': 'error', 'message': 'Internal server error'}, 500
+
+    @jwt_required()
+    def delete(self, id_thread):
+        """
+        Akses: (mahasiswa, mentor, admin)
+        Berhenti berlangganan notifikasi thread
+        """
+        try:
+            if unsubscribe_thread(id_thread, get_jwt_identity()):
+                return {'status': 'success', 'message': 'Berhenti berlangganan thread'}, 200
+            return {'status': 'error', 'message': 'Gagal berhenti berlangganan thread'}, 500
+        except Exception as e:
+            logging.error(f"Unexpected error: {str(e)}")
+            return {'status': 'error', 'message': 'Internal server error'}, 500
+
+
 @forum_ns.route('/thread/<int:id_thread>/comment')
 class ForumCommentResource(Resource):
     @forum_ns.doc(description="Tambah komentar baru atau reply pada thread")
@@ -232,22 +343,31 @@ class ForumCommentResource(Resource):
             logging.error(f"Unexpected error: {str(e)}")
             return {'status': 'error', 'message': 'Internal server error'}, 500
         
-    @forum_ns.doc(description="Ambil semua komentar (nested) dari sebuah thread")
+    @forum_ns.doc(description="Ambil komentar level atas dari sebuah thread (paging keyset)")
+    @forum_ns.expect(comment_list_parser)
     @jwt_required()
     def get(self, id_thread):
         """
         Akses: (mahasiswa, mentor, admin)
-        Ambil semua komentar dari thread (nested / hierarki reply)
+        Ambil komentar level atas dari thread per halaman (urut waktu atau vote)
+        Balasan dimuat lewat GET /forum/comment/<id_comment>/replies
         """
+        args = comment_list_parser.parse_args()
         try:
-            result = get_thread_comments(id_thread)
+            limit = min(max(args.get('limit') or 20, 1), 100)
+            try:
+                result = get_thread_comments(id_thread, sort=args.get('sort'), limit=limit, cursor=args.get('cursor'))
+            except ValueError:
+                return {'status': 'error', 'message': 'Cursor tidak valid'}, 400
 
             if result == 'not_found':
                 return {'status': 'error', 'message': 'Thread tidak ditemukan'}, 404
-            elif result == []:
-                return {'status': 'success', 'message': 'Belum ada komentar di thread ini', 'data': []}, 200
+            elif result is None:
+                return {'status': 'error', 'message': 'Gagal mengambil komentar'}, 500
+            elif not result['data'] and not args.get('cursor'):
+                return {'status': 'success', 'message': 'Belum ada komentar di thread ini', **result}, 200
             else:
-                return {'status': 'success', 'data': result}, 200
+                return {'status': 'success', **result}, 200
 
         except SQLAlchemyError as e:
             logging.error(f"Database error: {str(e)}")
@@ -257,6 +377,33 @@ class ForumCommentResource(Resource):
             return {'status': 'error', 'message': 'Internal server error'}, 500
         
         
+@forum_ns.route('/comment/<int:id_comment>/replies')
+class ForumCommentRepliesResource(Resource):
+    @forum_ns.expect(reply_list_parser)
+    @jwt_required()
+    def get(self, id_comment):
+        """
+        Akses: (mahasiswa, mentor, admin)
+        Ambil balasan langsung dari satu komentar per halaman (urut waktu)
+        """
+        args = reply_list_parser.parse_args()
+        try:
+            limit = min(max(args.get('limit') or 20, 1), 100)
+            try:
+                result = get_comment_replies(id_comment, limit=limit, cursor=args.get('cursor'))
+            except ValueError:
+                return {'status': 'error', 'message': 'Cursor tidak valid'}, 400
+
+            if result == 'not_found':
+                return {'status': 'error', 'message': 'Komentar tidak ditemukan'}, 404
+            elif result is None:
+                return {'status': 'error', 'message': 'Gagal mengambil balasan'}, 500
+            return {'status': 'success', **result}, 200
+        except Exception as e:
+            logging.error(f"Unexpected error: {str(e)}")
+            return {'status': 'error', 'message': 'Internal server error'}, 500
+
+
 @forum_ns.route('/comment/<int:id_comment>')
 class ForumCommentUpdateResource(Resource):
     @forum_ns.expect(comment_update_model, validate=False)
@@ -269,14 +416,14 @@ class ForumCommentUpdateResource(Resource):
         - isi (opsional, jika kosong maka tidak akan diubah)
         """
         try:
-            id_user = get_jwt_identity()
+            ctx = get_request_context()
             data = request.get_json() or {}
 
             isi = data.get('isi')
 
             result = update_forum_comment(
                 id_comment=id_comment,
-                id_user=id_user,
+                ctx=ctx,
                 isi=isi
             )
 
@@ -307,11 +454,11 @@ class ForumCommentUpdateResource(Resource):
         - Jika oleh pemilik atau admin → hanya is_deleted = TRUE
         """
         try:
-            id_user = get_jwt_identity()
+            ctx = get_request_context()
 
             result = soft_delete_forum_comment(
                 id_comment=id_comment,
-                id_user=id_user
+                ctx=ctx
             )
 
             if result == 'not_found':
@@ -458,16 +605,26 @@ class ForumMarkSolvedResource(Resource):
 
 @forum_ns.route('/notifications')
 class ForumNotificationsResource(Resource):
+    @forum_ns.expect(notification_parser)
     @jwt_required()
     def get(self):
         """
-        Ambil daftar notifikasi user.
+        Ambil daftar notifikasi user (terbaru di atas, paging keyset).
         """
+        args = notification_parser.parse_args()
         try:
             id_user = get_jwt_identity()
-            data = get_forum_notifications(id_user)
-
-            return {'status': 'success', 'data': data}, 200
+            limit = min(max(args.get('limit') or 20, 1), 100)
+            try:
+                result = get_forum_notifications(
+                    id_user, limit=limit, cursor=args.get('cursor'), unread_only=args.get('unread_only')
+                )
+            except ValueError:
+                return {'status': 'error', 'message': 'Cursor tidak valid'}, 400
+            if result is None:
+                return {'status': 'error', 'message': 'Gagal mengambil notifikasi'}, 500
+
+            return {'status': 'success', **result}, 200
 
         except SQLAlchemyError as e:
             logging.error(f"Database error (notifications): {str(e)}")
@@ -477,6 +634,40 @@ class ForumNotificationsResource(Resource):
             return {'status': 'error', 'message': 'Internal server error'}, 500
 
 
+@forum_ns.route('/notifications/unread-count')
+class ForumNotificationUnreadCountResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+        Jumlah notifikasi belum dibaca (untuk badge).
+        """
+        try:
+            total = get_unread_notification_count(get_jwt_identity())
+            if total is None:
+                return {'status': 'error', 'message': 'Gagal mengambil jumlah notifikasi'}, 500
+            return {'status': 'success', 'data': {'unread_count': total}}, 200
+        except Exception as e:
+            logging.error(f"Unexpected error (notifications): {str(e)}")
+            return {'status': 'error', 'message': 'Internal server error'}, 500
+
+
+@forum_ns.route('/notifications/read-all')
+class ForumNotificationReadAllResource(Resource):
+    @jwt_required()
+    def put(self):
+        """
+        Tandai semua notifikasi user sebagai dibaca.
+        """
+        try:
+            jumlah = mark_all_forum_notifications_as_read(get_jwt_identity())
+            if jumlah is None:
+                return {'status': 'error', 'message': 'Gagal memperbarui notifikasi'}, 500
+            return {'status': 'success', 'message': f'{jumlah} notifikasi ditandai dibaca', 'data': {'updated': jumlah}}, 200
+        except Exception as e:
+            logging.error(f"Unexpected error (notifications): {str(e)}")
+            return {'status': 'error', 'message': 'Internal server error'}, 500
+
+
 @forum_ns.route('/notifications/<int:id_notification>/read')
 class ForumNotificationReadResource(Resource):
     @jwt_required()
@@ -2,8 +2,8 @@ from flask import request, send_file
 from flask_restx import Namespace, Resource, reqparse, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
-from .utils.helper import generate_excel_hasiltryout, generate_pdf_hasiltryout
 from .utils.decorator import role_required, session_required
+from .utils.streaming import ndjson_response, wants_ndjson
 from .query.q_hasiltryout import *
 
 
@@ -45,6 +45,7 @@ class HasilTryoutListResource(Resource):
     @hasiltryout_ns.param('nilai_min', 'Nilai minimum')
     @hasiltryout_ns.param('nilai_max', 'Nilai maksimum')
     @hasiltryout_ns.param('status_pengerjaan', 'Status pengerjaan (selesai/belum)')
+    @hasiltryout_ns.param('format', 'Isi "ndjson" untuk streaming satu row per baris')
     def get(self):
         """
         Akses: (admin, mentor)
@@ -62,6 +63,8 @@ class HasilTryoutListResource(Resource):
         }
 
         try:
+            if wants_ndjson():  # ?format=ndjson → satu row per baris, dikirim bertahap
+                return ndjson_response(stream_hasiltryout_list(filters))
             data = get_hasiltryout_list(filters)
             return {"status": "success", "total": len(data), "data": data}, 200
 
@@ -159,11 +162,13 @@ class HasilTryoutExportResource(Resource):
 
             # === EXPORT EXCEL ===
             if export_format == "excel":
+                from .utils.exporter import generate_excel_hasiltryout  # lazy: pandas
                 export_path = generate_excel_hasiltryout(id_tryout, data)
                 return send_file(export_path, as_attachment=True)
 
             # === EXPORT PDF ===
             elif export_format == "pdf":
+                from .utils.exporter import generate_pdf_hasiltryout  # lazy: reportlab
                 export_path = generate_pdf_hasiltryout(id_tryout, data)
                 return send_file(export_path, as_attachment=True)
 
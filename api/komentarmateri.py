@@ -1,16 +1,27 @@
 from datetime import timedelta
 from flask import request
-from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+from flask_jwt_extended import jwt_required
 from flask_restx import Namespace, Resource, fields
 from sqlalchemy.exc import SQLAlchemyError
 
 from .utils.decorator import role_required, session_required
+from .utils.request_context import get_request_context
 from .query.q_materi import is_user_have_access_to_materi
 from .query.q_komentarmateri import *
+from .query.q_validasi import first_missing
 
 
 komentarmateri_ns = Namespace("komentar", description="Manajemen Komentar tiap materi")
 
+komentar_list_parser = komentarmateri_ns.parser()
+komentar_list_parser.add_argument("limit", type=int, default=20, help="Jumlah komentar utama per halaman (maks 50)")
+komentar_list_parser.add_argument("replies", type=int, default=3, help="Jumlah balasan yang disertakan per komentar (0-10)")
+komentar_list_parser.add_argument("cursor", type=str, required=False, help="next_cursor dari halaman sebelumnya")
+
+reply_list_parser = komentarmateri_ns.parser()
+reply_list_parser.add_argument("limit", type=int, default=20, help="Jumlah balasan per halaman (maks 50)")
+reply_list_parser.add_argument("cursor", type=str, required=False, help="next_cursor dari halaman sebelumnya")
+
 komentar_post_parser = komentarmateri_ns.parser()
 komentar_post_parser.add_argument("isi_komentar", type=str, required=True, help="Isi komentar")
 komentar_post_parser.add_argument("parent_id", type=int, required=False, help="ID komentar induk jika reply")
@@ -21,20 +32,31 @@ edit_komentar_model = komentarmateri_ns.model('EditKomentarInput', {
 
 @komentarmateri_ns.route('/<int:id_materi>/komentar/<int:id_paketkelas>')
 class KomentarMateriResource(Resource):
+    @komentarmateri_ns.expect(komentar_list_parser)
     @session_required
     @jwt_required()
     @role_required(['mentor', 'peserta'])
     def get(self, id_materi, id_paketkelas):
-        """Akses: (mentor/peserta), Ambil komentar materi sesuai hak akses kelas"""
-        current_user_id = get_jwt_identity()
-        current_role = get_jwt()['role']
-        print(f'current_kelas: {id_paketkelas}, current_role: {current_role}')
+        """
+        Akses: (mentor/peserta), Ambil komentar materi sesuai hak akses kelas.
+        Komentar utama per halaman (cursor), tiap komentar berisi reply_count dan beberapa balasan pertama.
+        total hanya disertakan pada halaman pertama.
+        """
+        args = komentar_list_parser.parse_args()
+        ctx = get_request_context()
 
-        if not is_user_have_access_to_materi(current_user_id, id_materi, current_role, id_paketkelas):
+        if not is_user_have_access_to_materi(ctx.id_user, id_materi, ctx.role, id_paketkelas):
             return {"status": "error", "message": "Akses ditolak."}, 403
 
-        komentar = get_komentar_by_materi(id_materi, id_paketkelas)
-        return {"status": "success", "total": len(komentar), "data": komentar}, 200
+        limit = min(max(args["limit"], 1), 50)
+        replies = min(max(args["replies"], 0), 10)
+        try:
+            result = get_komentar_by_materi(id_materi, id_paketkelas, limit=limit, replies=replies, cursor=args.get("cursor"))
+        except ValueError:
+            return {"status": "error", "message": "Cursor tidak valid"}, 400
+        if result is None:
+            return {"status": "error", "message": "Gagal mengambil komentar"}, 500
+        return {"status": "success", **result}, 200
 
     @komentarmateri_ns.expect(komentar_post_parser)
     @session_required
@@ -45,21 +67,53 @@ class KomentarMateriResource(Resource):
         args = komentar_post_parser.parse_args()
         isi_komentar = args.get("isi_komentar")
         parent_id = args.get("parent_id")
-        current_user_id = get_jwt_identity()
-        current_role = get_jwt()['role']
+        ctx = get_request_context()
 
-        if not is_user_have_access_to_materi(current_user_id, id_materi, current_role, id_paketkelas):
+        if not (ctx.is_mentor or ctx.is_peserta):
+            return {"status": "error", "message": "Akses ditolak."}, 403
+        # Cek akses & komentar induk dalam satu query
+        checks = {"akses": (f"akses_materi_{ctx.role}", {
+            "id_user": ctx.id_user, "id_materi": id_materi, "id_paketkelas": id_paketkelas
+        })}
+        if parent_id:
+            checks["parent"] = ("parent_komentar", {"id_materi": id_materi, "parent_id": parent_id})
+        invalid = first_missing(checks)
+        if invalid == "akses":
             return {"status": "error", "message": "Akses ditolak."}, 403
-        if parent_id and not is_valid_parent_komentar(id_materi, parent_id):
+        if invalid == "parent":
             return {"status": "error", "message": "Komentar induk tidak valid"}, 400
 
-        id_komentar = insert_komentar_materi(id_materi, current_user_id, isi_komentar, id_paketkelas, parent_id)
+        id_komentar = insert_komentar_materi(id_materi, ctx.id_user, isi_komentar, id_paketkelas, parent_id)
         if id_komentar:
             return {"status": "success", "message": "Komentar berhasil ditambahkan", "id_komentarmateri": id_komentar}, 201
         else:
             return {"status": "error", "message": "Gagal menambahkan komentar"}, 500
 
 
+@komentarmateri_ns.route('/<int:id_materi>/komentar/<int:id_paketkelas>/replies/<int:parent_id>')
+class KomentarRepliesResource(Resource):
+    @komentarmateri_ns.expect(reply_list_parser)
+    @session_required
+    @jwt_required()
+    @role_required(['mentor', 'peserta'])
+    def get(self, id_materi, id_paketkelas, parent_id):
+        """Akses: (mentor/peserta), Balasan dari satu komentar per halaman (cursor)"""
+        args = reply_list_parser.parse_args()
+        ctx = get_request_context()
+
+        if not is_user_have_access_to_materi(ctx.id_user, id_materi, ctx.role, id_paketkelas):
+            return {"status": "error", "message": "Akses ditolak."}, 403
+
+        limit = min(max(args["limit"], 1), 50)
+        try:
+            result = get_komentar_replies(id_materi, id_paketkelas, parent_id, limit=limit, cursor=args.get("cursor"))
+        except ValueError:
+            return {"status": "error", "message": "Cursor tidak valid"}, 400
+        if result is None:
+            return {"status": "error", "message": "Gagal mengambil balasan"}, 500
+        return {"status": "success", **result}, 200
+
+
 @komentarmateri_ns.route('/<int:id_materi>/komentar/<int:id_komentarmateri>')
 class EditKomentarMateriResource(Resource):
     @session_required
@@ -68,21 +122,19 @@ class EditKomentarMateriResource(Resource):
     @komentarmateri_ns.expect(edit_komentar_model)
     def put(self, id_materi, id_komentarmateri):
         """Akses: (mentor/peserta), Edit komentar milik sendiri (maks 5 menit setelah update)"""
-        current_user_id = get_jwt_identity()
-        print(current_user_id)
-        current_role = get_jwt()['role']
-
-        # Validasi akses ke materi
-        if not is_user_have_access_to_materi(current_user_id, id_materi, current_role):
-            return {"status": "error", "message": "Akses ditolak ke materi ini."}, 403
+        ctx = get_request_context()
 
         # Ambil data komentar
         komentar = get_komentar_by_id(id_komentarmateri)
-        if not komentar:
+        if not komentar or int(komentar['id_materi']) != int(id_materi):
             return {"status": "error", "message": "Komentar tidak ditemukan."}, 404
 
+        # Validasi akses ke materi (kelas diambil dari komentar)
+        if not is_user_have_access_to_materi(ctx.id_user, id_materi, ctx.role, komentar['id_paketkelas']):
+            return {"status": "error", "message": "Akses ditolak ke materi ini."}, 403
+
         # Validasi hanya pemilik yang bisa edit
-        if int(komentar['id_user']) != int(current_user_id):
+        if not ctx.is_owner(komentar['id_user']):
             return {"status": "error", "message": "Anda tidak memiliki izin untuk mengedit komentar ini."}, 403
 
         # Validasi durasi maksimal edit 5 menit
@@ -112,13 +164,9 @@ class HapusKomentarMateriResource(Resource):
         - Peserta: hanya bisa hapus komentar sendiri.
         - Mentor: bisa hapus semua komentar.
         """
-        current_user_id = get_jwt_identity()
-        current_role = get_jwt().get('role')
-
         result = soft_delete_komentar_materi(
             id_komentarmateri=id_komentarmateri,
-            id_user=current_user_id,
-            role=current_role
+            ctx=get_request_context()
         )
 
         if not result['status']:
@@ -5,6 +5,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from .utils.helper import generate_judul, normalize_bool_to_int
 from .utils.decorator import role_required, session_required
+from .utils.streaming import ndjson_response, wants_ndjson
 from .query.q_materi import *
 
 materi_ns = Namespace("materi", description="Manajemen Materi Modul")
@@ -44,6 +45,7 @@ materi_parser = reqparse.RequestParser()
 materi_parser.add_argument('page', type=int, default=1, help='Halaman')
 materi_parser.add_argument('limit', type=int, default=20, help='Jumlah data per halaman')
 materi_parser.add_argument('search', type=str, required=False, help='Search judul materi')
+materi_parser.add_argument('format', type=str, required=False, choices=('json', 'ndjson'), help='ndjson = streaming tanpa paging')
 
 @materi_ns.route('')
 class MateriListResource(Resource):
@@ -60,6 +62,9 @@ class MateriListResource(Resource):
             limit = args.get("limit")
             search = args.get("search")
 
+            if wants_ndjson():  # ?format=ndjson → semua materi, tanpa paging, dikirim bertahap
+                return ndjson_response(stream_all_materi(search))
+
             result = get_all_materi(page, limit, search)
 
             if not result or not result["data"]:
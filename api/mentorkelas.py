@@ -3,6 +3,7 @@ from flask_restx import Namespace, Resource, fields
 from sqlalchemy.exc import SQLAlchemyError
 from .utils.decorator import role_required, session_required
 from .query.q_mentorkelas import *
+from .query.q_validasi import first_missing
 
 mentorkelas_ns = Namespace("mentorkelas", description="Manajemen penugasan mentor ke kelas")
 
@@ -32,9 +33,14 @@ class MentorKelasListResource(Resource):
         """Akses: (admin), Tambahkan penugasan mentor ke kelas"""
         payload = request.get_json()
 
-        if not is_valid_mentor(payload["id_user"]):
+        # Validasi mentor & kelas dalam satu query
+        invalid = first_missing({
+            "mentor": ("mentor", {"id_user": payload["id_user"]}),
+            "kelas": ("paketkelas", {"id_paketkelas": payload["id_paketkelas"]})
+        })
+        if invalid == "mentor":
             return {"status": "error", "message": "Mentor tidak valid"}, 400
-        if not is_valid_kelas(payload["id_paketkelas"]):
+        if invalid == "kelas":
             return {"status": "error", "message": "Kelas tidak ditemukan"}, 400
 
         try:
@@ -70,9 +76,15 @@ class MentorKelasDetailResource(Resource):
             return {"status": "error", "message": "Data tidak ditemukan"}, 404
 
         # Validasi jika diubah
-        if "id_user" in data and not is_valid_mentor(data["id_user"]):
+        checks = {}
+        if "id_user" in data:
+            checks["mentor"] = ("mentor", {"id_user": data["id_user"]})
+        if "id_paketkelas" in data:
+            checks["kelas"] = ("paketkelas", {"id_paketkelas": data["id_paketkelas"]})
+        invalid = first_missing(checks)
+        if invalid == "mentor":
             return {"status": "error", "message": "Mentor tidak valid"}, 400
-        if "id_paketkelas" in data and not is_valid_kelas(data["id_paketkelas"]):
+        if invalid == "kelas":
             return {"status": "error", "message": "Kelas tidak valid"}, 400
 
         updated_payload = {
@@ -0,0 +1,79 @@
+# api/metrics.py
+import hmac
+import os
+import time
+
+from flask import Response, g, request
+
+from .query.q_tryout import count_active_attempts
+from .utils.metrics import collect_states, get_counter, get_histogram, merge_states, render_prometheus, start_flush_thread
+
+# Wajib "Authorization: Bearer <token>"; tanpa METRICS_TOKEN endpoint /metrics selalu ditolak
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+ACTIVE_ATTEMPTS_CACHE_SECONDS = float(os.getenv("ACTIVE_ATTEMPTS_CACHE_SECONDS", "10"))
+
+_active_attempts_cache = {"value": None, "expires_at": 0.0}
+
+
+def _namespace_resolver(restx_api):
+    """Map segmen pertama path (/auth, /forum, ...) ke nama namespace restx."""
+    prefixes = {}
+    for ns in restx_api.namespaces:
+        path = restx_api.ns_paths.get(ns) if hasattr(restx_api, "ns_paths") else None
+        if path and path != "/":
+            prefixes[path.strip("/").split("/")[0]] = ns.name
+
+    def resolve(path):
+        segment = path.strip("/").split("/")[0]
+        return prefixes.get(segment, "lainnya")
+    return resolve
+
+
+def _active_attempts():
+    now = time.monotonic()
+    if _active_attempts_cache["expires_at"] < now:
+        _active_attempts_cache["value"] = count_active_attempts()
+        _active_attempts_cache["expires_at"] = now + ACTIVE_ATTEMPTS_CACHE_SECONDS
+    return _active_attempts_cache["value"]
+
+
+def metrics_view():
+    if not METRICS_TOKEN:
+        return Response("Forbidden\n", status=403, mimetype="text/plain")
+    if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        return Response("Unauthorized\n", status=401, mimetype="text/plain")
+
+    extra_gauges = {}
+    active = _active_attempts()
+    if active is not None:
+        extra_gauges["tryout.active_attempts"] = active
+
+    body = render_prometheus(merge_states(collect_states()), extra_gauges=extra_gauges)
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app, restx_api):
+    """Latency per namespace + endpoint /metrics (format Prometheus)."""
+    resolve_namespace = _namespace_resolver(restx_api)
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _metrics_observe(response):
+        start = g.get("_metrics_start")
+        if start is None or request.path == "/metrics":
+            return response
+        labels = {
+            "namespace": resolve_namespace(request.path),
+            "method": request.method,
+            "status": f"{response.status_code // 100}xx"
+        }
+        get_histogram("http.request_duration_ms", labels=labels).observe((time.perf_counter() - start) * 1000)
+        get_counter("http.requests", labels=labels).inc()
+        # Worker hasil fork (gunicorn --preload) perlu thread flush sendiri
+        start_flush_thread()
+        return response
+
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
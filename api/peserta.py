@@ -2,9 +2,8 @@ import io
 import os
 import random
 import string
-import pandas as pd
 from flask import Response, logging, request, send_file
-from flask_restx import Namespace, Resource, fields, reqparse
+from flask_restx import Namespace, Resource, fields, inputs, reqparse
 from flask_restx.reqparse import FileStorage
 from email_validator import validate_email, EmailNotValidError
 from sqlalchemy.exc import SQLAlchemyError
@@ -12,7 +11,9 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from .query.q_peserta import *
 from .utils.helper import get_sample_file
+from .utils.credential_jobs import start_credential_job, get_credential_job
 from .utils.decorator import role_required, session_required
+from .utils.streaming import ndjson_response, wants_ndjson
 
 peserta_ns = Namespace("peserta", description="Peserta related endpoints")
 
@@ -29,12 +30,17 @@ upload_peserta_parser = reqparse.RequestParser()
 upload_peserta_parser.add_argument(
     "file", type=FileStorage, location="files", required=True, help="File peserta (CSV/XLSX) harus diunggah"
 )
+upload_peserta_parser.add_argument(
+    "kirim_email", type=inputs.boolean, location="form", required=False, default=False,
+    help="Kirim kode pemulihan ke email setiap peserta baru"
+)
 
 peserta_parser = reqparse.RequestParser()
 peserta_parser.add_argument('page', type=int, default=1, help='Halaman')
 peserta_parser.add_argument('limit', type=int, default=20, help='Jumlah data per halaman')
 peserta_parser.add_argument('search', type=str, required=False, help='Search nama/email')
 peserta_parser.add_argument('id_batch', type=int, required=False, help='Filter berdasarkan batch')
+peserta_parser.add_argument('format', type=str, required=False, choices=('json', 'ndjson'), help='ndjson = streaming tanpa paging')
 peserta_parser.add_argument(
     'batch_filter', type=str,
     required=False,
@@ -143,6 +149,9 @@ class PenggunaListResource(Resource):
             limit = args.get("limit")
             search = args.get("search")
 
+            if wants_ndjson():  # ?format=ndjson → semua data, tanpa paging, dikirim bertahap
+                return ndjson_response(stream_peserta_public(search))
+
             result = get_all_peserta_public(page, limit, search)
 
             if not result or not result["data"]:
@@ -194,6 +203,8 @@ class UploadPesertaResource(Resource):
         file = args['file']
 
         try:
+            import pandas as pd  # lazy: upload peserta jarang, jangan dimuat tiap worker
+
             # Load file
             if file.filename.endswith(".csv"):
                 try:
@@ -243,18 +254,36 @@ class UploadPesertaResource(Resource):
             jumlah_duplikat = len(inserted["duplicates"])
             jumlah_invalid = len(inserted["invalid_kelas"])
 
+            # Kirim kredensial di background, progress di-poll lewat id_job
+            id_job = None
+            if args.get("kirim_email") and inserted["inserted"]:
+                id_job = start_credential_job(inserted["inserted"])
+
             return {
                 "status": "success",
                 "message": f"{jumlah_sukses} peserta berhasil ditambahkan. {jumlah_duplikat} duplikat, {jumlah_invalid} gagal karena kelas tidak ditemukan.",
                 "duplicates": inserted["duplicates"],
-                "invalid_kelas": inserted["invalid_kelas"]
+                "invalid_kelas": inserted["invalid_kelas"],
+                "id_job_email": id_job
             }, 201
 
 
         except Exception as e:
             print(f"[ERROR UPLOAD PESERTA] {e}")
             return {"message": "Terjadi kesalahan saat mengunggah peserta"}, 500
-        
+
+
+@peserta_ns.route('/upload/email-job/<string:id_job>')
+class UploadPesertaEmailJobResource(Resource):
+    @role_required('admin')
+    def get(self, id_job):
+        """Akses: (Admin) | Progress pengiriman email kredensial hasil upload peserta"""
+        include_detail = request.args.get("detail", "true").lower() != "false"
+        job = get_credential_job(id_job, include_detail=include_detail)
+        if not job:
+            return {"status": "error", "message": "Job tidak ditemukan"}, 404
+        return {"status": "success", "data": job}, 200
+
 @peserta_ns.route('/<int:id_peserta>')
 class PesertaDetailResource(Resource):
     # @session_required
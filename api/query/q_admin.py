@@ -3,9 +3,11 @@ from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.security import generate_password_hash
 
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
 
 
 # query/q_admin.py
+@read_only
 def get_all_admin():
     engine = get_connection()
     try:
@@ -36,6 +38,7 @@ def insert_admin(payload):
         print(f"Error occurred: {str(e)}")
         return None
     
+@read_only
 def get_admin_by_id(id_admin):
     engine = get_connection()
     try:
@@ -7,13 +7,31 @@ from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from ..utils.config import get_connection, get_wita
+from ..utils.cache import invalidate_session, membership_cache_key, membership_epoch, set_cached_kelas
+from ..utils.password import verify_password
+from ..utils.pubsub import ensure_listening
+from ..utils.unit_of_work import release_connection
+
+
+def _simpan_rehash(connection, id_user, old_hash, new_hash):
+    """Ganti hash lama (parameter lebih murah) dengan hash baru setelah login sukses."""
+    if not new_hash:
+        return
+    connection.execute(
+        text("""
+            UPDATE users
+            SET password = :new_hash
+            WHERE id_user = :id_user AND password = :old_hash
+        """),
+        {"id_user": id_user, "old_hash": old_hash, "new_hash": new_hash}
+    )
 
 
 def get_login(payload):
     engine = get_connection()
     try:
+        # Ambil data user + join ke kelas; koneksi dilepas sebelum verifikasi password
         with engine.connect() as connection:
-            # Ambil data user + join ke kelas
             result = connection.execute(
                 text("""
                     SELECT u.id_user, u.nama, u.email, u.password, u.role, u.status, pk.id_paketkelas,
@@ -27,199 +45,202 @@ def get_login(payload):
                 """),
                 {"email": payload['email']}
             ).mappings().fetchone()
+        release_connection()
 
-            # Cek apakah password ada dan cocok dengan hash
-            if result and result['password']:
-                if check_password_hash(result['password'], payload['password']):
-                    access_token = create_access_token(
-                        identity=str(result['id_user']),
-                        additional_claims={"role": result['role'], 'id_paketkelas': result['id_paketkelas']}
-                    )
-                    return {
-                        'access_token': access_token,
-                        'message': 'login success',
-                        'id_user': result['id_user'],
-                        'nama': result['nama'],
-                        'email': result['email'],
-                        'role': result['role'],
-                        'id_paketkelas': result['id_paketkelas'],
-                        'nama_kelas': result['nama_kelas']  # Bisa NULL kalau belum ikut kelas
-                    }
-            return None
+        # Cek apakah password ada dan cocok dengan hash
+        if result and result['password']:
+            password_ok, new_hash = verify_password(result['password'], payload['password'])
+            if password_ok:
+                _simpan_login(engine, result, new_hash)
+                access_token = create_access_token(
+                    identity=str(result['id_user']),
+                    additional_claims={"role": result['role'], 'id_paketkelas': result['id_paketkelas']}
+                )
+                return {
+                    'access_token': access_token,
+                    'message': 'login success',
+                    'id_user': result['id_user'],
+                    'nama': result['nama'],
+                    'email': result['email'],
+                    'role': result['role'],
+                    'id_paketkelas': result['id_paketkelas'],
+                    'nama_kelas': result['nama_kelas']  # Bisa NULL kalau belum ikut kelas
+                }
+        return None
     except SQLAlchemyError as e:
         print(f"Error occurred: {str(e)}")
         return {'msg': 'Internal server error'}
     
+# User + kelas aktif (mentorkelas / pesertakelas) dalam satu query
+LOGIN_USER_QUERY = """
+    SELECT
+        u.id_user, u.nama, u.nickname, u.email,
+        u.password, u.kode_pemulihan, u.role, u.status,
+        kls.id_paketkelas, kls.nama_kelas
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT mk.id_paketkelas, pk.nama_kelas
+        FROM mentorkelas mk
+        JOIN paketkelas pk ON mk.id_paketkelas = pk.id_paketkelas
+        WHERE u.role = 'mentor'
+          AND mk.id_user = u.id_user
+          AND mk.status = 1
+          AND pk.status = 1
+        UNION ALL
+        SELECT pkls.id_paketkelas, pk.nama_kelas
+        FROM pesertakelas pkls
+        JOIN paketkelas pk ON pkls.id_paketkelas = pk.id_paketkelas
+        WHERE u.role = 'peserta'
+          AND pkls.id_user = u.id_user
+          AND pkls.status = 1
+          AND pk.status = 1
+        LIMIT 1
+    ) kls ON TRUE
+    WHERE u.email = :email
+    {filter_status}
+    LIMIT 1;
+"""
+
+# Butuh unique index sessions(id_user, device_type), lihat migrations/001
+UPSERT_SESSION_QUERY = text("""
+    INSERT INTO sessions (id_user, device_type, session_id, jwt_token, status, created_at, updated_at)
+    VALUES (:id_user, :device_type, :session_id, :jwt_token, 1, NOW(), NOW())
+    ON CONFLICT (id_user, device_type) DO UPDATE
+    SET session_id = EXCLUDED.session_id,
+        jwt_token = EXCLUDED.jwt_token,
+        status = 1,
+        updated_at = NOW()
+""")
+
+
+def _upsert_session(connection, id_user, device_type, session_id, jwt_token):
+    connection.execute(UPSERT_SESSION_QUERY, {
+        "id_user": id_user,
+        "device_type": device_type,
+        "session_id": session_id,
+        "jwt_token": jwt_token
+    })
+    invalidate_session(id_user, device_type)
+
+
+def _ambil_user_login(engine, email, filter_status=""):
+    """
+    Baca user + kelas aktif lalu lepas koneksi: verifikasi password (bisa antri sampai
+    PASSWORD_TIMEOUT) tidak boleh menahan koneksi pool maupun transaksi terbuka.
+    """
+    with engine.connect() as connection:
+        user = connection.execute(
+            text(LOGIN_USER_QUERY.format(filter_status=filter_status)),
+            {"email": email}
+        ).mappings().fetchone()
+    release_connection()
+    return user
+
+
+def _cache_kelas_login(user, epoch):
+    """Kelas aktif hasil query login → cache, kecuali ada invalidasi keanggotaan sejak sebelum query."""
+    if user['role'] in ("mentor", "peserta") and membership_epoch() == epoch:
+        set_cached_kelas(membership_cache_key(user['id_user'], user['role']), user['id_paketkelas'], user['nama_kelas'])
+
+
+def _simpan_login(engine, user, new_hash, device_type=None, session_id=None, jwt_token=None):
+    """Tulis rehash & session dalam satu transaksi pendek setelah password terverifikasi."""
+    if not new_hash and device_type is None:
+        return
+    with engine.begin() as connection:
+        _simpan_rehash(connection, user['id_user'], user['password'], new_hash)
+        if device_type is not None:
+            _upsert_session(connection, user['id_user'], device_type, session_id, jwt_token)
+
+
 def get_login_web(payload):
     engine = get_connection()
 
     try:
-        with engine.begin() as connection:
-
-            # 🔎 Cari user TANPA filter status dulu
-            user = connection.execute(
-                text("""
-                    SELECT 
-                        u.id_user, u.nama, u.nickname, u.email,
-                        u.password, u.kode_pemulihan, u.role, u.status
-                    FROM users u
-                    WHERE u.email = :email
-                    LIMIT 1;
-                """),
-                {"email": payload['email']}
-            ).mappings().fetchone()
-
-            # ❌ Email tidak ditemukan
-            if not user:
-                return {"error": "EMAIL_NOT_FOUND"}
-
-            # ❌ Akun tidak aktif
-            if user["status"] != 1:
-                return {"error": "ACCOUNT_INACTIVE"}
-
-            # ❌ Password kosong di DB
-            if not user['password']:
+        # 🔎 Cari user TANPA filter status dulu (sekaligus kelas aktif)
+        ensure_listening()  # invalidasi keanggotaan lewat event cache.catalog
+        epoch = membership_epoch()
+        user = _ambil_user_login(engine, payload['email'])
+
+        # ❌ Email tidak ditemukan
+        if not user:
+            return {"error": "EMAIL_NOT_FOUND"}
+
+        # ❌ Akun tidak aktif
+        if user["status"] != 1:
+            return {"error": "ACCOUNT_INACTIVE"}
+
+        # ❌ Password kosong di DB
+        if not user['password']:
+            return {"error": "INVALID_PASSWORD"}
+
+        # ❌ Validasi password (tanpa koneksi DB)
+        new_hash = None
+        if user['kode_pemulihan'] != payload['password']:
+            password_ok, new_hash = verify_password(user['password'], payload['password'])
+            if not password_ok:
                 return {"error": "INVALID_PASSWORD"}
 
-            # ❌ Validasi password
-            if user['kode_pemulihan'] != payload['password']:
-                if not check_password_hash(user['password'], payload['password']):
-                    return {"error": "INVALID_PASSWORD"}
-
-            # ===============================
-            # Ambil kelas (mentor/peserta)
-            # ===============================
-            id_paketkelas = None
-            nama_kelas = None
-
-            if user['role'] == "mentor":
-                kelas = connection.execute(
-                    text("""
-                        SELECT mk.id_paketkelas, pk.nama_kelas
-                        FROM mentorkelas mk
-                        JOIN paketkelas pk ON mk.id_paketkelas = pk.id_paketkelas
-                        WHERE mk.id_user = :id_user
-                          AND mk.status = 1
-                          AND pk.status = 1
-                        LIMIT 1
-                    """),
-                    {"id_user": user['id_user']}
-                ).mappings().fetchone()
+        id_paketkelas = user['id_paketkelas']
+        nama_kelas = user['nama_kelas']
 
-                if kelas:
-                    id_paketkelas = kelas['id_paketkelas']
-                    nama_kelas = kelas['nama_kelas']
+        _cache_kelas_login(user, epoch)
 
-            elif user['role'] == "peserta":
-                kelas = connection.execute(
-                    text("""
-                        SELECT pkls.id_paketkelas, pk.nama_kelas
-                        FROM pesertakelas pkls
-                        JOIN paketkelas pk ON pkls.id_paketkelas = pk.id_paketkelas
-                        WHERE pkls.id_user = :id_user
-                          AND pkls.status = 1
-                          AND pk.status = 1
-                        LIMIT 1
-                    """),
-                    {"id_user": user['id_user']}
-                ).mappings().fetchone()
+        # ===============================
+        # JWT GENERATION
+        # ===============================
+        if user['role'] in ["admin", "mentor"]:
+            access_token = create_access_token(
+                identity=str(user['id_user']),
+                additional_claims={
+                    "role": user['role']
+                }
+            )
+            _simpan_login(engine, user, new_hash)
 
-                if kelas:
-                    id_paketkelas = kelas['id_paketkelas']
-                    nama_kelas = kelas['nama_kelas']
+            return {
+                "success": True,
+                "data": {
+                    'access_token': access_token,
+                    'message': 'login success',
+                    'id_user': user['id_user'],
+                    'nama': user['nama'],
+                    'nickname': user['nickname'],
+                    'email': user['email'],
+                    'role': user['role'],
+                    'id_paketkelas': id_paketkelas,
+                    'nama_kelas': nama_kelas
+                }
+            }
 
-            # ===============================
-            # JWT GENERATION
-            # ===============================
-            if user['role'] in ["admin", "mentor"]:
-                access_token = create_access_token(
-                    identity=str(user['id_user']),
-                    additional_claims={
-                        "role": user['role']
-                    }
-                )
+        elif user['role'] == "peserta":
+            new_session_id = str(uuid.uuid4())
 
-                return {
-                    "success": True,
-                    "data": {
-                        'access_token': access_token,
-                        'message': 'login success',
-                        'id_user': user['id_user'],
-                        'nama': user['nama'],
-                        'nickname': user['nickname'],
-                        'email': user['email'],
-                        'role': user['role'],
-                        'id_paketkelas': id_paketkelas,
-                        'nama_kelas': nama_kelas
-                    }
+            access_token = create_access_token(
+                identity=str(user['id_user']),
+                additional_claims={
+                    "role": user['role'],
+                    "id_paketkelas": id_paketkelas,
+                    "session_id": new_session_id,
+                    "device_type": "web"
                 }
+            )
 
-            elif user['role'] == "peserta":
-                new_session_id = str(uuid.uuid4())
-
-                access_token = create_access_token(
-                    identity=str(user['id_user']),
-                    additional_claims={
-                        "role": user['role'],
-                        "id_paketkelas": id_paketkelas,
-                        "session_id": new_session_id,
-                        "device_type": "web"
-                    }
-                )
+            _simpan_login(engine, user, new_hash, "web", new_session_id, access_token)
 
-                # session handling (tetap)
-                old_session = connection.execute(
-                    text("""
-                        SELECT id_session FROM sessions
-                        WHERE id_user = :id_user AND device_type = 'web'
-                        LIMIT 1
-                    """),
-                    {"id_user": user['id_user']}
-                ).fetchone()
-
-                if old_session:
-                    connection.execute(
-                        text("""
-                            UPDATE sessions
-                            SET session_id = :session_id,
-                                jwt_token = :jwt_token,
-                                status = 1,
-                                updated_at = NOW()
-                            WHERE id_session = :id_session
-                        """),
-                        {
-                            "session_id": new_session_id,
-                            "jwt_token": access_token,
-                            "id_session": old_session.id_session
-                        }
-                    )
-                else:
-                    connection.execute(
-                        text("""
-                            INSERT INTO sessions 
-                            (id_user, device_type, session_id, jwt_token, status, created_at, updated_at)
-                            VALUES (:id_user, 'web', :session_id, :jwt_token, 1, NOW(), NOW())
-                        """),
-                        {
-                            "id_user": user['id_user'],
-                            "session_id": new_session_id,
-                            "jwt_token": access_token
-                        }
-                    )
-
-                return {
-                    "success": True,
-                    "data": {
-                        'access_token': access_token,
-                        'message': 'login success',
-                        'id_user': user['id_user'],
-                        'nama': user['nama'],
-                        'email': user['email'],
-                        'role': user['role'],
-                        'id_paketkelas': id_paketkelas,
-                        'nama_kelas': nama_kelas
-                    }
+            return {
+                "success": True,
+                "data": {
+                    'access_token': access_token,
+                    'message': 'login success',
+                    'id_user': user['id_user'],
+                    'nama': user['nama'],
+                    'email': user['email'],
+                    'role': user['role'],
+                    'id_paketkelas': id_paketkelas,
+                    'nama_kelas': nama_kelas
                 }
+            }
 
     except SQLAlchemyError as e:
         print(f"[get_login_web] Error: {str(e)}")
@@ -229,136 +250,55 @@ def get_login_web(payload):
 def get_login_mobile(payload):
     engine = get_connection()
     try:
-        with engine.begin() as connection:
-            # 🔎 Ambil data user dulu (tanpa join ke kelas)
-            user = connection.execute(
-                text("""
-                    SELECT u.id_user, u.nama, u.nickname, u.email, u.password, u.role, u.status
-                    FROM users u
-                    WHERE u.email = :email
-                      AND u.status = 1
-                    LIMIT 1;
-                """),
-                {"email": payload['email']}
-            ).mappings().fetchone()
-
-            if not user or not user['password']:
-                return None
-
-            if not check_password_hash(user['password'], payload['password']):
-                return None
-
-            id_paketkelas = None
-            nama_kelas = None
-
-            # 🔑 Kalau role = mentor → ambil dari mentorkelas
-            if user['role'] == "mentor":
-                kelas = connection.execute(
-                    text("""
-                        SELECT mk.id_paketkelas, pk.nama_kelas
-                        FROM mentorkelas mk
-                        JOIN paketkelas pk ON mk.id_paketkelas = pk.id_paketkelas
-                        WHERE mk.id_user = :id_user
-                          AND mk.status = 1
-                          AND pk.status = 1
-                        LIMIT 1
-                    """),
-                    {"id_user": user['id_user']}
-                ).mappings().fetchone()
-                if kelas:
-                    id_paketkelas = kelas['id_paketkelas']
-                    nama_kelas = kelas['nama_kelas']
-
-            # 🔑 Kalau role = peserta → ambil dari pesertakelas
-            elif user['role'] == "peserta":
-                kelas = connection.execute(
-                    text("""
-                        SELECT pkls.id_paketkelas, pk.nama_kelas
-                        FROM pesertakelas pkls
-                        JOIN paketkelas pk ON pkls.id_paketkelas = pk.id_paketkelas
-                        WHERE pkls.id_user = :id_user
-                          AND pkls.status = 1
-                          AND pk.status = 1
-                        LIMIT 1
-                    """),
-                    {"id_user": user['id_user']}
-                ).mappings().fetchone()
-                if kelas:
-                    id_paketkelas = kelas['id_paketkelas']
-                    nama_kelas = kelas['nama_kelas']
-
-            else:
-                # 🚫 Kalau role bukan peserta/mentor → tidak boleh login via mobile
-                return {'msg': 'Role tidak diizinkan untuk login di mobile'}
-
-            # === Session & JWT Handling ===
-            new_session_id = str(uuid.uuid4())
+        # 🔎 Ambil data user aktif + kelas aktif dalam satu query
+        ensure_listening()  # invalidasi keanggotaan lewat event cache.catalog
+        epoch = membership_epoch()
+        user = _ambil_user_login(engine, payload['email'], "AND u.status = 1")
 
-            access_token = create_access_token(
-                identity=str(user['id_user']),
-                additional_claims={
-                    "role": user['role'],
-                    "id_paketkelas": id_paketkelas,
-                    "nama_kelas": nama_kelas,
-                    "session_id": new_session_id,
-                    "device_type": "mobile"
-                }
-            )
-
-            # Cek apakah ada session lama untuk mobile
-            old_session = connection.execute(
-                text("""
-                    SELECT id_session FROM sessions
-                    WHERE id_user = :id_user AND device_type = 'mobile'
-                    LIMIT 1
-                """),
-                {"id_user": user['id_user']}
-            ).fetchone()
+        if not user or not user['password']:
+            return None
 
-            if old_session:
-                # Update session lama
-                connection.execute(
-                    text("""
-                        UPDATE sessions
-                        SET session_id = :session_id,
-                            jwt_token = :jwt_token,
-                            status = 1,
-                            updated_at = NOW()
-                        WHERE id_session = :id_session
-                    """),
-                    {
-                        "session_id": new_session_id,
-                        "jwt_token": access_token,
-                        "id_session": old_session.id_session
-                    }
-                )
-            else:
-                # Insert session baru
-                connection.execute(
-                    text("""
-                        INSERT INTO sessions (id_user, device_type, session_id, jwt_token, status, created_at, updated_at)
-                        VALUES (:id_user, 'mobile', :session_id, :jwt_token, 1, NOW(), NOW())
-                    """),
-                    {
-                        "id_user": user['id_user'],
-                        "session_id": new_session_id,
-                        "jwt_token": access_token
-                    }
-                )
+        password_ok, new_hash = verify_password(user['password'], payload['password'])
+        if not password_ok:
+            return None
 
-            return {
-                'access_token': access_token,
-                'message': 'login success',
-                'id_user': user['id_user'],
-                'nama': user['nama'],
-                "nickname": user['nickname'],
-                'email': user['email'],
-                'role': user['role'],
-                'id_paketkelas': id_paketkelas,
-                'nama_kelas': nama_kelas
+        # 🚫 Kalau role bukan peserta/mentor → tidak boleh login via mobile
+        if user['role'] not in ["mentor", "peserta"]:
+            _simpan_login(engine, user, new_hash)
+            return {'msg': 'Role tidak diizinkan untuk login di mobile'}
+
+        id_paketkelas = user['id_paketkelas']
+        nama_kelas = user['nama_kelas']
+        _cache_kelas_login(user, epoch)
+
+        # === Session & JWT Handling ===
+        new_session_id = str(uuid.uuid4())
+
+        access_token = create_access_token(
+            identity=str(user['id_user']),
+            additional_claims={
+                "role": user['role'],
+                "id_paketkelas": id_paketkelas,
+                "nama_kelas": nama_kelas,
+                "session_id": new_session_id,
+                "device_type": "mobile"
             }
+        )
+
+        _simpan_login(engine, user, new_hash, "mobile", new_session_id, access_token)
+
+        return {
+            'access_token': access_token,
+            'message': 'login success',
+            'id_user': user['id_user'],
+            'nama': user['nama'],
+            "nickname": user['nickname'],
+            'email': user['email'],
+            'role': user['role'],
+            'id_paketkelas': id_paketkelas,
+            'nama_kelas': nama_kelas
+        }
 
-        return None
     except SQLAlchemyError as e:
         print(f"[get_login_mobile] Error: {str(e)}")
         return {'msg': 'Internal server error'}
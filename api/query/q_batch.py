@@ -3,8 +3,11 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.helper import serialize_row
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from .q_catalog import invalidate_membership
 
 
+@read_only
 def get_all_batch():
     engine = get_connection()
     try:
@@ -35,6 +38,7 @@ def get_all_batch():
         return []
 
 
+@read_only
 def get_batch_by_id(id_batch):
     engine = get_connection()
     try:
@@ -111,6 +115,7 @@ def delete_batch(id_batch):
     
 
 """#=== Query lainnya (selain CRUD) ===#"""
+@read_only
 def get_batch_terbuka():
     engine = get_connection()
     try:
@@ -126,6 +131,7 @@ def get_batch_terbuka():
         print(f"[get_batch_terbuka] Error: {str(e)}")
         return []
 
+@read_only
 def get_peserta_batch(id_batch):
     engine = get_connection()
     try:
@@ -152,10 +158,12 @@ def delete_peserta_in_batch(id_userbatch):
                 UPDATE userbatch
                 SET status = 0, updated_at = :now
                 WHERE id_userbatch = :id AND status = 1
+                RETURNING id_user
             """), {
                 "id": id_userbatch,
                 "now": get_wita()
-            })
-            return result.rowcount > 0  # True kalau ada row ter-update
+            }).scalars().all()
+            invalidate_membership(conn, result)
+            return len(result) > 0  # True kalau ada row ter-update
     except SQLAlchemyError:
         return False
\ No newline at end of file
@@ -0,0 +1,273 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from ..utils.cache import (
+    MISSING, catalog_cache, catalog_cache_key, invalidate_catalog, invalidate_kelas_user, membership_cache,
+    membership_cache_key
+)
+from ..utils.config import get_connection
+from ..utils.db_routing import use_primary
+from ..utils.helper import serialize_row
+from ..utils.pubsub import ensure_listening, listen, publish
+
+# === Katalog konten per paket kelas / mentorship === #
+# Isi kelas (materi, modul) jarang berubah dan sama untuk semua anggotanya, jadi
+# di-cache per kelas, bukan per user. Daftar milik user = gabungan katalog kelas
+# yang diikutinya (keanggotaan juga di-cache, lihat MEMBERSHIP_QUERIES).
+# Penulisan di q_materi / q_modul / q_kelasprivate / q_paketkelas memanggil
+# invalidate_kelas / invalidate_modul / invalidate_mentorship di dalam transaksinya;
+# perubahan pesertakelas / mentorkelas / userbatch / mentorship memanggil
+# invalidate_membership. Event dikirim setelah commit ke semua worker lewat pubsub.
+CATALOG_TOPIC = "cache.catalog"
+
+
+def _on_invalidate(topic, data):
+    invalidate_catalog("kelas", data.get("kelas"))
+    invalidate_catalog("mentorship", data.get("mentorship"))
+    for id_user in data.get("users") or ():
+        invalidate_kelas_user(id_user)
+
+
+listen(CATALOG_TOPIC, _on_invalidate)
+
+
+""" #=== Invalidasi (dipanggil dari transaksi penulis) ===# """
+
+def invalidate_kelas(conn, id_paketkelas_list):
+    ids = sorted({int(i) for i in id_paketkelas_list or () if i is not None})
+    if ids:
+        publish(CATALOG_TOPIC, {"type": "catalog_invalidate", "kelas": ids}, connection=conn)
+
+
+def invalidate_modul(conn, id_modul_list):
+    """Katalog semua kelas yang memuat modul (termasuk relasi yang sudah nonaktif)."""
+    ids = [int(i) for i in id_modul_list or () if i is not None]
+    if not ids:
+        return
+    kelas = conn.execute(text("""
+        SELECT DISTINCT id_paketkelas FROM modulkelas WHERE id_modul = ANY(:ids)
+    """), {"ids": ids}).scalars().all()
+    invalidate_kelas(conn, kelas)
+
+
+def invalidate_mentorship(conn, id_mentorship):
+    if id_mentorship is not None:
+        publish(CATALOG_TOPIC, {"type": "catalog_invalidate", "mentorship": [int(id_mentorship)]}, connection=conn)
+
+
+""" #=== Keanggotaan user ===# """
+
+def invalidate_membership(conn, id_user_list):
+    """Cache keanggotaan user (login, /profile/kelas-saya, katalog) setelah transaksi conn commit."""
+    ids = sorted({int(i) for i in id_user_list or () if i is not None})
+    if ids:
+        publish(CATALOG_TOPIC, {"type": "catalog_invalidate", "users": ids}, connection=conn)
+
+
+MEMBERSHIP_QUERIES = {
+    # Kelas aktif peserta yang berada di batch aktif peserta (dasar daftar materi peserta).
+    # userbatch hanya dicek keberadaannya (EXISTS) agar riwayat batch/kelas tidak menggandakan baris.
+    "peserta_batch": """
+        SELECT DISTINCT pkls.id_paketkelas
+        FROM pesertakelas pkls
+        JOIN paketkelas pk ON pk.id_paketkelas = pkls.id_paketkelas AND pk.status = 1
+        WHERE pkls.id_user = :id_user
+          AND pkls.status = 1
+          AND EXISTS (
+              SELECT 1 FROM userbatch ub
+              WHERE ub.id_user = pkls.id_user
+                AND ub.id_batch = pk.id_batch
+                AND ub.status = 1
+          )
+    """,
+    "peserta": """
+        SELECT DISTINCT id_paketkelas FROM pesertakelas
+        WHERE id_user = :id_user AND status = 1
+    """,
+    "mentor": """
+        SELECT DISTINCT id_paketkelas FROM mentorkelas
+        WHERE id_user = :id_user AND status = 1
+    """,
+    "mentorship": """
+        SELECT id_mentorship FROM mentorship
+        WHERE id_peserta = :id_user AND status = 1
+    """,
+}
+
+
+def _membership(id_user, akses):
+    ensure_listening()
+    key = membership_cache_key(id_user, ("katalog", akses))
+    ids = membership_cache.get(key, MISSING)
+    if ids is MISSING:
+        # Dimuat dari primary: tepat setelah invalidasi replica bisa masih tertinggal
+        with use_primary():
+            engine = get_connection()
+            with engine.connect() as conn:
+                ids = tuple(sorted(
+                    conn.execute(text(MEMBERSHIP_QUERIES[akses]), {"id_user": id_user}).scalars().all()
+                ))
+        membership_cache.set(key, ids)
+    return ids
+
+
+""" #=== Katalog per kelas / mentorship ===# """
+
+def _time_key(value):
+    # NULL di akhir untuk urutan naik (dan di awal untuk turun), sama seperti ORDER BY Postgres
+    return (value is None, value or datetime.min)
+
+
+def _catalog(kind, scope, ids, loader):
+    """
+    Ambil katalog untuk tiap id dari cache; yang belum ada dimuat sekaligus
+    dengan satu query (loader(ids) → {id: [(sort_key, row), ...]}).
+    """
+    ensure_listening()
+    keys = {i: catalog_cache_key(kind, scope, i) for i in ids}
+    found, missing = {}, []
+    for i, key in keys.items():
+        rows = catalog_cache.get(key, MISSING)
+        if rows is MISSING:
+            missing.append(i)
+        else:
+            found[i] = rows
+    if missing:
+        # Dimuat dari primary: tepat setelah invalidasi replica bisa masih tertinggal, dan
+        # hasilnya tersimpan di versi baru sampai CATALOG_CACHE_TTL
+        with use_primary():
+            loaded = loader(missing)
+        for i in missing:
+            rows = loaded.get(i, [])
+            catalog_cache.set(keys[i], rows)
+            found[i] = rows
+    return found
+
+
+def _load_materi(id_paketkelas_list):
+    engine = get_connection()
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT m.id_materi, m.judul, m.tipe_materi, m.url_file, m.visibility, m.is_downloadable,
+                   m.id_modul, pk.id_paketkelas, pk.nama_kelas, mo.created_at AS modul_created_at
+            FROM (
+                -- relasi modul-kelas ganda (assign berulang) tidak boleh menggandakan materi
+                SELECT DISTINCT id_paketkelas, id_modul
+                FROM modulkelas
+                WHERE id_paketkelas = ANY(:ids) AND status = 1
+            ) mk
+            JOIN paketkelas pk ON pk.id_paketkelas = mk.id_paketkelas
+            JOIN modul mo ON mo.id_modul = mk.id_modul
+            JOIN materi m ON m.id_modul = mo.id_modul
+            WHERE m.status = 1
+        """), {"ids": list(id_paketkelas_list)}).mappings().fetchall()
+    catalog = {}
+    for row in rows:
+        row = dict(row)
+        sort_key = (_time_key(row.pop("modul_created_at")), row["id_materi"])
+        catalog.setdefault(row["id_paketkelas"], []).append((sort_key, row))
+    return catalog
+
+
+def _load_modul(id_paketkelas_list):
+    engine = get_connection()
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT m.id_modul, m.judul, m.deskripsi, m.owner, m.visibility, m.status,
+                   pk.id_paketkelas, pk.nama_kelas, pk.deskripsi AS deskripsi_kelas
+            FROM (
+                SELECT DISTINCT id_paketkelas, id_modul
+                FROM modulkelas
+                WHERE id_paketkelas = ANY(:ids) AND status = 1
+            ) mkls
+            JOIN modul m ON m.id_modul = mkls.id_modul
+            JOIN paketkelas pk ON pk.id_paketkelas = mkls.id_paketkelas
+            WHERE pk.status = 1
+              AND m.status = 1
+        """), {"ids": list(id_paketkelas_list)}).mappings().fetchall()
+    catalog = {}
+    for row in rows:
+        row = dict(row)
+        catalog.setdefault(row["id_paketkelas"], []).append(((row["id_modul"], row["id_paketkelas"]), row))
+    return catalog
+
+
+def _load_materi_private(id_mentorship_list):
+    engine = get_connection()
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT
+                mp.id_materi_private,
+                mp.judul,
+                mp.tipe_materi,
+                mp.url_file,
+                mp.visibility,
+                mp.is_downloadable,
+                mp.viewer_only,
+                mp.created_at,
+
+                m.id_mentorship,
+                m.nama_mentorship,
+
+                u.id_user AS id_owner,
+                u.nama AS nama_owner
+            FROM materi_private mp
+            JOIN mentorship m
+                ON m.id_mentorship = mp.id_mentorship
+               AND m.status = 1
+            LEFT JOIN users u
+                ON u.id_user = mp.id_owner
+            WHERE mp.id_mentorship = ANY(:ids)
+              AND mp.status = 1
+              AND mp.visibility = 'open'
+        """), {"ids": list(id_mentorship_list)}).mappings().fetchall()
+    catalog = {}
+    for row in rows:
+        # Digabung dengan reverse=True → terbaru dulu
+        sort_key = (_time_key(row["created_at"]), row["id_materi_private"])
+        catalog.setdefault(row["id_mentorship"], []).append((sort_key, serialize_row(row)))
+    return catalog
+
+
+def _compose(catalogs, keep=None, drop=(), reverse=False):
+    """Gabungkan katalog beberapa kelas jadi satu list terurut (salinan baris, cache tidak ikut berubah)."""
+    merged = [
+        (sort_key, row)
+        for rows in catalogs.values()
+        for sort_key, row in rows
+        if keep is None or keep(row)
+    ]
+    merged.sort(key=lambda item: item[0], reverse=reverse)
+    return [{k: v for k, v in row.items() if k not in drop} for _, row in merged]
+
+
+""" #=== Daftar milik user ===# """
+
+def materi_catalog_peserta(id_user):
+    """Materi open dari kelas peserta (urut modul terlama), tanpa kolom visibility."""
+    ids = _membership(id_user, "peserta_batch")
+    catalogs = _catalog("materi", "kelas", ids, _load_materi)
+    return _compose(catalogs, keep=lambda row: row["visibility"] == "open", drop=("visibility",))
+
+
+def materi_catalog_mentor(id_user):
+    ids = _membership(id_user, "mentor")
+    return _compose(_catalog("materi", "kelas", ids, _load_materi))
+
+
+def modul_catalog(id_user, role):
+    """Modul dari kelas yang diampu (mentor, semua visibility) / diikuti (peserta, hanya open)."""
+    if role == "mentor":
+        return _compose(_catalog("modul", "kelas", _membership(id_user, "mentor"), _load_modul))
+    if role == "peserta":
+        catalogs = _catalog("modul", "kelas", _membership(id_user, "peserta"), _load_modul)
+        return _compose(catalogs, keep=lambda row: row["visibility"] == "open")
+    return []
+
+
+def materi_private_catalog(id_user, tipe=None):
+    ids = _membership(id_user, "mentorship")
+    catalogs = _catalog("materi_private", "mentorship", ids, _load_materi_private)
+    keep = (lambda row: row["tipe_materi"] == tipe) if tipe else None
+    return _compose(catalogs, keep=keep, reverse=True)
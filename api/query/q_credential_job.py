@@ -0,0 +1,112 @@
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..utils.config import MAIL_MAX_JOBS_TERSIMPAN, get_connection, get_wita
+from ..utils.helper import serialize_row_datetime
+
+# === Progress job email kredensial (utils/credential_jobs.py) === #
+# Disimpan di database agar bisa di-poll dari worker mana pun, bukan hanya worker
+# yang menjalankan thread job-nya.
+
+
+def insert_credential_job(id_job, penerima_list):
+    """Simpan job baru + satu baris detail per penerima (status 'antri')."""
+    engine = get_connection()
+    now = get_wita()
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO credential_email_job (id_job, status, total, terkirim, gagal, created_at, updated_at)
+                VALUES (:id_job, 'antri', :total, 0, 0, :now, :now)
+            """), {"id_job": id_job, "total": len(penerima_list), "now": now})
+            if penerima_list:
+                conn.execute(text("""
+                    INSERT INTO credential_email_job_detail (id_job, urutan, id_user, email, status)
+                    VALUES (:id_job, :urutan, :id_user, :email, 'antri')
+                """), [
+                    {"id_job": id_job, "urutan": i, "id_user": p["id_user"], "email": p["email"]}
+                    for i, p in enumerate(penerima_list)
+                ])
+            # Buang job paling lama jika melebihi batas (detail ikut terhapus, ON DELETE CASCADE)
+            conn.execute(text("""
+                DELETE FROM credential_email_job
+                WHERE id_job IN (
+                    SELECT id_job FROM credential_email_job
+                    ORDER BY created_at DESC, id_job
+                    OFFSET :batas
+                )
+            """), {"batas": MAIL_MAX_JOBS_TERSIMPAN})
+            return True
+    except SQLAlchemyError as e:
+        print(f"[insert_credential_job] Error: {e}")
+        return False
+
+
+def update_credential_job_status(id_job, status, selesai=False):
+    engine = get_connection()
+    now = get_wita()
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("""
+                UPDATE credential_email_job
+                SET status = :status,
+                    updated_at = :now,
+                    finished_at = CASE WHEN :selesai THEN :now ELSE finished_at END
+                WHERE id_job = :id_job
+            """), {"id_job": id_job, "status": status, "selesai": selesai, "now": now})
+    except SQLAlchemyError as e:
+        print(f"[update_credential_job_status] Error: {e}")
+
+
+def catat_hasil_credential_job(id_job, hasil):
+    """hasil: list (id_user, sukses, error); detail & counter job diperbarui dalam satu transaksi."""
+    if not hasil:
+        return
+    engine = get_connection()
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("""
+                UPDATE credential_email_job_detail
+                SET status = :status, error = :error
+                WHERE id_job = :id_job AND id_user = :id_user
+            """), [
+                {"id_job": id_job, "id_user": id_user, "status": "terkirim" if sukses else "gagal", "error": error}
+                for id_user, sukses, error in hasil
+            ])
+            terkirim = sum(1 for _, sukses, _ in hasil if sukses)
+            conn.execute(text("""
+                UPDATE credential_email_job
+                SET terkirim = terkirim + :terkirim,
+                    gagal = gagal + :gagal,
+                    updated_at = :now
+                WHERE id_job = :id_job
+            """), {"id_job": id_job, "terkirim": terkirim, "gagal": len(hasil) - terkirim, "now": get_wita()})
+    except SQLAlchemyError as e:
+        print(f"[catat_hasil_credential_job] Error: {e}")
+
+
+def get_credential_job_by_id(id_job, include_detail=True):
+    """Snapshot progress job; None jika job tidak ditemukan."""
+    engine = get_connection()
+    try:
+        with engine.connect() as conn:
+            job = conn.execute(text("""
+                SELECT id_job, status, total, terkirim, gagal, created_at, updated_at, finished_at
+                FROM credential_email_job
+                WHERE id_job = :id_job
+            """), {"id_job": id_job}).mappings().fetchone()
+            if not job:
+                return None
+            snapshot = serialize_row_datetime(job)
+            if include_detail:
+                detail = conn.execute(text("""
+                    SELECT id_user, email, status, error
+                    FROM credential_email_job_detail
+                    WHERE id_job = :id_job
+                    ORDER BY urutan
+                """), {"id_job": id_job}).mappings().fetchall()
+                snapshot["detail"] = [dict(row) for row in detail]
+            return snapshot
+    except SQLAlchemyError as e:
+        print(f"[get_credential_job_by_id] Error: {e}")
+        return None
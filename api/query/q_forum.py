@@ -1,66 +1,152 @@
+from datetime import datetime
+
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.helper import serialize_row
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from ..utils.keyset import decode_cursor, keyset_page
+from ..utils.serializer import serialize_rows
+from ..utils.pubsub import publish
+from .q_forum_search import index_comment, index_thread, remove_comment, remove_thread, use_fulltext
 
 
 """ #=== Endpoint Thread ===# """
 
-def get_all_forum_thread(id_batch=None, id_materi=None, search=None):
+@read_only
+def get_all_forum_thread(id_batch=None, id_materi=None, search=None, is_solved=None, limit=20, cursor=None):
     """
-    Mengambil semua thread forum dengan opsi filter:
+    Mengambil thread forum (terbaru aktif di atas) dengan opsi filter:
     - id_batch (untuk membatasi batch tertentu)
     - id_materi (untuk materi tertentu)
     - search (mencari berdasarkan judul/isi thread)
+    - is_solved (hanya thread solved / belum solved)
+    Keyset paging pada (last_activity, id_thread): cursor = next_cursor dari halaman sebelumnya.
+    total_komentar diambil dari counter forum_thread.comment_count (tanpa JOIN forum_comment).
+    Cursor tidak valid → ValueError.
     """
+    params = {'limit': limit + 1}
+    filters = ""
+    if id_batch:
+        filters += " AND ft.id_batch = :id_batch"
+        params['id_batch'] = id_batch
+    if id_materi:
+        filters += " AND ft.id_materi = :id_materi"
+        params['id_materi'] = id_materi
+    if search and use_fulltext():
+        # tsvector + GIN (migrations/003_forum_fulltext.sql)
+        filters += " AND ft.search_vector @@ websearch_to_tsquery('forum_search', :search)"
+        params['search'] = search
+    elif search:
+        filters += " AND (ft.judul ILIKE :search OR ft.isi ILIKE :search)"
+        params['search'] = f"%{search}%"
+    if is_solved is not None:
+        filters += " AND ft.is_solved = :is_solved"
+        params['is_solved'] = bool(is_solved)
+    if cursor:
+        params['cursor_activity'], params['cursor_id'] = decode_cursor(cursor, (datetime, int))
+        filters += " AND (ft.last_activity, ft.id_thread) < (:cursor_activity, :cursor_id)"
+
     engine = get_connection()
     try:
         with engine.connect() as connection:
-            # Base SQL
-            query = """
+            # Halaman thread dulu (index last_activity), baru JOIN nama untuk <= limit row
+            query = f"""
+                WITH page AS (
+                    SELECT ft.*
+                    FROM forum_thread ft
+                    WHERE ft.status = 1{filters}
+                    ORDER BY ft.last_activity DESC, ft.id_thread DESC
+                    LIMIT :limit
+                )
                 SELECT 
                     ft.id_thread, ft.judul AS thread_subject, ft.isi, ft.is_solved, ft.status, ft.created_at, ft.updated_at,
                     ft.id_materi, m.judul, ft.id_paketkelas, pk.nama_kelas, ft.id_batch, b.nama_batch,
                     u.id_user, u.nama AS nama_user,
-                    COALESCE(COUNT(fc.id_comment), 0) AS total_komentar
-                FROM forum_thread ft
+                    ft.comment_count AS total_komentar, ft.last_activity
+                FROM page ft
                 JOIN users u ON u.id_user = ft.id_user
                 LEFT JOIN materi m ON m.id_materi = ft.id_materi
                 LEFT JOIN paketkelas pk ON pk.id_paketkelas = ft.id_paketkelas
                 LEFT JOIN batch b ON b.id_batch = ft.id_batch
-                LEFT JOIN forum_comment fc ON fc.id_thread = ft.id_thread
-                WHERE ft.status = 1
-            """
-            # Tambah filter dinamis
-            params = {}
-            if id_batch:
-                query += " AND ft.id_batch = :id_batch"
-                params['id_batch'] = id_batch
-            if id_materi:
-                query += " AND ft.id_materi = :id_materi"
-                params['id_materi'] = id_materi
-            if search:
-                query += " AND (ft.judul AS thread_subject ILIKE :search OR ft.isi ILIKE :search)"
-                params['search'] = f"%{search}%"
-
-            query += """
-                GROUP BY ft.id_thread, m.judul, pk.nama_kelas, b.nama_batch, u.id_user
-                ORDER BY ft.created_at DESC;
+                ORDER BY ft.last_activity DESC, ft.id_thread DESC
             """
+            rows = connection.execute(text(query), params).fetchall()
+            rows, next_cursor = keyset_page(rows, limit, key=lambda r: (r.last_activity, r.id_thread))
 
-            result = connection.execute(text(query), params).mappings().fetchall()
-            threads = [serialize_row(row) for row in result]
-
-            return threads
+            return {
+                'data': serialize_rows(rows, mode="date"),
+                'next_cursor': next_cursor,
+                'limit': limit
+            }
     except SQLAlchemyError as e:
         print(f"Database error: {str(e)}")
-        return []
-
+        return None
 
-def get_forum_thread_detail(id_thread):
+# Urutan komentar level atas: (ORDER BY, kondisi keyset, tipe nilai cursor, kunci cursor dari row)
+COMMENT_SORTS = {
+    'old': (
+        "fc.created_at ASC, fc.id_comment ASC",
+        "(fc.created_at, fc.id_comment) > (:cursor_0, :cursor_1)",
+        (datetime, int), lambda r: (r.created_at, r.id_comment)
+    ),
+    'new': (
+        "fc.created_at DESC, fc.id_comment DESC",
+        "(fc.created_at, fc.id_comment) < (:cursor_0, :cursor_1)",
+        (datetime, int), lambda r: (r.created_at, r.id_comment)
+    ),
+    'top': (
+        "fc.vote_score DESC, fc.id_comment ASC",
+        "(fc.vote_score < :cursor_0 OR (fc.vote_score = :cursor_0 AND fc.id_comment > :cursor_1))",
+        (int, int), lambda r: (r.total_vote, r.id_comment)
+    ),
+}
+
+COMMENT_COLUMNS = """
+    fc.id_comment, fc.parent_id, fc.id_user, u.nama AS nama_user,
+    fc.isi, fc.is_solved_answer, fc.is_deleted, fc.deleted_by_mentor,
+    fc.created_at, fc.updated_at,
+    fc.vote_score AS total_vote, fc.reply_count
+"""
+
+
+def _comment_page(connection, where, params, sort='old', limit=20, cursor=None):
     """
-    Mengambil detail satu thread beserta komentar-komentarnya (nested)
+    Satu halaman komentar (tanpa balasan) dengan keyset paging.
+    total_vote & reply_count dibaca dari counter forum_comment, bukan agregasi forum_vote.
+    sort/cursor tidak valid → ValueError.
+    """
+    if sort not in COMMENT_SORTS:
+        raise ValueError("Urutan komentar tidak valid")
+    order_by, keyset, cursor_types, cursor_key = COMMENT_SORTS[sort]
+    params = {**params, 'limit': limit + 1}
+    if cursor:
+        params['cursor_0'], params['cursor_1'] = decode_cursor(cursor, cursor_types)
+        where += f" AND {keyset}"
+
+    rows = connection.execute(text(f"""
+        SELECT {COMMENT_COLUMNS}
+        FROM forum_comment fc
+        JOIN users u ON u.id_user = fc.id_user
+        WHERE {where}
+        ORDER BY {order_by}
+        LIMIT :limit
+    """), params).fetchall()
+    rows, next_cursor = keyset_page(rows, limit, key=cursor_key)
+    return {
+        'data': serialize_rows(rows, mode="date"),
+        'next_cursor': next_cursor,
+        'limit': limit,
+        'sort': sort
+    }
+
+
+@read_only
+def get_forum_thread_detail(id_thread, sort='old', limit=20):
+    """
+    Mengambil detail satu thread beserta halaman pertama komentar level atas.
+    Balasan tiap komentar dimuat terpisah lewat get_comment_replies (lihat reply_count).
     """
     engine = get_connection()
     try:
@@ -70,7 +156,7 @@ def get_forum_thread_detail(id_thread):
                 SELECT 
                     ft.id_thread, ft.judul as thread_subject, ft.isi, ft.is_solved, ft.status, ft.created_at, ft.updated_at,
                     ft.id_materi, m.judul, ft.id_paketkelas, pk.nama_kelas, ft.id_batch, b.nama_batch,
-                    u.id_user, u.nama AS nama_user
+                    u.id_user, u.nama AS nama_user, ft.comment_count
                 FROM forum_thread ft
                 JOIN users u ON u.id_user = ft.id_user AND u.status = 1
                 LEFT JOIN materi m ON m.id_materi = ft.id_materi AND m.status = 1
@@ -85,39 +171,14 @@ def get_forum_thread_detail(id_thread):
                 return None
 
             thread_data = serialize_row(thread_result)
+            page = _comment_page(
+                connection, "fc.id_thread = :id_thread AND fc.parent_id IS NULL",
+                {'id_thread': id_thread}, sort=sort, limit=limit
+            )
 
-            # Ambil semua komentar untuk thread ini
-            comment_query = text("""
-                SELECT 
-                    fc.id_comment, fc.parent_id, fc.id_user, u.nama AS nama_user,
-                    fc.isi, fc.is_solved_answer, fc.is_deleted, fc.deleted_by_mentor,
-                    fc.created_at, fc.updated_at,
-                    COALESCE(SUM(fv.vote_type), 0) AS total_vote
-                FROM forum_comment fc
-                JOIN users u ON u.id_user = fc.id_user AND u.status = 1
-                LEFT JOIN forum_vote fv ON fv.id_comment = fc.id_comment
-                WHERE fc.id_thread = :id_thread
-                GROUP BY fc.id_comment, u.nama
-                ORDER BY fc.created_at ASC;
-            """)
-            comment_result = connection.execute(comment_query, {'id_thread': id_thread}).mappings().fetchall()
-            comments = [serialize_row(row) for row in comment_result]
-
-            # Bentuk komentar nested
-            comment_dict = {c['id_comment']: c for c in comments}
-            for c in comment_dict.values():
-                c['replies'] = []
-
-            root_comments = []
-            for c in comments:
-                parent_id = c['parent_id']
-                if parent_id and parent_id in comment_dict:
-                    comment_dict[parent_id]['replies'].append(c)
-                else:
-                    root_comments.append(c)
-
-            thread_data['comments'] = root_comments
-            thread_data['total_comments'] = len(comments)
+            thread_data['comments'] = page['data']
+            thread_data['comments_next_cursor'] = page['next_cursor']
+            thread_data['total_comments'] = thread_data.pop('comment_count')
 
             return thread_data
 
@@ -137,11 +198,11 @@ def create_forum_thread(id_user, judul, isi, id_materi=None, id_paketkelas=None,
             query = text("""
                 INSERT INTO forum_thread (
                     id_user, judul, isi, id_materi, id_paketkelas, id_batch,
-                    is_solved, status, created_at, updated_at
+                    is_solved, status, created_at, updated_at, comment_count, last_activity
                 )
                 VALUES (
                     :id_user, :judul, :isi, :id_materi, :id_paketkelas, :id_batch,
-                    FALSE, 1, :created_at, :updated_at
+                    FALSE, 1, :created_at, :updated_at, 0, :created_at
                 )
                 RETURNING id_thread, judul, isi, created_at;
             """)
@@ -157,6 +218,10 @@ def create_forum_thread(id_user, judul, isi, id_materi=None, id_paketkelas=None,
             }
 
             result = connection.execute(query, params).mappings().fetchone()
+            if result:
+                _subscribe(connection, result['id_thread'], id_user)
+                index_thread(result['id_thread'], judul, isi, id_batch=id_batch,
+                             id_materi=id_materi, created_at=result['created_at'])
             return serialize_row(result) if result else None
 
     except SQLAlchemyError as e:
@@ -164,11 +229,12 @@ def create_forum_thread(id_user, judul, isi, id_materi=None, id_paketkelas=None,
         return None
 
 
-def update_forum_thread(id_thread, id_user, judul=None, isi=None):
+def update_forum_thread(id_thread, ctx, judul=None, isi=None):
     """
     Mengupdate thread (judul atau isi)
     - Hanya pembuat thread atau admin yang boleh mengedit
     - Jika field dikirim null, maka nilai sebelumnya akan dipertahankan
+    - ctx: RequestContext (id_user & role dari JWT)
     """
     engine = get_connection()
     try:
@@ -184,12 +250,8 @@ def update_forum_thread(id_thread, id_user, judul=None, isi=None):
                 return 'not_found'
 
             # Cek kepemilikan atau role admin
-            if int(check['id_user']) != int(id_user):
-                role_check = connection.execute(text("""
-                    SELECT role FROM users WHERE id_user = :id_user
-                """), {'id_user': id_user}).scalar()
-                if role_check != 'admin':
-                    return 'forbidden'
+            if not (ctx.is_owner(check['id_user']) or ctx.is_admin):
+                return 'forbidden'
 
             # Gunakan nilai lama jika input null
             new_judul = judul if judul is not None else check['judul']
@@ -215,6 +277,8 @@ def update_forum_thread(id_thread, id_user, judul=None, isi=None):
             }
 
             updated = connection.execute(text(update_query), params).mappings().first()
+            if updated:
+                index_thread(id_thread, new_judul, new_isi)
             return serialize_row(updated) if updated else None
 
     except SQLAlchemyError as e:
@@ -222,7 +286,7 @@ def update_forum_thread(id_thread, id_user, judul=None, isi=None):
         return None
 
 
-def delete_forum_thread(id_thread, id_user):
+def delete_forum_thread(id_thread, ctx):
     """
     Menghapus thread (soft delete)
     - Hanya pembuat thread atau admin yang boleh menghapus
@@ -241,13 +305,8 @@ def delete_forum_thread(id_thread, id_user):
                 return 'not_found'
 
             # Validasi kepemilikan atau admin
-            if int(check['id_user']) != int(id_user):
-                role_check = connection.execute(text("""
-                    SELECT role FROM users WHERE id_user = :id_user
-                """), {'id_user': id_user}).scalar()
-
-                if role_check != 'admin':
-                    return 'forbidden'
+            if not (ctx.is_owner(check['id_user']) or ctx.is_admin):
+                return 'forbidden'
 
             # Soft delete
             connection.execute(text("""
@@ -256,6 +315,7 @@ def delete_forum_thread(id_thread, id_user):
                 WHERE id_thread = :id_thread
             """), {'id_thread': id_thread, "now": get_wita()})
 
+            remove_thread(id_thread)
             return True
 
     except SQLAlchemyError as e:
@@ -282,20 +342,25 @@ def create_forum_comment(id_user, id_thread, isi, parent_id=None):
             if not thread_check:
                 return 'not_found'
 
-            # Jika parent_id diisi, pastikan komentar induk valid
+            # Jika parent_id diisi, pastikan komentar induk valid sekaligus naikkan reply_count-nya
+            # (ValueError di bawah me-rollback update ini)
             if parent_id:
                 parent_check = connection.execute(text("""
-                    SELECT id_comment FROM forum_comment
+                    UPDATE forum_comment
+                    SET reply_count = reply_count + 1
                     WHERE id_comment = :parent_id AND id_thread = :id_thread AND status = 1
+                    RETURNING id_comment
                 """), {'parent_id': parent_id, 'id_thread': id_thread}).mappings().first()
 
                 if not parent_check:
                     raise ValueError("Komentar induk tidak ditemukan atau sudah dihapus")
 
-            # Insert komentar baru
+            # Insert komentar baru; created_at dari get_wita() (jam yang sama dengan thread),
+            # bukan default NOW() database, agar last_activity sebanding antar thread
+            wita = get_wita()
             insert_query = text("""
-                INSERT INTO forum_comment (id_user, id_thread, isi, parent_id)
-                VALUES (:id_user, :id_thread, :isi, :parent_id)
+                INSERT INTO forum_comment (id_user, id_thread, isi, parent_id, created_at)
+                VALUES (:id_user, :id_thread, :isi, :parent_id, :created_at)
                 RETURNING id_comment, id_user, id_thread, isi, parent_id, created_at;
             """)
 
@@ -303,9 +368,34 @@ def create_forum_comment(id_user, id_thread, isi, parent_id=None):
                 'id_user': id_user,
                 'id_thread': id_thread,
                 'isi': isi,
-                'parent_id': parent_id
+                'parent_id': parent_id,
+                'created_at': wita
             }).mappings().first()
 
+            # Counter thread ikut transaksi yang sama dengan insert komentar
+            connection.execute(text("""
+                UPDATE forum_thread
+                SET comment_count = comment_count + 1,
+                    last_activity = GREATEST(last_activity, :created_at)
+                WHERE id_thread = :id_thread
+            """), {'id_thread': id_thread, 'created_at': wita})
+
+            # Komentator ikut berlangganan thread, lalu notifikasi ke semua subscriber lain
+            _subscribe(connection, id_thread, id_user)
+            tipe = 'reply' if parent_id else 'comment'
+            penerima = _fan_out_notification(connection, id_thread, result['id_comment'], tipe, id_actor=id_user)
+
+            # Push delta ke client yang membuka thread & ke penerima notifikasi (dikirim setelah commit)
+            publish(f"forum.thread.{id_thread}", {
+                'type': 'comment_created', 'id_thread': id_thread, 'id_comment': result['id_comment'],
+                'parent_id': parent_id, 'id_user': result['id_user'], 'isi': isi,
+                'created_at': result['created_at']
+            }, connection)
+            publish([f"user.{r}" for r in penerima], {
+                'type': 'notification', 'tipe': tipe, 'id_thread': id_thread, 'id_comment': result['id_comment']
+            }, connection)
+
+            index_comment(result['id_comment'], id_thread, isi, created_at=result['created_at'])
             return serialize_row(result) if result else None
 
     except SQLAlchemyError as e:
@@ -316,9 +406,12 @@ def create_forum_comment(id_user, id_thread, isi, parent_id=None):
         return None
 
 
-def get_thread_comments(id_thread):
+@read_only
+def get_thread_comments(id_thread, sort='old', limit=20, cursor=None):
     """
-    Ambil semua komentar dari sebuah thread dalam struktur nested (balasan bertingkat)
+    Ambil komentar level atas dari sebuah thread per halaman (keyset).
+    - sort: 'old' | 'new' | 'top' (vote terbanyak)
+    - Setiap komentar membawa reply_count; balasan dimuat lewat get_comment_replies
     """
     engine = get_connection()
     try:
@@ -331,53 +424,44 @@ def get_thread_comments(id_thread):
             if not thread_check:
                 return 'not_found'
 
-            # Ambil semua komentar aktif pada thread ini
-            query = text("""
-                SELECT 
-                    fc.id_comment,
-                    fc.parent_id,
-                    fc.id_user,
-                    u.nama AS nama_user,
-                    fc.isi,
-                    fc.is_solved_answer,
-                    fc.is_deleted,
-                    fc.deleted_by_mentor,
-                    fc.created_at,
-                    fc.updated_at,
-                    COALESCE(SUM(fv.vote_type), 0) AS total_vote
-                FROM forum_comment fc
-                JOIN users u ON u.id_user = fc.id_user
-                LEFT JOIN forum_vote fv ON fv.id_comment = fc.id_comment
-                WHERE fc.id_thread = :id_thread
-                GROUP BY fc.id_comment, u.nama
-                ORDER BY fc.created_at ASC
-            """)
+            return _comment_page(
+                connection, "fc.id_thread = :id_thread AND fc.parent_id IS NULL",
+                {'id_thread': id_thread}, sort=sort, limit=limit, cursor=cursor
+            )
 
-            comments = connection.execute(query, {'id_thread': id_thread}).mappings().fetchall()
-            comments = [serialize_row(row) for row in comments]
+    except SQLAlchemyError as e:
+        print(f"Database error: {str(e)}")
+        return None
 
-            # Bangun struktur nested
-            comment_dict = {c['id_comment']: c for c in comments}
-            for c in comment_dict.values():
-                c['replies'] = []
 
-            root_comments = []
-            for c in comments:
-                if c['parent_id']:
-                    parent = comment_dict.get(c['parent_id'])
-                    if parent:
-                        parent['replies'].append(c)
-                else:
-                    root_comments.append(c)
+@read_only
+def get_comment_replies(id_comment, limit=20, cursor=None):
+    """
+    Ambil balasan langsung dari satu komentar per halaman (urut waktu).
+    Balasan bertingkat dimuat dengan memanggil ulang untuk komentar balasan (reply_count > 0).
+    """
+    engine = get_connection()
+    try:
+        with engine.connect() as connection:
+            parent_check = connection.execute(text("""
+                SELECT fc.id_comment FROM forum_comment fc
+                JOIN forum_thread ft ON ft.id_thread = fc.id_thread AND ft.status = 1
+                WHERE fc.id_comment = :id_comment
+            """), {'id_comment': id_comment}).scalar()
+            if not parent_check:
+                return 'not_found'
 
-            return root_comments
+            return _comment_page(
+                connection, "fc.parent_id = :id_comment",
+                {'id_comment': id_comment}, sort='old', limit=limit, cursor=cursor
+            )
 
     except SQLAlchemyError as e:
         print(f"Database error: {str(e)}")
-        return []
+        return None
 
 
-def update_forum_comment(id_comment, id_user, isi=None):
+def update_forum_comment(id_comment, ctx, isi=None):
     """
     Mengupdate komentar forum
     - Hanya pembuat komentar atau admin yang boleh mengedit
@@ -388,7 +472,7 @@ def update_forum_comment(id_comment, id_user, isi=None):
         with engine.begin() as connection:
             # Cek apakah komentar ada dan aktif
             check = connection.execute(text("""
-                SELECT id_comment, id_user, isi
+                SELECT id_comment, id_thread, id_user, isi
                 FROM forum_comment
                 WHERE id_comment = :id_comment AND is_deleted = FALSE
             """), {'id_comment': id_comment}).mappings().first()
@@ -397,12 +481,8 @@ def update_forum_comment(id_comment, id_user, isi=None):
                 return 'not_found'
 
             # Cek kepemilikan atau role admin
-            if int(check['id_user']) != int(id_user):
-                role_check = connection.execute(text("""
-                    SELECT role FROM users WHERE id_user = :id_user
-                """), {'id_user': id_user}).scalar()
-                if role_check != 'admin':
-                    return 'forbidden'
+            if not (ctx.is_owner(check['id_user']) or ctx.is_admin):
+                return 'forbidden'
 
             # Jika isi None → gunakan nilai lama
             if isi is None or isi.strip() == "":
@@ -421,6 +501,8 @@ def update_forum_comment(id_comment, id_user, isi=None):
                 'isi': isi.strip()
             }).mappings().first()
 
+            if updated:
+                index_comment(id_comment, check['id_thread'], updated['isi'])
             return serialize_row(updated) if updated else None
 
     except SQLAlchemyError as e:
@@ -428,7 +510,7 @@ def update_forum_comment(id_comment, id_user, isi=None):
         return None
 
 
-def soft_delete_forum_comment(id_comment, id_user):
+def soft_delete_forum_comment(id_comment, ctx):
     """
     Soft delete komentar:
     - Pemilik komentar boleh hapus sendiri
@@ -441,8 +523,8 @@ def soft_delete_forum_comment(id_comment, id_user):
             # Ambil data komentar dan thread terkait
             comment_data = connection.execute(text("""
                 SELECT 
-                    fc.id_comment, fc.id_user AS comment_owner, fc.is_deleted,
-                    ft.id_materi, ft.id_paketkelas
+                    fc.id_comment, fc.id_user AS comment_owner, fc.is_deleted, fc.is_solved_answer,
+                    fc.id_thread, ft.id_materi, ft.id_paketkelas
                 FROM forum_comment fc
                 JOIN forum_thread ft ON ft.id_thread = fc.id_thread
                 WHERE fc.id_comment = :id_comment
@@ -455,25 +537,20 @@ def soft_delete_forum_comment(id_comment, id_user):
             if comment_data['is_deleted']:
                 return True
 
-            # Ambil role user
-            user_role = connection.execute(text("""
-                SELECT role FROM users WHERE id_user = :id_user
-            """), {'id_user': id_user}).scalar()
-
             # Cek hak akses
             allowed = False
             deleted_by_mentor = False
 
             # Pemilik komentar
-            if int(comment_data['comment_owner']) == int(id_user):
+            if ctx.is_owner(comment_data['comment_owner']):
                 allowed = True
 
             # Admin
-            elif user_role == 'admin':
+            elif ctx.is_admin:
                 allowed = True
 
             # Mentor (cek apakah mengampu materi / paketkelas)
-            elif user_role == 'mentor':
+            elif ctx.is_mentor:
                 cek_mentor = connection.execute(text("""
                     SELECT 1 FROM mentorkelas
                     WHERE id_user = :id_user 
@@ -481,7 +558,7 @@ def soft_delete_forum_comment(id_comment, id_user):
                     AND status = 1
                     LIMIT 1;
                 """), {
-                    'id_user': id_user,
+                    'id_user': ctx.id_user,
                     'id_paketkelas': comment_data['id_paketkelas']
                 }).scalar()
 
@@ -496,6 +573,7 @@ def soft_delete_forum_comment(id_comment, id_user):
             connection.execute(text("""
                 UPDATE forum_comment
                 SET is_deleted = TRUE,
+                    is_solved_answer = FALSE,
                     deleted_by_mentor = :deleted_by_mentor,
                     updated_at = :now
                 WHERE id_comment = :id_comment
@@ -505,6 +583,19 @@ def soft_delete_forum_comment(id_comment, id_user):
                 "now": get_wita()
             })
 
+            # Counter thread; solved answer yang dihapus → thread kembali belum solved
+            connection.execute(text("""
+                UPDATE forum_thread
+                SET comment_count = GREATEST(comment_count - 1, 0),
+                    is_solved = CASE WHEN :was_solved THEN FALSE ELSE is_solved END
+                WHERE id_thread = :id_thread
+            """), {
+                'id_thread': comment_data['id_thread'],
+                'was_solved': bool(comment_data['is_solved_answer'])
+            })
+
+            remove_comment(id_comment)
+
             return True
 
     except SQLAlchemyError as e:
@@ -514,48 +605,63 @@ def soft_delete_forum_comment(id_comment, id_user):
 
 """ #=== Query Vote ===# """
 
+def _publish_vote(connection, id_thread, id_comment, vote_score):
+    """Push total vote terbaru ke client thread (dikirim setelah commit)."""
+    publish(f"forum.thread.{id_thread}", {
+        'type': 'vote_changed', 'id_thread': id_thread, 'id_comment': id_comment, 'total_vote': vote_score
+    }, connection)
+
+
 def add_or_update_vote(id_comment, id_user, vote_type):
     """
-    Tambah atau ubah vote pada komentar.
+    Tambah atau ubah vote pada komentar (vote_type 1 / -1) dalam satu statement idempoten:
+    INSERT ... ON CONFLICT ke forum_vote sekaligus menyesuaikan counter forum_comment.vote_score.
     - Jika komentar tidak ada atau sudah dihapus → return 'not_found'
-    - Jika user sudah vote dengan nilai sama → return 'no_change'
+    - Jika user sudah vote dengan nilai sama → return 'no_change' (klik ganda aman)
     - Jika belum → insert baru atau update vote_type
     """
     engine = get_connection()
     try:
         with engine.begin() as connection:
-            # Pastikan komentar valid & aktif
-            comment_exists = connection.execute(text("""
-                SELECT 1 FROM forum_comment
-                WHERE id_comment = :id_comment AND is_deleted = FALSE
-            """), {'id_comment': id_comment}).scalar()
+            # (xmax = 0) → baris baru (delta = vote_type); selain itu vote dibalik 1 ↔ -1 (delta = 2 × vote_type).
+            # UPDATE counter memakai row lock forum_comment, jadi klik paralel tidak saling menimpa.
+            row = connection.execute(text("""
+                WITH upsert AS (
+                    INSERT INTO forum_vote (id_comment, id_user, vote_type)
+                    SELECT :id_comment, :id_user, :vote_type
+                    WHERE EXISTS (
+                        SELECT 1 FROM forum_comment
+                        WHERE id_comment = :id_comment AND is_deleted = FALSE
+                    )
+                    ON CONFLICT (id_comment, id_user) DO UPDATE
+                        SET vote_type = EXCLUDED.vote_type, created_at = :now
+                        WHERE forum_vote.vote_type <> EXCLUDED.vote_type
+                    RETURNING (xmax = 0) AS inserted
+                ),
+                score AS (
+                    UPDATE forum_comment fc
+                    SET vote_score = fc.vote_score + CASE WHEN u.inserted THEN :vote_type ELSE 2 * :vote_type END
+                    FROM upsert u
+                    WHERE fc.id_comment = :id_comment
+                    RETURNING fc.id_thread, fc.vote_score
+                )
+                SELECT
+                    EXISTS (
+                        SELECT 1 FROM forum_comment
+                        WHERE id_comment = :id_comment AND is_deleted = FALSE
+                    ) AS comment_ok,
+                    (SELECT id_thread FROM score) AS id_thread,
+                    (SELECT vote_score FROM score) AS vote_score
+            """), {
+                'id_comment': id_comment, 'id_user': id_user, 'vote_type': vote_type, 'now': get_wita()
+            }).first()
 
-            if not comment_exists:
+            if not row.comment_ok:
                 return 'not_found'
+            if row.id_thread is None:
+                return 'no_change'
 
-            # Cek apakah user sudah pernah vote
-            existing_vote = connection.execute(text("""
-                SELECT vote_type FROM forum_vote
-                WHERE id_comment = :id_comment AND id_user = :id_user
-            """), {'id_comment': id_comment, 'id_user': id_user}).mappings().first()
-
-            if existing_vote:
-                if existing_vote['vote_type'] == vote_type:
-                    return 'no_change'
-                else:
-                    # Update vote
-                    connection.execute(text("""
-                        UPDATE forum_vote
-                        SET vote_type = :vote_type, created_at = :now
-                        WHERE id_comment = :id_comment AND id_user = :id_user
-                    """), {'id_comment': id_comment, 'id_user': id_user, 'vote_type': vote_type, "now": get_wita()})
-            else:
-                # Insert vote baru
-                connection.execute(text("""
-                    INSERT INTO forum_vote (id_comment, id_user, vote_type)
-                    VALUES (:id_comment, :id_user, :vote_type)
-                """), {'id_comment': id_comment, 'id_user': id_user, 'vote_type': vote_type})
-
+            _publish_vote(connection, row.id_thread, id_comment, row.vote_score)
             return True
 
     except SQLAlchemyError as e:
@@ -565,24 +671,28 @@ def add_or_update_vote(id_comment, id_user, vote_type):
 
 def delete_vote(id_comment, id_user):
     """
-    Hapus vote milik user pada komentar.
+    Hapus vote milik user pada komentar (counter vote_score ikut dikurangi di statement yang sama).
     """
     engine = get_connection()
     try:
         with engine.begin() as connection:
-            vote_exists = connection.execute(text("""
-                SELECT 1 FROM forum_vote
-                WHERE id_comment = :id_comment AND id_user = :id_user
-            """), {'id_comment': id_comment, 'id_user': id_user}).scalar()
+            row = connection.execute(text("""
+                WITH deleted AS (
+                    DELETE FROM forum_vote
+                    WHERE id_comment = :id_comment AND id_user = :id_user
+                    RETURNING vote_type
+                )
+                UPDATE forum_comment fc
+                SET vote_score = fc.vote_score - d.vote_type
+                FROM deleted d
+                WHERE fc.id_comment = :id_comment
+                RETURNING fc.id_thread, fc.vote_score
+            """), {'id_comment': id_comment, 'id_user': id_user}).first()
 
-            if not vote_exists:
+            if row is None:
                 return 'not_found'
 
-            connection.execute(text("""
-                DELETE FROM forum_vote
-                WHERE id_comment = :id_comment AND id_user = :id_user
-            """), {'id_comment': id_comment, 'id_user': id_user})
-
+            _publish_vote(connection, row.id_thread, id_comment, row.vote_score)
             return True
 
     except SQLAlchemyError as e:
@@ -590,6 +700,58 @@ def delete_vote(id_comment, id_user):
         return None
 
 
+def reconcile_forum_counters():
+    """
+    Job rekonsiliasi: hitung ulang counter denormalisasi forum secara bulk dan
+    perbaiki yang menyimpang (vote_score, reply_count, comment_count).
+    Return jumlah baris yang diperbaiki per counter.
+    """
+    engine = get_connection()
+    try:
+        with engine.begin() as connection:
+            vote_score = connection.execute(text("""
+                UPDATE forum_comment fc
+                SET vote_score = v.total
+                FROM (
+                    SELECT c.id_comment, COALESCE(SUM(fv.vote_type), 0) AS total
+                    FROM forum_comment c
+                    LEFT JOIN forum_vote fv ON fv.id_comment = c.id_comment
+                    GROUP BY c.id_comment
+                ) v
+                WHERE v.id_comment = fc.id_comment AND fc.vote_score <> v.total
+            """)).rowcount
+
+            reply_count = connection.execute(text("""
+                UPDATE forum_comment fc
+                SET reply_count = r.total
+                FROM (
+                    SELECT c.id_comment, COUNT(child.id_comment) AS total
+                    FROM forum_comment c
+                    LEFT JOIN forum_comment child ON child.parent_id = c.id_comment
+                    GROUP BY c.id_comment
+                ) r
+                WHERE r.id_comment = fc.id_comment AND fc.reply_count <> r.total
+            """)).rowcount
+
+            comment_count = connection.execute(text("""
+                UPDATE forum_thread ft
+                SET comment_count = c.total
+                FROM (
+                    SELECT t.id_thread, COUNT(fc.id_comment) AS total
+                    FROM forum_thread t
+                    LEFT JOIN forum_comment fc ON fc.id_thread = t.id_thread AND fc.is_deleted = FALSE
+                    GROUP BY t.id_thread
+                ) c
+                WHERE c.id_thread = ft.id_thread AND ft.comment_count <> c.total
+            """)).rowcount
+
+            return {'vote_score': vote_score, 'reply_count': reply_count, 'comment_count': comment_count}
+
+    except SQLAlchemyError as e:
+        print(f"Database error: {str(e)}")
+        return None
+
+
 """ #=== Endpoint Solved ===# """
 
 def mark_comment_as_solved(id_comment, id_user):
@@ -639,15 +801,16 @@ def mark_comment_as_solved(id_comment, id_user):
                 WHERE id_thread = :id_thread
             """), {'id_thread': comment['id_thread'], "now": get_wita()})
 
-            # Notifikasi opsional
-            connection.execute(text("""
-                INSERT INTO forum_notification (id_user, id_thread, id_comment, tipe)
-                VALUES (:id_user, :id_thread, :id_comment, 'solved')
-            """), {
-                'id_user': comment['comment_user'],
-                'id_thread': comment['id_thread'],
-                'id_comment': id_comment
-            })
+            # Notifikasi ke semua peserta thread (penjawab pasti termasuk subscriber)
+            _subscribe(connection, comment['id_thread'], comment['comment_user'])
+            penerima = _fan_out_notification(connection, comment['id_thread'], id_comment, 'solved', id_actor=id_user)
+
+            publish(f"forum.thread.{comment['id_thread']}", {
+                'type': 'solved', 'id_thread': comment['id_thread'], 'id_comment': id_comment
+            }, connection)
+            publish([f"user.{r}" for r in penerima], {
+                'type': 'notification', 'tipe': 'solved', 'id_thread': comment['id_thread'], 'id_comment': id_comment
+            }, connection)
 
             return True
 
@@ -701,26 +864,133 @@ def unmark_comment_as_solved(id_comment, id_user):
 
 """ #=== Endpoint Notification ===# """
 
-def get_forum_notifications(id_user):
+def _subscribe(connection, id_thread, id_user):
+    connection.execute(text("""
+        INSERT INTO forum_thread_subscription (id_thread, id_user)
+        VALUES (:id_thread, :id_user)
+        ON CONFLICT DO NOTHING
+    """), {'id_thread': id_thread, 'id_user': id_user})
+
+
+def _fan_out_notification(connection, id_thread, id_comment, tipe, id_actor):
     """
-    Ambil semua notifikasi milik user (terbaru di atas).
+    Kirim notifikasi ke semua subscriber thread (kecuali pelaku) dalam satu statement:
+    batch INSERT forum_notification + naikkan forum_notification_counter per penerima.
+    Return list id_user penerima.
     """
+    rows = connection.execute(text("""
+        WITH penerima AS (
+            SELECT s.id_user
+            FROM forum_thread_subscription s
+            JOIN users u ON u.id_user = s.id_user AND u.status = 1
+            WHERE s.id_thread = :id_thread AND s.id_user <> :id_actor
+        ),
+        inserted AS (
+            INSERT INTO forum_notification (id_user, id_thread, id_comment, tipe)
+            SELECT id_user, :id_thread, :id_comment, :tipe FROM penerima
+            RETURNING id_user
+        )
+        INSERT INTO forum_notification_counter AS c (id_user, unread_count)
+        SELECT id_user, COUNT(*) FROM inserted GROUP BY id_user
+        ON CONFLICT (id_user) DO UPDATE SET unread_count = c.unread_count + EXCLUDED.unread_count
+        RETURNING id_user
+    """), {'id_thread': id_thread, 'id_comment': id_comment, 'tipe': tipe, 'id_actor': int(id_actor)}).scalars().all()
+    return rows
+
+
+def _decrement_unread(connection, id_user, jumlah=1):
+    if jumlah:
+        connection.execute(text("""
+            UPDATE forum_notification_counter
+            SET unread_count = GREATEST(unread_count - :jumlah, 0)
+            WHERE id_user = :id_user
+        """), {'id_user': id_user, 'jumlah': jumlah})
+
+
+def subscribe_thread(id_thread, id_user):
+    """Berlangganan notifikasi thread. Return 'not_found' jika thread tidak aktif."""
+    engine = get_connection()
+    try:
+        with engine.begin() as connection:
+            thread = connection.execute(text("""
+                SELECT 1 FROM forum_thread WHERE id_thread = :id_thread AND status = 1
+            """), {'id_thread': id_thread}).scalar()
+            if not thread:
+                return 'not_found'
+            _subscribe(connection, id_thread, id_user)
+            return True
+    except SQLAlchemyError as e:
+        print(f"Database error: {str(e)}")
+        return None
+
+
+def unsubscribe_thread(id_thread, id_user):
+    """Berhenti berlangganan notifikasi thread."""
+    engine = get_connection()
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("""
+                DELETE FROM forum_thread_subscription
+                WHERE id_thread = :id_thread AND id_user = :id_user
+            """), {'id_thread': id_thread, 'id_user': id_user})
+            return True
+    except SQLAlchemyError as e:
+        print(f"Database error: {str(e)}")
+        return None
+
+
+@read_only
+def get_forum_notifications(id_user, limit=20, cursor=None, unread_only=False):
+    """
+    Ambil notifikasi milik user per halaman (terbaru di atas, keyset pada created_at, id_notification).
+    Cursor tidak valid → ValueError.
+    """
+    params = {'id_user': id_user, 'limit': limit + 1}
+    filters = ""
+    if unread_only:
+        filters += " AND is_read = FALSE"
+    if cursor:
+        params['cursor_time'], params['cursor_id'] = decode_cursor(cursor, (datetime, int))
+        filters += " AND (created_at, id_notification) < (:cursor_time, :cursor_id)"
+
     engine = get_connection()
     try:
         with engine.connect() as connection:
-            result = connection.execute(text("""
+            rows = connection.execute(text(f"""
                 SELECT id_notification, id_thread, id_comment, tipe, is_read,
                        created_at
                 FROM forum_notification
-                WHERE id_user = :id_user
-                ORDER BY created_at DESC
-            """), {'id_user': id_user}).mappings().all()
+                WHERE id_user = :id_user{filters}
+                ORDER BY created_at DESC, id_notification DESC
+                LIMIT :limit
+            """), params).fetchall()
+            rows, next_cursor = keyset_page(rows, limit, key=lambda r: (r.created_at, r.id_notification))
+
+            return {
+                'data': serialize_rows(rows, mode="iso_date"),
+                'next_cursor': next_cursor,
+                'limit': limit
+            }
+
+    except SQLAlchemyError as e:
+        print(f"Database error: {str(e)}")
+        return None
 
-            return [dict(row) for row in result]
 
+@read_only
+def get_unread_notification_count(id_user):
+    """Jumlah notifikasi belum dibaca dari counter (tanpa COUNT ke forum_notification)."""
+    engine = get_connection()
+    try:
+        with engine.connect() as connection:
+            total = connection.execute(text("""
+                SELECT unread_count FROM forum_notification_counter
+                WHERE id_user = :id_user
+            """), {'id_user': id_user}).scalar()
+            return total or 0
     except SQLAlchemyError as e:
         print(f"Database error: {str(e)}")
-        return []
+        return None
 
 
 def mark_forum_notification_as_read(id_notification, id_user):
@@ -731,21 +1001,24 @@ def mark_forum_notification_as_read(id_notification, id_user):
     try:
         with engine.begin() as connection:
             notif = connection.execute(text("""
-                SELECT id_user FROM forum_notification
+                SELECT id_user, is_read FROM forum_notification
                 WHERE id_notification = :id_notification
-            """), {'id_notification': id_notification}).scalar()
+            """), {'id_notification': id_notification}).mappings().first()
 
             if not notif:
                 return 'not_found'
-            if int(notif) != int(id_user):
+            if int(notif['id_user']) != int(id_user):
                 return 'forbidden'
+            if notif['is_read']:
+                return True
 
-            connection.execute(text("""
+            updated = connection.execute(text("""
                 UPDATE forum_notification
                 SET is_read = TRUE, updated_at = :now
-                WHERE id_notification = :id_notification
-            """), {'id_notification': id_notification, "now": get_wita()})
+                WHERE id_notification = :id_notification AND is_read = FALSE
+            """), {'id_notification': id_notification, "now": get_wita()}).rowcount
 
+            _decrement_unread(connection, id_user, updated)
             return True
 
     except SQLAlchemyError as e:
@@ -753,6 +1026,35 @@ def mark_forum_notification_as_read(id_notification, id_user):
         return None
 
 
+def mark_all_forum_notifications_as_read(id_user):
+    """
+    Tandai semua notifikasi user sebagai dibaca dalam satu statement.
+    Return jumlah notifikasi yang berubah.
+    """
+    engine = get_connection()
+    try:
+        with engine.begin() as connection:
+            jumlah = connection.execute(text("""
+                WITH updated AS (
+                    UPDATE forum_notification
+                    SET is_read = TRUE, updated_at = :now
+                    WHERE id_user = :id_user AND is_read = FALSE
+                    RETURNING 1
+                ),
+                counter AS (
+                    UPDATE forum_notification_counter
+                    SET unread_count = GREATEST(unread_count - (SELECT COUNT(*) FROM updated), 0)
+                    WHERE id_user = :id_user
+                )
+                SELECT COUNT(*) FROM updated
+            """), {'id_user': id_user, "now": get_wita()}).scalar()
+            return jumlah or 0
+
+    except SQLAlchemyError as e:
+        print(f"Database error: {str(e)}")
+        return None
+
+
 def delete_forum_notification(id_notification, id_user):
     """
     Hapus notifikasi milik user.
@@ -770,11 +1072,14 @@ def delete_forum_notification(id_notification, id_user):
             if int(notif) != int(id_user):
                 return 'forbidden'
 
-            connection.execute(text("""
+            was_unread = connection.execute(text("""
                 DELETE FROM forum_notification
                 WHERE id_notification = :id_notification
-            """), {'id_notification': id_notification})
+                RETURNING NOT is_read
+            """), {'id_notification': id_notification}).scalar()
 
+            if was_unread:
+                _decrement_unread(connection, id_user)
             return True
 
     except SQLAlchemyError as e:
@@ -0,0 +1,236 @@
+import html
+import os
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..utils.config import get_connection
+from ..utils.db_routing import read_only
+from ..utils.search_index import InvertedIndex
+from ..utils.serializer import serialize_rows
+
+# postgres = tsvector + GIN (migrations/003_forum_fulltext.sql)
+# memory   = inverted index Python per proses, untuk development tanpa migrasi FTS
+FORUM_SEARCH_BACKEND = os.getenv("FORUM_SEARCH_BACKEND", "postgres")
+TS_CONFIG = "forum_search"
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=20, MinWords=8, MaxFragments=2"
+
+# Bobot field memory index, setara setweight A/B di Postgres
+THREAD_WEIGHTS = {"judul": 1.0, "isi": 0.4}
+COMMENT_WEIGHT = 0.4
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def use_fulltext():
+    return FORUM_SEARCH_BACKEND == "postgres"
+
+
+def _safe_snippet(snippet):
+    """ts_headline tidak meng-escape teks; escape semua kecuali penanda <mark>."""
+    escaped = html.escape(snippet or "", quote=False)
+    return escaped.replace("&lt;mark&gt;", "<mark>").replace("&lt;/mark&gt;", "</mark>")
+
+
+""" #=== Backend Postgres ===# """
+
+@read_only
+def _search_postgres(q, id_batch=None, id_materi=None, limit=20, offset=0):
+    filters = ""
+    params = {"q": q, "limit": limit, "offset": offset, "headline": HEADLINE_OPTIONS}
+    if id_batch:
+        filters += " AND ft.id_batch = :id_batch"
+        params["id_batch"] = id_batch
+    if id_materi:
+        filters += " AND ft.id_materi = :id_materi"
+        params["id_materi"] = id_materi
+
+    engine = get_connection()
+    try:
+        with engine.connect() as conn:
+            # Ranking & paging dulu (pakai index GIN), ts_headline hanya untuk row di halaman ini
+            rows = conn.execute(text(f"""
+                WITH q AS (
+                    SELECT websearch_to_tsquery('{TS_CONFIG}', :q) AS query
+                ),
+                hasil AS (
+                    SELECT 'thread' AS tipe, ft.id_thread, NULL::integer AS id_comment,
+                           ft.judul AS thread_subject,
+                           ft.judul || ' ' || regexp_replace(COALESCE(ft.isi, ''), '<[^>]+>', ' ', 'g') AS body,
+                           ts_rank_cd(ft.search_vector, q.query) AS rank,
+                           ft.id_batch, ft.id_materi, ft.created_at
+                    FROM forum_thread ft, q
+                    WHERE ft.status = 1
+                      AND ft.search_vector @@ q.query{filters}
+                    UNION ALL
+                    SELECT 'comment' AS tipe, fc.id_thread, fc.id_comment,
+                           ft.judul AS thread_subject,
+                           regexp_replace(COALESCE(fc.isi, ''), '<[^>]+>', ' ', 'g') AS body,
+                           ts_rank_cd(fc.search_vector, q.query) AS rank,
+                           ft.id_batch, ft.id_materi, fc.created_at
+                    FROM forum_comment fc
+                    JOIN forum_thread ft ON ft.id_thread = fc.id_thread AND ft.status = 1
+                    CROSS JOIN q
+                    WHERE fc.is_deleted = FALSE
+                      AND fc.search_vector @@ q.query{filters}
+                ),
+                page AS (
+                    SELECT *, COUNT(*) OVER () AS total
+                    FROM hasil
+                    ORDER BY rank DESC, created_at DESC
+                    LIMIT :limit OFFSET :offset
+                )
+                SELECT page.tipe, page.id_thread, page.id_comment, page.thread_subject,
+                       ts_headline('{TS_CONFIG}', page.body, q.query, :headline) AS snippet,
+                       page.rank, page.id_batch, page.id_materi, page.created_at, page.total
+                FROM page, q
+                ORDER BY page.rank DESC, page.created_at DESC
+            """), params).fetchall()
+
+            total = rows[0].total if rows else 0
+            data = serialize_rows(rows, mode="iso_date")
+            for item in data:
+                item.pop("total", None)
+                item["rank"] = round(float(item["rank"]), 6)
+                item["snippet"] = _safe_snippet(item["snippet"])
+            return total, data
+    except SQLAlchemyError as e:
+        print(f"Database error: {str(e)}")
+        return None
+
+
+""" #=== Backend memory (fallback development) ===# """
+
+def _thread_fields(judul, isi):
+    return {"judul": (judul, THREAD_WEIGHTS["judul"]), "isi": (isi, THREAD_WEIGHTS["isi"])}
+
+
+@read_only
+def _build_index():
+    """Isi index dari query biasa (tanpa fitur khusus Postgres)."""
+    index = InvertedIndex()
+    engine = get_connection()
+    with engine.connect() as conn:
+        threads = conn.execute(text("""
+            SELECT id_thread, judul, isi, id_batch, id_materi, created_at
+            FROM forum_thread
+            WHERE status = 1
+        """)).fetchall()
+        for t in threads:
+            index.add(("thread", t.id_thread), _thread_fields(t.judul, t.isi), {
+                "tipe": "thread", "id_thread": t.id_thread, "id_comment": None, "judul": t.judul,
+                "id_batch": t.id_batch, "id_materi": t.id_materi, "created_at": t.created_at,
+            })
+
+        comments = conn.execute(text("""
+            SELECT fc.id_comment, fc.id_thread, fc.isi, fc.created_at, ft.id_batch, ft.id_materi
+            FROM forum_comment fc
+            JOIN forum_thread ft ON ft.id_thread = fc.id_thread AND ft.status = 1
+            WHERE fc.is_deleted = FALSE
+        """)).fetchall()
+        for c in comments:
+            index.add(("comment", c.id_comment), {"isi": (c.isi, COMMENT_WEIGHT)}, {
+                "tipe": "comment", "id_thread": c.id_thread, "id_comment": c.id_comment,
+                "id_batch": c.id_batch, "id_materi": c.id_materi, "created_at": c.created_at,
+            })
+    return index
+
+
+def _get_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = _build_index()
+    return _index
+
+
+def _search_memory(q, id_batch=None, id_materi=None, limit=20, offset=0):
+    try:
+        index = _get_index()
+    except SQLAlchemyError as e:
+        print(f"Database error: {str(e)}")
+        return None
+
+    total, hits = index.search(q, {"id_batch": id_batch, "id_materi": id_materi}, limit=limit, offset=offset)
+    data = []
+    for _, rank, attrs, snippet in hits:
+        thread = index.get_attrs(("thread", attrs["id_thread"])) or {}
+        created_at = attrs["created_at"]
+        data.append({
+            "tipe": attrs["tipe"],
+            "id_thread": attrs["id_thread"],
+            "id_comment": attrs["id_comment"],
+            "thread_subject": thread.get("judul"),
+            "snippet": snippet,
+            "rank": rank,
+            "id_batch": attrs["id_batch"],
+            "id_materi": attrs["id_materi"],
+            "created_at": created_at.isoformat() if created_at else None,
+        })
+    return total, data
+
+
+# Hook dari q_forum agar memory index ikut INSERT/UPDATE/DELETE.
+# Tidak melakukan apa-apa pada backend postgres (kolom generated) atau
+# selama index belum pernah dibangun (build berikutnya membaca data terbaru).
+def _live_index():
+    return _index if not use_fulltext() else None
+
+
+def index_thread(id_thread, judul, isi, **attrs):
+    index = _live_index()
+    if index is None:
+        return
+    merged = dict(index.get_attrs(("thread", id_thread)) or {
+        "tipe": "thread", "id_thread": id_thread, "id_comment": None, "id_batch": None, "id_materi": None,
+    })
+    merged.update(attrs, judul=judul)
+    index.add(("thread", id_thread), _thread_fields(judul, isi), merged)
+
+
+def remove_thread(id_thread):
+    index = _live_index()
+    if index is None:
+        return
+    index.remove(("thread", id_thread))
+    index.remove_where(tipe="comment", id_thread=id_thread)
+
+
+def index_comment(id_comment, id_thread, isi, created_at=None):
+    index = _live_index()
+    if index is None:
+        return
+    thread = index.get_attrs(("thread", id_thread))
+    if thread is None:
+        return
+    existing = index.get_attrs(("comment", id_comment)) or {}
+    index.add(("comment", id_comment), {"isi": (isi, COMMENT_WEIGHT)}, {
+        "tipe": "comment", "id_thread": id_thread, "id_comment": id_comment,
+        "id_batch": thread["id_batch"], "id_materi": thread["id_materi"],
+        "created_at": created_at or existing.get("created_at"),
+    })
+
+
+def remove_comment(id_comment):
+    index = _live_index()
+    if index is not None:
+        index.remove(("comment", id_comment))
+
+
+""" #=== Entry point ===# """
+
+def search_forum(q, id_batch=None, id_materi=None, page=1, limit=20):
+    """
+    Cari thread & komentar forum, diranking, dengan snippet (<mark>term</mark>).
+    Return dict {data, total, page, limit} atau None jika gagal.
+    """
+    offset = (page - 1) * limit
+    search = _search_postgres if use_fulltext() else _search_memory
+    result = search(q, id_batch=id_batch, id_materi=id_materi, limit=limit, offset=offset)
+    if result is None:
+        return None
+    total, data = result
+    return {"data": data, "total": total, "page": page, "limit": limit}
@@ -6,8 +6,12 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.helper import serialize_datetime_uuid, serialize_row, serialize_value
 from ..utils.config import get_connection, get_wita
+from ..utils.serializer import serialize_rows
+from ..utils.streaming import stream_query
+from ..utils.db_routing import read_only
 
 
+@read_only
 def get_statistik_by_tryout(id_tryout: int):
     """
     Mengambil statistik untuk satu tryout berdasarkan id_tryout.
@@ -51,75 +55,86 @@ def get_statistik_by_tryout(id_tryout: int):
         print(f"[ERROR get_statistik_by_tryout] {e}")
         return None
     
-def get_hasiltryout_list(filters: dict):
-    """
-    Mengambil daftar hasil tryout dengan filter dinamis.
+def _hasiltryout_list_query(filters: dict):
+    """SQL + params daftar hasil tryout (dipakai versi list & streaming)."""
+    base_query = """
+        SELECT
+            h.id_hasiltryout, h.id_tryout, h.id_user, h.attempt_token, h.attempt_ke, h.start_time, 
+            h.end_time, h.tanggal_pengerjaan, h.nilai, h.benar, h.salah, h.kosong, 
+            h.ragu_ragu, h.status_pengerjaan,
+            u.nama AS nama_user,
+            u.nickname,
+            t.judul AS judul_tryout
+        FROM hasiltryout h
+        LEFT JOIN users u ON u.id_user = h.id_user
+        LEFT JOIN tryout t ON t.id_tryout = h.id_tryout
+        WHERE h.status = 1
     """
-    engine = get_connection()
 
-    try:
-        with engine.connect() as conn:
-
-            base_query = """
-                SELECT
-                    h.id_hasiltryout, h.id_tryout, h.id_user, h.attempt_token, h.attempt_ke, h.start_time, 
-                    h.end_time, h.tanggal_pengerjaan, h.nilai, h.benar, h.salah, h.kosong, 
-                    h.ragu_ragu, h.status_pengerjaan,
-                    u.nama AS nama_user,
-                    u.nickname,
-                    t.judul AS judul_tryout
-                FROM hasiltryout h
-                LEFT JOIN users u ON u.id_user = h.id_user
-                LEFT JOIN tryout t ON t.id_tryout = h.id_tryout
-                WHERE h.status = 1
-            """
+    params = {}
 
-            params = {}
+    # === FILTERS DINAMIS ===
+    if filters.get("id_tryout"):
+        base_query += " AND h.id_tryout = :id_tryout"
+        params["id_tryout"] = filters["id_tryout"]
 
-            # === FILTERS DINAMIS ===
-            if filters.get("id_tryout"):
-                base_query += " AND h.id_tryout = :id_tryout"
-                params["id_tryout"] = filters["id_tryout"]
+    if filters.get("id_user"):
+        base_query += " AND h.id_user = :id_user"
+        params["id_user"] = filters["id_user"]
 
-            if filters.get("id_user"):
-                base_query += " AND h.id_user = :id_user"
-                params["id_user"] = filters["id_user"]
+    if filters.get("tanggal_mulai"):
+        base_query += " AND h.tanggal_pengerjaan >= :tanggal_mulai"
+        params["tanggal_mulai"] = filters["tanggal_mulai"]
 
-            if filters.get("tanggal_mulai"):
-                base_query += " AND h.tanggal_pengerjaan >= :tanggal_mulai"
-                params["tanggal_mulai"] = filters["tanggal_mulai"]
+    if filters.get("tanggal_akhir"):
+        base_query += " AND h.tanggal_pengerjaan <= :tanggal_akhir"
+        params["tanggal_akhir"] = filters["tanggal_akhir"]
 
-            if filters.get("tanggal_akhir"):
-                base_query += " AND h.tanggal_pengerjaan <= :tanggal_akhir"
-                params["tanggal_akhir"] = filters["tanggal_akhir"]
+    if filters.get("attempt_ke"):
+        base_query += " AND h.attempt_ke = :attempt_ke"
+        params["attempt_ke"] = filters["attempt_ke"]
 
-            if filters.get("attempt_ke"):
-                base_query += " AND h.attempt_ke = :attempt_ke"
-                params["attempt_ke"] = filters["attempt_ke"]
+    if filters.get("nilai_min") is not None:
+        base_query += " AND h.nilai >= :nilai_min"
+        params["nilai_min"] = filters["nilai_min"]
 
-            if filters.get("nilai_min") is not None:
-                base_query += " AND h.nilai >= :nilai_min"
-                params["nilai_min"] = filters["nilai_min"]
+    if filters.get("nilai_max") is not None:
+        base_query += " AND h.nilai <= :nilai_max"
+        params["nilai_max"] = filters["nilai_max"]
 
-            if filters.get("nilai_max") is not None:
-                base_query += " AND h.nilai <= :nilai_max"
-                params["nilai_max"] = filters["nilai_max"]
+    if filters.get("status_pengerjaan"):
+        base_query += " AND h.status_pengerjaan = :status_pengerjaan"
+        params["status_pengerjaan"] = filters["status_pengerjaan"]
 
-            if filters.get("status_pengerjaan"):
-                base_query += " AND h.status_pengerjaan = :status_pengerjaan"
-                params["status_pengerjaan"] = filters["status_pengerjaan"]
+    # urutkan berdasarkan waktu pengerjaan terbaru
+    base_query += " AND h.status = 1 ORDER BY h.tanggal_pengerjaan DESC, h.start_time DESC"
+    return base_query, params
 
-            # urutkan berdasarkan waktu pengerjaan terbaru
-            base_query += " AND h.status = 1 ORDER BY h.tanggal_pengerjaan DESC, h.start_time DESC"
+@read_only
+def get_hasiltryout_list(filters: dict):
+    """
+    Mengambil daftar hasil tryout dengan filter dinamis.
+    """
+    engine = get_connection()
+    base_query, params = _hasiltryout_list_query(filters)
 
-            result = conn.execute(text(base_query), params).mappings().fetchall()
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(text(base_query), params).fetchall()
 
-            return [serialize_datetime_uuid(row) for row in result]
+            return serialize_rows(result, mode="iso")
 
     except SQLAlchemyError as e:
         print(f"[ERROR get_hasiltryout_list] {e}")
         return []
+
+
+def stream_hasiltryout_list(filters: dict):
+    """Versi NDJSON dari get_hasiltryout_list (server-side cursor, memori konstan)."""
+    base_query, params = _hasiltryout_list_query(filters)
+    return stream_query(base_query, params, mode="iso")
     
+@read_only
 def get_detail_hasiltryout(id_hasiltryout: int):
     """
     Mengambil detail 1 hasil tryout (1 attempt).
@@ -162,6 +177,7 @@ def get_detail_hasiltryout(id_hasiltryout: int):
         return None
 
 
+@read_only
 def get_leaderboard_tryout(id_tryout: int, limit: int | None = None):
     """
     Leaderboard berdasarkan attempt pertama valid dari setiap user.
@@ -219,6 +235,7 @@ def get_leaderboard_tryout(id_tryout: int, limit: int | None = None):
 
 
 
+@read_only
 def get_rekap_tryout_user(id_user: int, id_tryout: int = None):
     """
     Mengambil semua tryout yang pernah dikerjakan user.
@@ -259,13 +276,14 @@ def get_rekap_tryout_user(id_user: int, id_tryout: int = None):
 
             result = conn.execute(text(base_query), params).mappings().fetchall()
 
-            return [serialize_datetime_uuid(r) for r in result]
+            return serialize_rows(result, mode="iso")
 
     except SQLAlchemyError as e:
         print(f"[ERROR get_rekap_tryout_user] {e}")
         return None
 
 
+@read_only
 def get_hasiltryout_by_tryout(id_tryout: int):
     """
     Mengambil semua hasil dari satu tryout.
@@ -284,7 +302,7 @@ def get_hasiltryout_by_tryout(id_tryout: int):
                 ORDER BY h.nilai DESC, h.benar DESC
             """)
             result = conn.execute(query, {"id_tryout": id_tryout}).mappings().fetchall()
-            return [serialize_datetime_uuid(row) for row in result]
+            return serialize_rows(result, mode="iso")
     except SQLAlchemyError as e:
         print(f"[ERROR get_hasiltryout_by_tryout] {e}")
         return None
@@ -316,6 +334,7 @@ def delete_hasil_tryout(id_hasiltryout: int) -> int:
     
     
 # ====== Hasil Tryout Mentor ====== #
+@read_only
 def get_hasiltryout_list_for_mentor(id_mentor, id_tryout=None):
     """
     Ambil hasil tryout berdasarkan paket kelas yang diajar mentor.
@@ -379,7 +398,7 @@ def get_hasiltryout_list_for_mentor(id_mentor, id_tryout=None):
 
             result = conn.execute(text(base_query), params).mappings().fetchall()
 
-            return [serialize_datetime_uuid(r) for r in result]
+            return serialize_rows(result, mode="iso")
 
     except SQLAlchemyError as e:
         print(f"[ERROR get_hasiltryout_list_for_mentor] {e}")
@@ -387,6 +406,7 @@ def get_hasiltryout_list_for_mentor(id_mentor, id_tryout=None):
 
 
 # ====== Hasil Tryout Peserta ====== #
+@read_only
 def get_hasiltryout_list_peserta(filters: dict):
     """
     Mengambil daftar hasil tryout milik 1 user tertentu.
@@ -422,13 +442,14 @@ def get_hasiltryout_list_peserta(filters: dict):
 
             result = conn.execute(text(base_query), params).mappings().fetchall()
 
-            return [serialize_datetime_uuid(r) for r in result]
+            return serialize_rows(result, mode="iso")
 
     except SQLAlchemyError as e:
         print(f"[ERROR get_hasiltryout_list_peserta] {e}")
         return []
 
 
+@read_only
 def get_hasiltryout_detail_peserta(id_hasiltryout, id_user):
     """
     Ambil detail hasil tryout peserta + pencocokan jawaban.
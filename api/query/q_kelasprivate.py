@@ -3,9 +3,12 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.helper import serialize_row
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from .q_catalog import invalidate_membership, invalidate_mentorship, materi_private_catalog
 
 
 
+@read_only
 def get_user_selection(role, search=None):
     engine = get_connection()
 
@@ -46,6 +49,7 @@ def get_user_selection(role, search=None):
 # ======================================================================
 # QUERY KELAS PRIVATE (ADMIN)
 # ======================================================================
+@read_only
 def get_all_mentorship(page=1, limit=20, search=None):
     engine = get_connection()
     offset = (page - 1) * limit
@@ -186,6 +190,7 @@ def create_mentorship(id_mentor, id_peserta, nama_mentorship=None):
             })
 
             new_id = result.scalar()
+            invalidate_membership(conn, [id_peserta])
 
             return {
                 "id_mentorship": new_id
@@ -196,6 +201,7 @@ def create_mentorship(id_mentor, id_peserta, nama_mentorship=None):
         return None
 
 
+@read_only
 def get_mentorship_by_id(id_mentorship):
     engine = get_connection()
 
@@ -257,6 +263,7 @@ def update_mentorship(id_mentorship, nama_mentorship=None):
                 "nama_mentorship": nama_mentorship,
                 "now": get_wita()
             })
+            invalidate_mentorship(conn, id_mentorship)
 
             return {"id_mentorship": id_mentorship}
 
@@ -280,15 +287,18 @@ def delete_mentorship(id_mentorship):
             if not existing:
                 return {"error": "Mentorship tidak ditemukan"}
 
-            conn.execute(text("""
+            id_peserta = conn.execute(text("""
                 UPDATE mentorship
                 SET status = 0,
                     updated_at = :now
                 WHERE id_mentorship = :id
+                RETURNING id_peserta
             """), {
                 "id": id_mentorship,
                 "now": get_wita()
-            })
+            }).scalar()
+            invalidate_membership(conn, [id_peserta])
+            invalidate_mentorship(conn, id_mentorship)
 
             return {"id_mentorship": id_mentorship}
 
@@ -298,6 +308,7 @@ def delete_mentorship(id_mentorship):
 
 
 
+@read_only
 def get_mentor_mentorships(id_mentor):
     engine = get_connection()
 
@@ -420,6 +431,7 @@ def create_materi_private(
             })
 
             new_id = result.scalar()
+            invalidate_mentorship(conn, id_mentorship)
 
             return {"id_materi_private": new_id}
 
@@ -428,6 +440,7 @@ def create_materi_private(
         return None
 
 
+@read_only
 def get_materi_by_mentorship(id_mentorship):
     engine = get_connection()
 
@@ -463,6 +476,7 @@ def get_materi_by_mentorship(id_mentorship):
         return []
 
 
+@read_only
 def get_materi_private_by_id(id_materi_private):
     engine = get_connection()
 
@@ -521,7 +535,7 @@ def update_materi_private(
             if not existing:
                 return {"error": "Materi tidak ditemukan"}
 
-            conn.execute(text("""
+            id_mentorship = conn.execute(text("""
                 UPDATE materi_private
                 SET 
                     judul = COALESCE(:judul, judul),
@@ -532,6 +546,7 @@ def update_materi_private(
                     viewer_only = COALESCE(:viewer_only, viewer_only),
                     updated_at = :now
                 WHERE id_materi_private = :id
+                RETURNING id_mentorship
             """), {
                 "id": id_materi_private,
                 "judul": judul,
@@ -541,7 +556,8 @@ def update_materi_private(
                 "is_downloadable": is_downloadable,
                 "viewer_only": viewer_only,
                 "now": get_wita()
-            })
+            }).scalar()
+            invalidate_mentorship(conn, id_mentorship)
 
             return {"id_materi_private": id_materi_private}
 
@@ -565,15 +581,17 @@ def delete_materi_private(id_materi_private):
             if not existing:
                 return {"error": "Materi tidak ditemukan"}
 
-            conn.execute(text("""
+            id_mentorship = conn.execute(text("""
                 UPDATE materi_private
                 SET status = 0,
                     updated_at = :now
                 WHERE id_materi_private = :id
+                RETURNING id_mentorship
             """), {
                 "id": id_materi_private,
                 "now": get_wita()
-            })
+            }).scalar()
+            invalidate_mentorship(conn, id_mentorship)
 
             return {"id_materi_private": id_materi_private}
 
@@ -587,59 +605,9 @@ def delete_materi_private(id_materi_private):
 # QUERY MATERI PRIVATE (PESERTA)
 # ======================================================================
 def get_materi_private_by_user(id_user, tipe=None):
-    engine = get_connection()
-
+    """Materi private open dari semua mentorship peserta, disusun dari katalog per mentorship (q_catalog)."""
     try:
-        with engine.connect() as conn:
-
-            base_query = """
-                FROM materi_private mp
-                JOIN mentorship m 
-                    ON m.id_mentorship = mp.id_mentorship
-                   AND m.status = 1
-                LEFT JOIN users u 
-                    ON u.id_user = mp.id_owner
-
-                WHERE m.id_peserta = :id_user
-                  AND mp.status = 1
-                  AND mp.visibility = 'open'
-            """
-
-            params = {"id_user": id_user}
-
-            # 🔥 FILTER TIPE
-            if tipe:
-                if tipe == "document":
-                    base_query += " AND mp.tipe_materi = 'document'"
-                else:
-                    base_query += " AND mp.tipe_materi = :tipe"
-                    params["tipe"] = tipe
-
-            query = text(f"""
-                SELECT 
-                    mp.id_materi_private,
-                    mp.judul,
-                    mp.tipe_materi,
-                    mp.url_file,
-                    mp.visibility,
-                    mp.is_downloadable,
-                    mp.viewer_only,
-                    mp.created_at,
-
-                    m.id_mentorship,
-                    m.nama_mentorship,
-
-                    u.id_user AS id_owner,
-                    u.nama AS nama_owner
-
-                {base_query}
-                ORDER BY mp.created_at DESC
-            """)
-
-            result = conn.execute(query, params).mappings().fetchall()
-
-            return [serialize_row(row) for row in result]
-
+        return materi_private_catalog(id_user, tipe)
     except SQLAlchemyError as e:
         print(f"[get_materi_private_by_user] Error: {e}")
-        return []
\ No newline at end of file
+        return []
@@ -1,43 +1,167 @@
+from datetime import datetime
+
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
-from ..utils.helper import serialize_row, serialize_row_datetime
+from ..utils.helper import serialize_row
+from ..utils.cache import MISSING, invalidate_komentar_materi, komentar_cache, komentar_cache_key
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only, use_primary
+from ..utils.keyset import decode_cursor, keyset_page
+from ..utils.pubsub import ensure_listening, listen, publish
+from ..utils.serializer import serialize_rows
+from .q_validasi import exists
+
+# Invalidasi cache halaman pertama komentar dikirim setelah commit ke semua worker
+# (lihat KOMENTAR_CACHE_TTL di utils/cache.py)
+KOMENTAR_TOPIC = "cache.komentar"
+
+
+def _on_invalidate(topic, data):
+    invalidate_komentar_materi(data.get("id_materi"), data.get("id_paketkelas"))
+
+
+listen(KOMENTAR_TOPIC, _on_invalidate)
+
+
+def _invalidate_komentar(conn, id_materi, id_paketkelas):
+    publish(KOMENTAR_TOPIC, {
+        "type": "komentar_invalidate", "id_materi": id_materi, "id_paketkelas": id_paketkelas
+    }, connection=conn)
 
 
 """#=== helper ===#"""
 def is_valid_parent_komentar(id_materi, parent_id):
-    engine = get_connection()
-    with engine.connect() as conn:
-        result = conn.execute(text("""
-            SELECT 1 FROM komentarmateri
-            WHERE id_komentarmateri = :parent_id AND id_materi = :id_materi AND status = 1
-        """), {"parent_id": parent_id, "id_materi": id_materi}).fetchone()
-        return bool(result)
+    return exists("parent_komentar", id_materi=id_materi, parent_id=parent_id)
 
 
 """#=== basic CRUD ===#"""
 # query/q_komentarmateri.py
-def get_komentar_by_materi(id_materi, id_paketkelas):
+KOMENTAR_COLUMNS = """
+    km.id_komentarmateri, km.id_user, u.nama, km.isi_komentar,
+    km.parent_id, km.is_deleted, km.deleted_by_mentor,
+    km.created_at, km.updated_at,
+    (
+        SELECT COUNT(*) FROM komentarmateri c
+        WHERE c.id_materi = km.id_materi
+          AND c.id_paketkelas = km.id_paketkelas
+          AND c.parent_id = km.id_komentarmateri
+          AND c.status = 1
+    ) AS reply_count
+"""
+
+
+def _komentar_page(conn, id_materi, id_paketkelas, parent_id, limit, cursor=None):
+    """
+    Satu halaman komentar pada satu level (parent_id None = komentar utama), urut waktu.
+    Memakai index (id_materi, id_paketkelas, parent_id, created_at).
+    """
+    params = {"id_materi": id_materi, "id_paketkelas": id_paketkelas, "limit": limit + 1}
+    where = "km.parent_id IS NULL"
+    if parent_id is not None:
+        where = "km.parent_id = :parent_id"
+        params["parent_id"] = parent_id
+    if cursor:
+        params["cursor_time"], params["cursor_id"] = decode_cursor(cursor, (datetime, int))
+        where += " AND (km.created_at, km.id_komentarmateri) > (:cursor_time, :cursor_id)"
+
+    rows = conn.execute(text(f"""
+        SELECT {KOMENTAR_COLUMNS}
+        FROM komentarmateri km
+        JOIN users u ON km.id_user = u.id_user
+        WHERE km.id_materi = :id_materi
+          AND km.id_paketkelas = :id_paketkelas
+          AND km.status = 1
+          AND {where}
+        ORDER BY km.created_at ASC, km.id_komentarmateri ASC
+        LIMIT :limit
+    """), params).fetchall()
+    return keyset_page(rows, limit, key=lambda r: (r.created_at, r.id_komentarmateri))
+
+
+def _first_replies(conn, id_materi, id_paketkelas, parent_ids, jumlah):
+    """jumlah balasan pertama untuk setiap komentar di parent_ids, dalam satu query (LATERAL)."""
+    if not parent_ids or jumlah <= 0:
+        return {}
+    rows = conn.execute(text(f"""
+        SELECT r.*
+        FROM unnest(:parent_ids) AS p(id)
+        CROSS JOIN LATERAL (
+            SELECT {KOMENTAR_COLUMNS}
+            FROM komentarmateri km
+            JOIN users u ON km.id_user = u.id_user
+            WHERE km.id_materi = :id_materi
+              AND km.id_paketkelas = :id_paketkelas
+              AND km.parent_id = p.id
+              AND km.status = 1
+            ORDER BY km.created_at ASC, km.id_komentarmateri ASC
+            LIMIT :jumlah
+        ) r
+    """), {
+        "parent_ids": list(parent_ids), "id_materi": id_materi,
+        "id_paketkelas": id_paketkelas, "jumlah": jumlah
+    }).fetchall()
+    replies = {}
+    for row in serialize_rows(rows, mode="iso_date"):
+        replies.setdefault(row["parent_id"], []).append(row)
+    return replies
+
+
+@read_only
+def get_komentar_by_materi(id_materi, id_paketkelas, limit=20, replies=3, cursor=None):
+    """
+    Komentar utama per halaman (keyset), masing-masing dengan reply_count dan
+    `replies` berisi beberapa balasan pertama. Balasan lebih dalam / berikutnya
+    lewat get_komentar_replies. Halaman pertama di-cache singkat (lihat KOMENTAR_CACHE_TTL).
+    Return None jika gagal; cursor tidak valid → ValueError.
+    """
+    cache_key = None
+    if not cursor:
+        ensure_listening()
+        cache_key = komentar_cache_key(id_materi, id_paketkelas, (limit, replies))
+        cached = komentar_cache.get(cache_key, MISSING)
+        if cached is not MISSING:
+            return cached
+        # Halaman yang akan di-cache dibaca dari primary: tepat setelah invalidasi replica bisa
+        # belum memuat komentar baru, dan penulisnya tidak melihat komentarnya sampai TTL habis
+        with use_primary():
+            engine = get_connection()
+    else:
+        engine = get_connection()
+    try:
+        with engine.connect() as conn:
+            rows, next_cursor = _komentar_page(conn, id_materi, id_paketkelas, None, limit, cursor)
+            data = serialize_rows(rows, mode="iso_date")
+            first_replies = _first_replies(
+                conn, id_materi, id_paketkelas, [r["id_komentarmateri"] for r in data], replies
+            )
+            for row in data:
+                row["replies"] = first_replies.get(row["id_komentarmateri"], [])
+
+            result = {"data": data, "next_cursor": next_cursor, "limit": limit}
+            if cache_key is not None:
+                result["total"] = conn.execute(text("""
+                    SELECT COUNT(*) FROM komentarmateri
+                    WHERE id_materi = :id_materi AND id_paketkelas = :id_paketkelas AND status = 1
+                """), {"id_materi": id_materi, "id_paketkelas": id_paketkelas}).scalar()
+                komentar_cache.set(cache_key, result)
+            return result
+    except SQLAlchemyError as e:
+        print(f"Error: {e}")
+        return None
+
+
+@read_only
+def get_komentar_replies(id_materi, id_paketkelas, parent_id, limit=20, cursor=None):
+    """Balasan langsung dari satu komentar per halaman (keyset), masing-masing dengan reply_count."""
     engine = get_connection()
     try:
         with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT km.id_komentarmateri, km.id_user, u.nama, km.isi_komentar, 
-                       km.parent_id, km.is_deleted, km.deleted_by_mentor,
-                       km.created_at, km.updated_at
-                FROM komentarmateri km
-                JOIN users u ON km.id_user = u.id_user
-                WHERE km.id_materi = :id_materi 
-                  AND km.id_paketkelas = :id_paketkelas
-                  AND km.status = 1
-                ORDER BY km.created_at ASC
-            """), {"id_materi": id_materi, "id_paketkelas": id_paketkelas})
-            komentar = [serialize_row_datetime(row) for row in result.mappings().fetchall()]
-            return komentar
+            rows, next_cursor = _komentar_page(conn, id_materi, id_paketkelas, parent_id, limit, cursor)
+            return {"data": serialize_rows(rows, mode="iso_date"), "next_cursor": next_cursor, "limit": limit}
     except SQLAlchemyError as e:
         print(f"Error: {e}")
-        return []
+        return None
 
 def insert_komentar_materi(id_materi, id_user, isi_komentar, id_paketkelas, parent_id=None):
     engine = get_connection()
@@ -60,11 +184,20 @@ def insert_komentar_materi(id_materi, id_user, isi_komentar, id_paketkelas, pare
                 "created_at": now,
                 "updated_at": now
             }).mappings().fetchone()
+            if result:
+                _invalidate_komentar(conn, id_materi, id_paketkelas)
+                # Push ke client yang membuka komentar materi ini (dikirim setelah commit)
+                publish(f"materi.{id_materi}.{id_paketkelas}", {
+                    "type": "komentar_created", "id_komentarmateri": result['id_komentarmateri'],
+                    "id_materi": id_materi, "id_paketkelas": id_paketkelas, "parent_id": parent_id,
+                    "id_user": id_user, "isi_komentar": isi_komentar, "created_at": now
+                }, conn)
             return result['id_komentarmateri'] if result else None
     except SQLAlchemyError as e:
         print(f"Error: {e}")
         return None
 
+@read_only
 def get_komentar_by_id(id_komentarmateri):
     engine = get_connection()
     with engine.connect() as conn:
@@ -84,24 +217,27 @@ def update_komentar(id_komentarmateri, isi_komentar):
                 UPDATE komentarmateri
                 SET isi_komentar = :isi_komentar, updated_at = :updated_at
                 WHERE id_komentarmateri = :id
+                RETURNING id_materi, id_paketkelas
             """)
-            conn.execute(query, {
+            updated = conn.execute(query, {
                 "isi_komentar": isi_komentar,
                 "updated_at": get_wita(),
                 "id": id_komentarmateri
-            })
+            }).first()
+            if updated:
+                _invalidate_komentar(conn, updated.id_materi, updated.id_paketkelas)
         return True
     except SQLAlchemyError as e:
         print(f"Error: {e}")
         return False
 
-def soft_delete_komentar_materi(id_komentarmateri, id_user, role):
+def soft_delete_komentar_materi(id_komentarmateri, ctx):
     engine = get_connection()
     try:
         with engine.begin() as conn:
             # Ambil komentar terlebih dahulu
             get_query = text("""
-                SELECT id_user FROM komentarmateri WHERE id_komentarmateri = :id
+                SELECT id_user, id_materi, id_paketkelas FROM komentarmateri WHERE id_komentarmateri = :id
             """)
             result = conn.execute(get_query, {"id": id_komentarmateri}).mappings().fetchone()
             if not result:
@@ -111,8 +247,8 @@ def soft_delete_komentar_materi(id_komentarmateri, id_user, role):
             now = get_wita()
 
             # Validasi kepemilikan dan hak akses
-            if role == "peserta":
-                if int(id_user) != int(pemilik_komentar):
+            if ctx.is_peserta:
+                if not ctx.is_owner(pemilik_komentar):
                     return {"status": False, "msg": "Peserta hanya bisa menghapus komentar sendiri"}
                 update_query = text("""
                     UPDATE komentarmateri
@@ -122,7 +258,7 @@ def soft_delete_komentar_materi(id_komentarmateri, id_user, role):
                         updated_at = :updated_at
                     WHERE id_komentarmateri = :id
                 """)
-            elif role == "mentor":
+            elif ctx.is_mentor:
                 update_query = text("""
                     UPDATE komentarmateri
                     SET isi_komentar = 'Komentar telah dihapus oleh mentor',
@@ -138,6 +274,7 @@ def soft_delete_komentar_materi(id_komentarmateri, id_user, role):
                 "id": id_komentarmateri,
                 "updated_at": now
             })
+            _invalidate_komentar(conn, result['id_materi'], result['id_paketkelas'])
             return {"status": True, "msg": "Komentar berhasil dihapus"}
 
     except SQLAlchemyError as e:
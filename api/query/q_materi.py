@@ -3,21 +3,16 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.helper import serialize_row
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from .q_catalog import invalidate_modul, materi_catalog_mentor, materi_catalog_peserta
+from .q_validasi import exists
+from ..utils.serializer import serialize_rows
+from ..utils.streaming import stream_query
 
 
 """#=== helper ===#"""
 def is_valid_modul(id_modul):
-    engine = get_connection()
-    try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id_modul 
-                FROM modul 
-                WHERE id_modul = :id AND status = 1
-            """), {"id": id_modul}).scalar()
-            return result is not None
-    except SQLAlchemyError:
-        return False
+    return exists("modul", id_modul=id_modul)
 
 def is_mentor_of_materi(id_mentor, id_materi, id_paketkelas):
     """Cek apakah mentor tertentu mengampu materi dalam paket kelas tertentu"""
@@ -68,107 +63,78 @@ def is_mentor_of_modul(id_user, id_modul):
 
 def is_user_have_access_to_materi(id_user, id_materi, role, id_paketkelas):
     """Validasi apakah user (mentor/peserta) punya akses ke materi dalam paket kelas tertentu"""
-    engine = get_connection()
-    try:
-        with engine.connect() as conn:
-            base_query = """
-                FROM materi m
-                JOIN modul mo ON m.id_modul = mo.id_modul
-                JOIN modulkelas mkls ON mo.id_modul = mkls.id_modul
-                JOIN paketkelas pk ON mkls.id_paketkelas = pk.id_paketkelas
-            """
-
-            if role == 'mentor':
-                query = f"""
-                    SELECT 1 {base_query}
-                    JOIN mentorkelas mk ON pk.id_paketkelas = mk.id_paketkelas
-                    WHERE mk.id_user = :id_user
-                      AND pk.id_paketkelas = :id_paketkelas
-                      AND m.id_materi = :id_materi
-                      AND m.status = 1
-                      AND mk.status = 1
-                      AND mkls.status = 1
-                """
-            elif role == 'peserta':
-                query = f"""
-                    SELECT 1 {base_query}
-                    JOIN pesertakelas ps ON pk.id_paketkelas = ps.id_paketkelas
-                    WHERE ps.id_user = :id_user
-                      AND pk.id_paketkelas = :id_paketkelas
-                      AND m.id_materi = :id_materi
-                      AND m.status = 1
-                      AND ps.status = 1
-                      AND mkls.status = 1
-                """
-            else:
-                return False
-
-            result = conn.execute(text(query), {
-                "id_user": id_user,
-                "id_materi": id_materi,
-                "id_paketkelas": id_paketkelas
-            }).first()
-            return result is not None
-    except SQLAlchemyError as e:
-        print(f"[is_user_have_access_to_materi] Error: {e}")
+    if role not in ('mentor', 'peserta'):
         return False
+    return exists(f"akses_materi_{role}", id_user=id_user, id_materi=id_materi, id_paketkelas=id_paketkelas)
+
+
+def _with_catalog_invalidated(conn, result):
+    """Hasil UPDATE ... RETURNING id_materi, judul, id_modul → invalidasi katalog kelas modulnya."""
+    if not result:
+        return None
+    result = dict(result)
+    invalidate_modul(conn, [result.pop("id_modul")])
+    return result
 
 
 """#=== CRUD ===#"""
+def _materi_list_base(search=None):
+    """FROM/WHERE daftar materi admin (dipakai versi list & streaming)."""
+    base_query = """
+        FROM materi m
+        JOIN modul mo 
+            ON m.id_modul = mo.id_modul 
+           AND mo.status = 1
+        LEFT JOIN users u 
+            ON m.id_owner = u.id_user 
+           AND u.status = 1
+        WHERE m.status = 1
+    """
+
+    params = {}
+
+    # 🔍 SEARCH (opsional)
+    if search:
+        base_query += """
+        AND m.judul ILIKE :search
+        """
+        params["search"] = f"%{search}%"
+    return base_query, params
+
+MATERI_LIST_COLUMNS = """
+    m.id_materi, 
+    m.id_owner, 
+    u.nickname as owner, 
+    m.id_modul, 
+    m.tipe_materi, 
+    m.judul, 
+    m.url_file,
+    m.visibility, 
+    m.is_downloadable, 
+    m.status, 
+    m.created_at, 
+    m.updated_at,
+    mo.judul AS judul_modul
+"""
+
+@read_only
 def get_all_materi(page=1, limit=20, search=None):
     engine = get_connection()
     offset = (page - 1) * limit
+    base_query, params = _materi_list_base(search)
 
     try:
         with engine.connect() as conn:
 
-            base_query = """
-                FROM materi m
-                JOIN modul mo 
-                    ON m.id_modul = mo.id_modul 
-                   AND mo.status = 1
-                LEFT JOIN users u 
-                    ON m.id_owner = u.id_user 
-                   AND u.status = 1
-                WHERE m.status = 1
-            """
-
-            params = {}
-
-            # 🔍 SEARCH (opsional)
-            if search:
-                base_query += """
-                AND m.judul ILIKE :search
-                """
-                params["search"] = f"%{search}%"
-
             # 🔹 DATA QUERY
             data_query = text(f"""
-                SELECT 
-                    m.id_materi, 
-                    m.id_owner, 
-                    u.nickname as owner, 
-                    m.id_modul, 
-                    m.tipe_materi, 
-                    m.judul, 
-                    m.url_file,
-                    m.visibility, 
-                    m.is_downloadable, 
-                    m.status, 
-                    m.created_at, 
-                    m.updated_at,
-                    mo.judul AS judul_modul
+                SELECT {MATERI_LIST_COLUMNS}
                 {base_query}
                 ORDER BY m.created_at DESC
                 LIMIT :limit OFFSET :offset
             """)
 
-            params.update({
-                "limit": limit,
-                "offset": offset
-            })
-
-            data = conn.execute(data_query, params).mappings().fetchall()
+            data = conn.execute(data_query, {**params, "limit": limit, "offset": offset}).fetchall()
 
             # 🔹 COUNT QUERY (TOTAL DATA)
             count_query = text(f"""
@@ -179,7 +145,7 @@ def get_all_materi(page=1, limit=20, search=None):
             total = conn.execute(count_query, params).scalar()
 
             return {
-                "data": [serialize_row(row) for row in data],
+                "data": serialize_rows(data, mode="date"),
                 "total": total,
                 "page": page,
                 "limit": limit
@@ -204,6 +170,15 @@ def get_old_materi_by_id(id_materi):
         print(f"Error: {e}")
         return None
     
+
+def stream_all_materi(search=None):
+    """Semua materi sebagai NDJSON (tanpa paging, server-side cursor)."""
+    base_query, params = _materi_list_base(search)
+    return stream_query(
+        f"SELECT {MATERI_LIST_COLUMNS} {base_query} ORDER BY m.created_at DESC", params, mode="date"
+    )
+
+@read_only
 def get_materi_by_id(id_materi):
     engine = get_connection()
     try:
@@ -231,6 +206,7 @@ def insert_materi(payload):
                 VALUES (:id_modul, :id_owner, :tipe_materi, :judul, :url_file, :visibility, :is_downloadable, 1, :now, :now)
                 RETURNING id_materi, judul
             """), {**payload, "now": now}).mappings().fetchone()
+            invalidate_modul(conn, [payload.get("id_modul")])
             return serialize_row(result)
     except SQLAlchemyError:
         return None
@@ -241,7 +217,7 @@ def update_materi(id_materi, payload):
         with engine.begin() as conn:
             now = get_wita()
             result = conn.execute(text("""
-                UPDATE materi
+                UPDATE materi m
                 SET id_modul = :id_modul,
                     id_owner = :id_owner,
                     tipe_materi = :tipe_materi,
@@ -250,10 +226,16 @@ def update_materi(id_materi, payload):
                     visibility = :visibility,
                     is_downloadable = :is_downloadable,
                     updated_at = :now
-                WHERE id_materi = :id AND status = 1
-                RETURNING id_materi, judul
+                FROM (SELECT id_modul FROM materi WHERE id_materi = :id) lama
+                WHERE m.id_materi = :id AND m.status = 1
+                RETURNING m.id_materi, m.judul, lama.id_modul AS id_modul_lama
             """), {**payload, "id": id_materi, "now": now}).mappings().fetchone()
-            return dict(result) if result else None
+            if not result:
+                return None
+            result = dict(result)
+            # Materi bisa pindah modul → katalog kelas modul lama & baru
+            invalidate_modul(conn, [result.pop("id_modul_lama"), payload.get("id_modul")])
+            return result
     except SQLAlchemyError:
         return None
 
@@ -265,9 +247,9 @@ def delete_materi(id_materi):
                 UPDATE materi
                 SET status = 0, updated_at = :now
                 WHERE id_materi = :id AND status = 1
-                RETURNING id_materi, judul
+                RETURNING id_materi, judul, id_modul
             """), {"id": id_materi, "now": get_wita()}).mappings().fetchone()
-            return dict(result) if result else None
+            return _with_catalog_invalidated(conn, result)
     except SQLAlchemyError:
         return None
 
@@ -299,79 +281,29 @@ def delete_materi(id_materi):
 #         return []
     
 def get_materi_by_peserta_web(id_user):
-    engine = get_connection()
+    """Materi open dari kelas peserta, disusun dari katalog kelas yang di-cache (q_catalog)."""
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT m.id_materi, m.judul, m.tipe_materi, m.url_file, m.is_downloadable,
-                       m.id_modul, pk.id_paketkelas, pk.nama_kelas
-                FROM materi m
-                JOIN modul mo ON m.id_modul = mo.id_modul
-                JOIN modulkelas mk ON mk.id_modul = mo.id_modul
-                JOIN paketkelas pk ON mk.id_paketkelas = pk.id_paketkelas
-                JOIN userbatch ub ON ub.id_user = :id_user
-                JOIN pesertakelas pkls ON pkls.id_user = :id_user
-                WHERE pk.id_batch = ub.id_batch
-                  AND pkls.id_paketkelas = pk.id_paketkelas
-                  AND m.visibility = 'open'
-                  AND m.status = 1
-                  AND mk.status = 1
-                ORDER BY mo.created_at ASC
-            """), {"id_user": id_user}).mappings().fetchall()
-            return [dict(row) for row in result]
+        return materi_catalog_peserta(id_user)
     except SQLAlchemyError as e:
         print(f"[get_materi_by_peserta] Error: {str(e)}")
         return []
     
 def get_materi_by_peserta_mobile(id_user):
-    engine = get_connection()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT m.id_materi, m.judul, m.tipe_materi, m.url_file, m.is_downloadable,
-                       m.id_modul, pk.id_paketkelas, pk.nama_kelas
-                FROM materi m
-                JOIN modul mo ON m.id_modul = mo.id_modul
-                JOIN modulkelas mk ON mk.id_modul = mo.id_modul
-                JOIN paketkelas pk ON mk.id_paketkelas = pk.id_paketkelas
-                JOIN userbatch ub ON ub.id_user = :id_user
-                JOIN pesertakelas pkls ON pkls.id_user = :id_user
-                WHERE pk.id_batch = ub.id_batch
-                  AND pkls.id_paketkelas = pk.id_paketkelas
-                  AND m.visibility = 'open'
-                  AND m.status = 1
-                  AND mk.status = 1
-                ORDER BY mo.created_at ASC
-            """), {"id_user": id_user}).mappings().fetchall()
-            return [dict(row) for row in result]
+        return materi_catalog_peserta(id_user)
     except SQLAlchemyError as e:
         print(f"[get_materi_by_peserta] Error: {str(e)}")
         return []
 
 
 def get_materi_by_mentor(id_user):
-    engine = get_connection()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT m.id_materi, m.judul, m.tipe_materi, m.url_file, m.visibility, m.is_downloadable,
-                       m.id_modul, pk.id_paketkelas, pk.nama_kelas
-                FROM materi m
-                JOIN modul mo ON m.id_modul = mo.id_modul
-                JOIN modulkelas mk ON mk.id_modul = mo.id_modul
-                JOIN paketkelas pk ON mk.id_paketkelas = pk.id_paketkelas
-                JOIN mentorkelas mkls ON mkls.id_user = :id_user
-                WHERE mkls.id_paketkelas = pk.id_paketkelas
-                  AND m.status = 1
-                  AND mk.status = 1
-                  AND mkls.status = 1
-                ORDER BY mo.created_at ASC
-            """), {"id_user": id_user}).mappings().fetchall()
-            return [dict(row) for row in result]
+        return materi_catalog_mentor(id_user)
     except SQLAlchemyError as e:
         print(f"[get_materi_by_mentor] Error: {str(e)}")
         return []
     
+@read_only
 def get_materi_by_mentor_and_kelas(id_user, id_paketkelas, id_modul=None):
     engine = get_connection()
 
@@ -391,15 +323,22 @@ def get_materi_by_mentor_and_kelas(id_user, id_paketkelas, id_modul=None):
                     pk.nama_kelas
                 FROM materi m
                 JOIN modul mo ON m.id_modul = mo.id_modul
-                JOIN modulkelas mk ON mk.id_modul = mo.id_modul
-                JOIN paketkelas pk ON mk.id_paketkelas = pk.id_paketkelas
-                JOIN mentorkelas mkls ON mkls.id_paketkelas = pk.id_paketkelas
+                JOIN paketkelas pk ON pk.id_paketkelas = :id_paketkelas
                 WHERE
-                    mkls.id_user = :id_user
-                    AND pk.id_paketkelas = :id_paketkelas
-                    AND m.status = 1
-                    AND mk.status = 1
-                    AND mkls.status = 1
+                    m.status = 1
+                    -- EXISTS: relasi modul-kelas / mentor-kelas ganda tidak menggandakan materi
+                    AND EXISTS (
+                        SELECT 1 FROM modulkelas mk
+                        WHERE mk.id_modul = m.id_modul
+                          AND mk.id_paketkelas = pk.id_paketkelas
+                          AND mk.status = 1
+                    )
+                    AND EXISTS (
+                        SELECT 1 FROM mentorkelas mkls
+                        WHERE mkls.id_paketkelas = pk.id_paketkelas
+                          AND mkls.id_user = :id_user
+                          AND mkls.status = 1
+                    )
             """
 
             params = {
@@ -434,13 +373,13 @@ def update_materi_visibility(id_materi, visibility):
                 SET visibility = :visibility,
                     updated_at = :now
                 WHERE id_materi = :id_materi AND status = 1
-                RETURNING id_materi, judul
+                RETURNING id_materi, judul, id_modul
             """), {
                 "id_materi": id_materi,
                 "visibility": visibility,
                 "now": get_wita()
             }).mappings().fetchone()
-            return dict(result) if result else None
+            return _with_catalog_invalidated(conn, result)
         
     except SQLAlchemyError as e:
         print(f"[update_materi_is_downloadable] Error: {e}")
@@ -455,13 +394,13 @@ def update_materi_downloadable(id_materi, is_downloadable):
                 SET is_downloadable = :is_downloadable,
                     updated_at = :now
                 WHERE id_materi = :id_materi AND status = 1
-                RETURNING id_materi, judul
+                RETURNING id_materi, judul, id_modul
             """), {
                 "id_materi": id_materi,
                 "is_downloadable": is_downloadable,
                 "now": get_wita()
             }).mappings().fetchone()
-            return dict(result) if result else None
+            return _with_catalog_invalidated(conn, result)
     except SQLAlchemyError as e:
         print(f"[update_materi_is_downloadable] Error: {e}")
         return None
@@ -3,7 +3,10 @@ from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.security import generate_password_hash
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from .q_catalog import invalidate_membership
 
+@read_only
 def get_all_mentor(page=1, limit=20, search=None):
     engine = get_connection()
     offset = (page - 1) * limit
@@ -153,6 +156,7 @@ def insert_mentor(payload):
         print(f"[ERROR insert_mentor] {e}")
         return None
 
+@read_only
 def get_mentor_by_id(id_mentor):
     engine = get_connection()
     try:
@@ -252,6 +256,7 @@ def update_mentor(id_mentor, payload):
 
             # kalau sama2 null atau sama2 sama → tidak ada perubahan
 
+            invalidate_membership(connection, [id_mentor])
             return dict(user_result)
 
     except SQLAlchemyError as e:
@@ -292,12 +297,14 @@ def delete_mentor(id_mentor):
                 "now": now
             })
 
+            invalidate_membership(connection, [id_mentor])
             return dict(result)
     except SQLAlchemyError as e:
         print(f"Error delete_mentor: {e}")
         return None
 
 
+@read_only
 def get_bio_all_mentor():
     engine = get_connection()
     try:
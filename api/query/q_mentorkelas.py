@@ -1,7 +1,11 @@
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from .q_validasi import exists
+from .q_catalog import invalidate_membership
 
+@read_only
 def get_all_mentorkelas():
     engine = get_connection()
     try:
@@ -20,6 +24,7 @@ def get_all_mentorkelas():
         print(f"Error: {e}")
         return []
 
+@read_only
 def get_mentorkelas_by_id(id_mentorkelas):
     engine = get_connection()
     try:
@@ -38,28 +43,10 @@ def get_mentorkelas_by_id(id_mentorkelas):
         return None
 
 def is_valid_mentor(id_user):
-    engine = get_connection()
-    try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id_user FROM users
-                WHERE id_user = :id_user AND role = 'mentor' AND status = 1
-            """), {"id_user": id_user}).scalar()
-            return result is not None
-    except SQLAlchemyError:
-        return False
+    return exists("mentor", id_user=id_user)
 
 def is_valid_kelas(id_paketkelas):
-    engine = get_connection()
-    try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id_paketkelas FROM paketkelas
-                WHERE id_paketkelas = :id AND status = 1
-            """), {"id": id_paketkelas}).scalar()
-            return result is not None
-    except SQLAlchemyError:
-        return False
+    return exists("paketkelas", id_paketkelas=id_paketkelas)
 
 def insert_mentorkelas(payload):
     engine = get_connection()
@@ -73,6 +60,7 @@ def insert_mentorkelas(payload):
                 **payload,
                 "now": get_wita()
             }).mappings().fetchone()
+            invalidate_membership(conn, [payload.get("id_user")])
             return dict(result)
     except SQLAlchemyError as e:
         print(f"Error: {e}")
@@ -82,19 +70,24 @@ def update_mentorkelas(id_mentorkelas, payload):
     engine = get_connection()
     try:
         with engine.begin() as conn:
+            # id_user lama ikut dikembalikan: mentor lama juga kehilangan kelas ini
             result = conn.execute(text("""
-                UPDATE mentorkelas
+                UPDATE mentorkelas mk
                 SET id_user = :id_user,
                     id_paketkelas = :id_paketkelas,
                     updated_at = :now
-                WHERE id_mentorkelas = :id AND status = 1
-                RETURNING id_mentorkelas
+                FROM (SELECT id_mentorkelas, id_user FROM mentorkelas WHERE id_mentorkelas = :id FOR UPDATE) lama
+                WHERE mk.id_mentorkelas = lama.id_mentorkelas AND mk.status = 1
+                RETURNING mk.id_mentorkelas, mk.id_user, lama.id_user AS id_user_lama
             """), {
                 **payload,
                 "id": id_mentorkelas,
                 "now": get_wita()
             }).mappings().fetchone()
-            return dict(result) if result else None
+            if not result:
+                return None
+            invalidate_membership(conn, [result["id_user_lama"], result["id_user"]])
+            return {"id_mentorkelas": result["id_mentorkelas"]}
     except SQLAlchemyError as e:
         print(f"Error: {e}")
         return None
@@ -107,17 +100,20 @@ def delete_mentorkelas(id_mentorkelas):
                 UPDATE mentorkelas
                 SET status = 0, updated_at = :now
                 WHERE id_mentorkelas = :id AND status = 1
-                RETURNING id_mentorkelas
+                RETURNING id_mentorkelas, id_user
             """), {
                 "id": id_mentorkelas,
                 "now": get_wita()
             }).mappings().fetchone()
+            if result:
+                invalidate_membership(conn, [result["id_user"]])
             return dict(result) if result else None
     except SQLAlchemyError as e:
         print(f"Error: {e}")
         return None
 
 
+@read_only
 def get_list_kelas_mentor(id_mentor):
     engine = get_connection()
     try:
@@ -173,6 +169,7 @@ def get_list_kelas_mentor(id_mentor):
         print(f"[get_kelas_by_role] Database error: {e}")
         return []
     
+@read_only
 def get_all_mentor_kelas(id_mentor):
     engine = get_connection()
     try:
@@ -270,6 +267,7 @@ def assign_kelas_to_mentor(id_mentor, id_paketkelas_list):
                 })
                 inserted_count += 1
 
+            invalidate_membership(conn, [id_mentor])
             return inserted_count
     except SQLAlchemyError as e:
         print(f"[assign_kelas_to_mentor] Error: {e}")
@@ -3,36 +3,19 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.helper import serialize_row
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from .q_catalog import invalidate_kelas, invalidate_modul, modul_catalog
+from .q_validasi import exists
 
 """=== helper ==="""
 def is_mentor_of_kelas(id_mentor, id_paketkelas):
-    engine = get_connection()
-    try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT 1 FROM mentorkelas
-                WHERE id_user = :id_user AND id_paketkelas = :id_paketkelas AND status = 1
-            """), {
-                "id_user": id_mentor,
-                "id_paketkelas": id_paketkelas
-            }).fetchone()
-            return bool(result)
-    except SQLAlchemyError:
-        return False
+    return exists("mentor_of_kelas", id_mentor=id_mentor, id_paketkelas=id_paketkelas)
     
 def is_valid_paketkelas(id_paketkelas):
-    engine = get_connection()
-    try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id_paketkelas FROM paketkelas
-                WHERE id_paketkelas = :id AND status = 1
-            """), {"id": id_paketkelas}).scalar()
-            return result is not None
-    except SQLAlchemyError:
-        return False
+    return exists("paketkelas", id_paketkelas=id_paketkelas)
 
 """=== CRUD ==="""
+@read_only
 def get_all_modul_admin(search=None):
     engine = get_connection()
 
@@ -97,6 +80,7 @@ def get_all_modul_admin(search=None):
         print(f"DB Error: {e}")
         return []
 
+@read_only
 def get_all_modul_by_mentor(id_mentor):
     engine = get_connection()
     try:
@@ -118,6 +102,7 @@ def get_all_modul_by_mentor(id_mentor):
     except SQLAlchemyError:
         return []
     
+@read_only
 def get_all_modul_by_kelas_mentor(id_paketkelas):
     engine = get_connection()
     try:
@@ -136,6 +121,7 @@ def get_all_modul_by_kelas_mentor(id_paketkelas):
     except SQLAlchemyError:
         return []
     
+@read_only
 def get_all_kelas_by_modul(id_modul):
     engine = get_connection()
     try:
@@ -197,6 +183,7 @@ def get_all_kelas_by_modul(id_modul):
         print(f"[get_all_kelas_by_modul] Database error: {e}")
         return []
     
+@read_only
 def get_kelas_by_modul(id_modul):
     engine = get_connection()
     try:
@@ -260,11 +247,13 @@ def delete_kelas_in_modul(id_modulkelas):
                 UPDATE modulkelas
                 SET status = 0, updated_at = :now
                 WHERE id_modulkelas = :id AND status = 1
+                RETURNING id_paketkelas
             """), {
                 "id": id_modulkelas,
                 "now": get_wita()
-            })
-            return result.rowcount > 0  # True kalau ada row ter-update
+            }).scalars().all()
+            invalidate_kelas(conn, result)
+            return len(result) > 0  # True kalau ada row ter-update
     except SQLAlchemyError:
         return False
     
@@ -304,6 +293,7 @@ def assign_kelas_to_modul(id_modul, id_paketkelas_list):
                 })
                 inserted_count += 1
 
+            invalidate_kelas(conn, id_paketkelas_list)
             return inserted_count
     except SQLAlchemyError as e:
         print(f"[assign_kelas_to_modul] Error: {e}")
@@ -325,6 +315,7 @@ def get_old_modul_by_id(id_modul):
         print(f"[get_old_modul_by_id] Error: {e}")
         return None
     
+@read_only
 def get_modul_by_id(id_modul):
     engine = get_connection()
     try:
@@ -406,6 +397,7 @@ def insert_modul_for_mentor(payload, id_user):
                     "now": get_wita()
                 })
 
+            invalidate_kelas(conn, [kelas["id_paketkelas"] for kelas in kelas_list])
             return dict(modul)
 
     except SQLAlchemyError as e:
@@ -454,6 +446,8 @@ def update_modul(id_modul, payload):
                 "id": id_modul,
                 "now": get_wita()
             }).mappings().fetchone()
+            if result:
+                invalidate_modul(conn, [id_modul])
             return dict(result) if result else None
     except SQLAlchemyError as e:
         print(f"[update_modul] Error: {e}")
@@ -472,6 +466,8 @@ def delete_modul(id_modul):
                 "id": id_modul,
                 "now": get_wita()
             }).mappings().fetchone()
+            if result:
+                invalidate_modul(conn, [id_modul])
             return dict(result) if result else None
     except SQLAlchemyError:
         return None
@@ -483,46 +479,10 @@ def get_all_modul_by_user(id_user, role):
     Ambil modul berdasarkan role user:
     - mentor → modul yang diampu
     - peserta → modul dari kelas yang diikuti
+    Disusun dari katalog modul per kelas yang di-cache (q_catalog).
     """
-    engine = get_connection()
     try:
-        with engine.connect() as conn:
-            if role == "mentor":
-                result = conn.execute(text("""
-                    SELECT m.id_modul, m.judul, m.deskripsi, m.owner, m.visibility, m.status,
-                           pk.id_paketkelas, pk.nama_kelas, pk.deskripsi AS deskripsi_kelas
-                    FROM modul m
-                    JOIN modulkelas mkls ON mkls.id_modul = m.id_modul AND mkls.status = 1
-                    JOIN paketkelas pk ON mkls.id_paketkelas = pk.id_paketkelas
-                    JOIN mentorkelas mtk ON mtk.id_paketkelas = pk.id_paketkelas
-                    WHERE mtk.id_user = :id_user
-                      AND mtk.status = 1
-                      AND pk.status = 1
-                      AND m.status = 1
-                    ORDER BY m.id_modul
-                """), {"id_user": id_user}).mappings().fetchall()
-
-            elif role == "peserta":
-                result = conn.execute(text("""
-                    SELECT m.id_modul, m.judul, m.deskripsi, m.owner, m.visibility, m.status,
-                           pk.id_paketkelas, pk.nama_kelas, pk.deskripsi AS deskripsi_kelas
-                    FROM modul m
-                    JOIN modulkelas mkls ON mkls.id_modul = m.id_modul AND mkls.status = 1
-                    JOIN paketkelas pk ON mkls.id_paketkelas = pk.id_paketkelas
-                    JOIN pesertakelas ps ON ps.id_paketkelas = pk.id_paketkelas
-                    WHERE ps.id_user = :id_user
-                      AND ps.status = 1
-                      AND pk.status = 1
-                      AND m.status = 1
-                      AND m.visibility = 'open'
-                    ORDER BY m.id_modul
-                """), {"id_user": id_user}).mappings().fetchall()
-
-            else:
-                return []
-
-            return [dict(row) for row in result]
-
+        return modul_catalog(id_user, role)
     except SQLAlchemyError as e:
         print(f"[get_all_modul_by_user] Error: {e}")
         return []
@@ -542,6 +502,8 @@ def update_modul_visibility(id_modul, visibility):
                 "id_modul": id_modul,
                 "now": get_wita()
             }).mappings().fetchone()
+            if result:
+                invalidate_modul(conn, [id_modul])
             return dict(result) if result else None
     except SQLAlchemyError as e:
         print(f"Error: {e}")
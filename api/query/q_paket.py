@@ -1,8 +1,10 @@
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
 
 
+@read_only
 def get_all_paket():
     engine = get_connection()
     try:
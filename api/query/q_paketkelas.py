@@ -3,8 +3,12 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.helper import serialize_row
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from .q_catalog import invalidate_kelas, invalidate_membership
+from .q_validasi import exists
 
 
+@read_only
 def get_kelas_dropdown_all():
     engine = get_connection()
 
@@ -27,6 +31,7 @@ def get_kelas_dropdown_all():
         return []
     
     
+@read_only
 def get_kelas_by_admin(page=1, limit=20, search=None):
     engine = get_connection()
     offset = (page - 1) * limit
@@ -145,6 +150,7 @@ def get_kelas_by_admin(page=1, limit=20, search=None):
         print(f"[get_kelas_by_admin] Database error: {e}")
         return None
     
+@read_only
 def get_kelas_by_mentor(id_user):
     engine = get_connection()
     try:
@@ -170,6 +176,7 @@ def get_kelas_by_mentor(id_user):
         print(f"[get_kelas_by_role] Database error: {e}")
         return []
     
+@read_only
 def get_kelas_by_walikelas(id_user):
     engine = get_connection()
     try:
@@ -191,6 +198,7 @@ def get_kelas_by_walikelas(id_user):
         print(f"[get_kelas_by_role] Database error: {e}")
         return []
 
+@read_only
 def get_kelas_by_id(id_kelas):
     engine = get_connection()
     try:
@@ -210,17 +218,7 @@ def get_kelas_by_id(id_kelas):
         return None
 
 def is_batch_exist(id_batch):
-    engine = get_connection()
-    try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id_batch FROM batch
-                WHERE id_batch = :id_batch AND status = 1
-            """), {"id_batch": id_batch}).scalar()
-            return result is not None
-    except SQLAlchemyError as e:
-        print(f"Error: {e}")
-        return False
+    return exists("batch", id_batch=id_batch)
 
 def insert_kelas(payload):
     engine = get_connection()
@@ -262,6 +260,9 @@ def update_kelas(id_kelas, payload):
                 "id_kelas": id_kelas,
                 "now": get_wita()
             }).mappings().fetchone()
+            if result:
+                # nama_kelas ikut tersimpan di katalog materi/modul kelas
+                invalidate_kelas(conn, [id_kelas])
             return dict(result) if result else None
     except SQLAlchemyError as e:
         print(f"[update_kelas] Error: {e}")
@@ -281,11 +282,14 @@ def delete_kelas(id_kelas):
                 "id_kelas": id_kelas,
                 "now": get_wita()
             }).mappings().fetchone()
+            if result:
+                invalidate_kelas(conn, [id_kelas])
             return dict(result) if result else None
     except SQLAlchemyError as e:
         print(f"Error: {e}")
         return None
     
+@read_only
 def get_peserta_kelas(id_kelas):
     engine = get_connection()
     try:
@@ -304,6 +308,7 @@ def get_peserta_kelas(id_kelas):
         print(f"Error get_peserta_batch: {e}")
         return []
     
+@read_only
 def get_mentor_kelas(id_kelas):
     engine = get_connection()
     try:
@@ -322,6 +327,7 @@ def get_mentor_kelas(id_kelas):
         print(f"Error get_peserta_batch: {e}")
         return []
     
+@read_only
 def get_modul_kelas(id_kelas):
     engine = get_connection()
     try:
@@ -350,16 +356,23 @@ def soft_delete(table_name, id_column, id_value):
     engine = get_connection()
     try:
         with engine.begin() as conn:
+            # modulkelas → katalog kelas berubah; pesertakelas/mentorkelas → keanggotaan user berubah
+            returning = "id_paketkelas" if table_name == "modulkelas" else "id_user"
             sql = text(f"""
                 UPDATE {table_name}
                 SET status = 0, updated_at = :now
                 WHERE {id_column} = :id AND status = 1
+                RETURNING {returning}
             """)
             result = conn.execute(sql, {
                 "id": id_value,
                 "now": get_wita()
-            })
-            return result.rowcount > 0
+            }).scalars().all()
+            if table_name == "modulkelas":
+                invalidate_kelas(conn, result)
+            else:
+                invalidate_membership(conn, result)
+            return len(result) > 0
     except SQLAlchemyError as e:
         print(f"Error in soft_delete: {e}")
         return False
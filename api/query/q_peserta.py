@@ -7,9 +7,16 @@ from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.security import generate_password_hash
 
-from ..utils.helper import serialize_row
 from ..utils.config import get_connection, get_wita
+from ..utils.serializer import serialize_rows
+from ..utils.streaming import stream_query
+from ..utils.db_routing import read_only
+from .q_catalog import invalidate_membership
 
+# Password awal peserta hasil upload & reset password (dikirim di email kredensial)
+PASSWORD_AWAL = "123456"
+
+@read_only
 def get_all_peserta():
     engine = get_connection()
     try:
@@ -39,12 +46,13 @@ def get_all_peserta():
                   AND u.nama IS NOT NULL;
             """)).mappings().fetchall()
 
-            return [serialize_row(row) for row in result]
+            return serialize_rows(result, mode="date")
     except SQLAlchemyError as e:
         print(f"Error occurred: {str(e)}")
         return []
     
     
+@read_only
 def get_all_peserta_aktif(page=1, limit=20, search=None, id_batch=None, batch_filter=None):
     engine = get_connection()
     offset = (page - 1) * limit
@@ -120,7 +128,7 @@ def get_all_peserta_aktif(page=1, limit=20, search=None, id_batch=None, batch_fi
                 "offset": offset
             })
 
-            data = connection.execute(data_query, params).mappings().fetchall()
+            data = connection.execute(data_query, params).fetchall()
 
             # 🔹 COUNT (FIX: DISTINCT biar tidak double)
             count_query = text(f"""
@@ -133,7 +141,7 @@ def get_all_peserta_aktif(page=1, limit=20, search=None, id_batch=None, batch_fi
             execution_time = round((time.time() - start_time) * 1000, 2)
 
             return {
-                "data": [serialize_row(row) for row in data],
+                "data": serialize_rows(data, mode="date"),
                 "total": total,
                 "page": page,
                 "limit": limit,
@@ -144,25 +152,56 @@ def get_all_peserta_aktif(page=1, limit=20, search=None, id_batch=None, batch_fi
         print(f"Error occurred: {str(e)}")
         return None
 
-def get_all_peserta_public():
+def _peserta_public_base(search=None):
+    """FROM/WHERE peserta public: belum terdaftar di batch aktif."""
+    base_query = """
+        FROM users u
+        LEFT JOIN userbatch ub 
+        ON ub.id_user = u.id_user AND ub.status = 1
+        WHERE u.role = 'peserta'
+        AND ub.id_user IS NULL
+        AND u.status = 1
+    """
+    params = {}
+    if search:
+        base_query += " AND (u.nama ILIKE :search OR u.email ILIKE :search)"
+        params["search"] = f"%{search}%"
+    return base_query, params
+
+PESERTA_PUBLIC_COLUMNS = "u.id_user, u.nama, u.email, u.no_hp, u.kode_pemulihan, u.role"
+
+@read_only
+def get_all_peserta_public(page=1, limit=20, search=None):
     engine = get_connection()
+    offset = (page - 1) * limit
+    base_query, params = _peserta_public_base(search)
     try:
         with engine.connect() as connection:
-            result = connection.execute(text("""
-                SELECT 
-                    u.id_user, u.nama, u.email, u.no_hp, u.password, u.kode_pemulihan, u.role
-                FROM users u
-                LEFT JOIN userbatch ub 
-                ON ub.id_user = u.id_user AND ub.status = 1
-                WHERE u.role = 'peserta'
-                AND ub.id_user IS NULL
-                AND u.status = 1;
-            """)).mappings().fetchall()
+            result = connection.execute(text(f"""
+                SELECT {PESERTA_PUBLIC_COLUMNS}
+                {base_query}
+                ORDER BY u.id_user DESC
+                LIMIT :limit OFFSET :offset
+            """), {**params, "limit": limit, "offset": offset}).fetchall()
+
+            total = connection.execute(text(f"SELECT COUNT(u.id_user) {base_query}"), params).scalar()
 
-            return [serialize_row(row) for row in result]
+            return {
+                "data": serialize_rows(result, mode="date"),
+                "total": total,
+                "page": page,
+                "limit": limit
+            }
     except SQLAlchemyError as e:
         print(f"Error occurred: {str(e)}")
-        return []
+        return None
+
+def stream_peserta_public(search=None):
+    """Semua peserta public sebagai NDJSON (tanpa paging, server-side cursor)."""
+    base_query, params = _peserta_public_base(search)
+    return stream_query(
+        f"SELECT {PESERTA_PUBLIC_COLUMNS} {base_query} ORDER BY u.id_user DESC", params, mode="date"
+    )
 
 def insert_peserta_with_batch_kelas(payload):
     engine = get_connection()
@@ -328,7 +367,7 @@ def insert_bulk_peserta(peserta_list):
                     continue  # (safety, meski sudah difilter di atas)
 
                 # ✅ Insert ke users
-                hash_password = generate_password_hash("123456", method="pbkdf2:sha256")
+                hash_password = generate_password_hash(PASSWORD_AWAL, method="pbkdf2:sha256")
                 kode_pemulihan = ''.join(random.choices(string.ascii_letters + string.digits, k=6))
 
                 user_result = conn.execute(
@@ -373,7 +412,10 @@ def insert_bulk_peserta(peserta_list):
                 inserted.append({
                     "id_user": id_user,
                     "nama": user_result["nama"],
-                    "email": user_result["email"]
+                    "email": user_result["email"],
+                    "password_awal": PASSWORD_AWAL,
+                    "kode_pemulihan": kode_pemulihan,
+                    "nama_kelas": str(peserta.get("kelas")).strip()
                 })
 
             return {
@@ -386,6 +428,7 @@ def insert_bulk_peserta(peserta_list):
         print(f"[ERROR insert_bulk_peserta] {e}")
         return None
 
+@read_only
 def get_peserta_by_id(id_peserta):
     engine = get_connection()
     try:
@@ -492,6 +535,7 @@ def update_peserta(id_peserta, payload):
                     {"id_batch": id_batch_baru, "id_peserta": id_peserta, "now": now}
                 )
 
+            invalidate_membership(connection, [id_peserta])
             return dict(result)
 
     except SQLAlchemyError as e:
@@ -557,6 +601,7 @@ def delete_peserta(id_peserta):
                 {"id_user": id_peserta, "now": now}
             ).mappings().fetchone()
 
+            invalidate_membership(connection, [id_peserta])
             return dict(result) if result else None
 
     except SQLAlchemyError as e:
@@ -566,7 +611,7 @@ def delete_peserta(id_peserta):
 def reset_password_peserta(id_peserta):
     engine = get_connection()
     try:
-        password_default = generate_password_hash("123456", method="pbkdf2:sha256")
+        password_default = generate_password_hash(PASSWORD_AWAL, method="pbkdf2:sha256")
         with engine.begin() as conn:
             conn.execute(text("""
                 UPDATE users
@@ -3,7 +3,10 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.helper import serialize_row
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from .q_catalog import invalidate_membership
 
+@read_only
 def get_all_pesertakelas():
     engine = get_connection()
     try:
@@ -20,6 +23,7 @@ def get_all_pesertakelas():
         print(f"Error: {e}")
         return []
 
+@read_only
 def get_pesertakelas_by_id(id_pesertakelas):
     engine = get_connection()
     try:
@@ -67,6 +71,7 @@ def insert_pesertakelas(data):
                 VALUES (:id_user, :id_paketkelas, 1, :now, :now)
                 RETURNING id_user, id_paketkelas
             """), {**data, "now": get_wita()}).mappings().fetchone()
+            invalidate_membership(conn, [result["id_user"]])
             return dict(result)
     except SQLAlchemyError as e:
         print(f"Error: {e}")
@@ -76,15 +81,20 @@ def update_pesertakelas(id_pesertakelas, data):
     engine = get_connection()
     try:
         with engine.begin() as conn:
+            # id_user lama ikut dikembalikan: peserta lama juga kehilangan kelas ini
             result = conn.execute(text("""
-                UPDATE pesertakelas
+                UPDATE pesertakelas pk
                 SET id_user = :id_user,
                     id_paketkelas = :id_paketkelas,
                     updated_at = :now
-                WHERE id_pesertakelas = :id AND status = 1
-                RETURNING id_user
+                FROM (SELECT id_pesertakelas, id_user FROM pesertakelas WHERE id_pesertakelas = :id FOR UPDATE) lama
+                WHERE pk.id_pesertakelas = lama.id_pesertakelas AND pk.status = 1
+                RETURNING pk.id_user, lama.id_user AS id_user_lama
             """), {**data, "id": id_pesertakelas, "now": get_wita()}).mappings().fetchone()
-            return dict(result) if result else None
+            if not result:
+                return None
+            invalidate_membership(conn, [result["id_user_lama"], result["id_user"]])
+            return {"id_user": result["id_user"]}
     except SQLAlchemyError as e:
         print(f"Error: {e}")
         return None
@@ -99,6 +109,8 @@ def delete_pesertakelas(id_pesertakelas):
                 WHERE id_pesertakelas = :id AND status = 1
                 RETURNING id_user
             """), {"id": id_pesertakelas, "now": get_wita()}).mappings().fetchone()
+            if result:
+                invalidate_membership(conn, [result["id_user"]])
             return dict(result) if result else None
     except SQLAlchemyError as e:
         print(f"Error: {e}")
@@ -106,6 +118,7 @@ def delete_pesertakelas(id_pesertakelas):
 
 
 """#=== Peserta ===#"""
+@read_only
 def get_peserta_by_kelas(id_kelas):
     engine = get_connection()
     try:
@@ -123,6 +136,7 @@ def get_peserta_by_kelas(id_kelas):
         print(f"Error: {e}")
         return []
     
+@read_only
 def get_status_batch_peserta(id_user):
     engine = get_connection()
 
@@ -163,6 +177,7 @@ def get_status_batch_peserta(id_user):
         return None
 
 
+@read_only
 def get_status_private_peserta(id_user):
     engine = get_connection()
 
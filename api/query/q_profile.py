@@ -3,6 +3,8 @@ from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from ..utils.config import get_connection, get_wita
+from ..utils.cache import MISSING, get_cached_kelas, membership_cache_key, set_cached_kelas
+from ..utils.pubsub import ensure_listening
 
 
 def get_user_by_id(user_id):
@@ -91,17 +93,48 @@ def change_password(id_user, password_lama, password_baru, konfirmasi_password_b
 def ambil_kelas_saya(id_user, role):
     engine = get_connection()
     try:
+        # Invalidasi keanggotaan datang lewat event cache.catalog (query/q_catalog.py)
+        ensure_listening()
+        cached_kelas = MISSING
+        if role in ("peserta", "mentor"):
+            kelas_key = membership_cache_key(id_user, role)
+            cached_kelas = get_cached_kelas(kelas_key)
+
         with engine.connect() as connection:
-            # Ambil data user dulu
-            user_result = connection.execute(
-                text("""
-                    SELECT id_user, nama, email, no_hp, role, status
-                    FROM users
-                    WHERE id_user = :id_user AND status = 1
-                    LIMIT 1
-                """),
-                {"id_user": id_user}
-            ).mappings().fetchone()
+            if cached_kelas is not MISSING or role not in ("peserta", "mentor"):
+                # Kelas sudah ada di cache (atau role tanpa kelas) → cukup ambil user
+                user_result = connection.execute(
+                    text("""
+                        SELECT id_user, nama, email, no_hp, role, status,
+                               NULL AS id_paketkelas, NULL AS nama_kelas
+                        FROM users
+                        WHERE id_user = :id_user AND status = 1
+                        LIMIT 1
+                    """),
+                    {"id_user": id_user}
+                ).mappings().fetchone()
+            else:
+                # Ambil user + kelas aktif sekaligus
+                relasi_kelas = "mentorkelas" if role == "mentor" else "pesertakelas"
+                user_result = connection.execute(
+                    text(f"""
+                        SELECT u.id_user, u.nama, u.email, u.no_hp, u.role, u.status,
+                               kls.id_paketkelas, kls.nama_kelas
+                        FROM users u
+                        LEFT JOIN LATERAL (
+                            SELECT pk.id_paketkelas, pk.nama_kelas
+                            FROM {relasi_kelas} rk
+                            JOIN paketkelas pk ON rk.id_paketkelas = pk.id_paketkelas
+                            WHERE rk.id_user = u.id_user
+                              AND rk.status = 1
+                              AND pk.status = 1
+                            LIMIT 1
+                        ) kls ON TRUE
+                        WHERE u.id_user = :id_user AND u.status = 1
+                        LIMIT 1
+                    """),
+                    {"id_user": id_user}
+                ).mappings().fetchone()
 
             if not user_result:
                 return None
@@ -116,41 +149,11 @@ def ambil_kelas_saya(id_user, role):
                 "nama_kelas": None
             }
 
-            if role == "peserta":
-                kelas_result = connection.execute(
-                    text("""
-                        SELECT pk.id_paketkelas, pk.nama_kelas
-                        FROM pesertakelas pkls
-                        JOIN paketkelas pk ON pkls.id_paketkelas = pk.id_paketkelas
-                        WHERE pkls.id_user = :id_user
-                          AND pkls.status = 1
-                          AND pk.status = 1
-                        LIMIT 1
-                    """),
-                    {"id_user": id_user}
-                ).mappings().fetchone()
-
-                if kelas_result:
-                    response["id_paketkelas"] = kelas_result["id_paketkelas"]
-                    response["nama_kelas"] = kelas_result["nama_kelas"]
-
-            elif role == "mentor":
-                kelas_result = connection.execute(
-                    text("""
-                        SELECT pk.id_paketkelas, pk.nama_kelas
-                        FROM mentorkelas mk
-                        JOIN paketkelas pk ON mk.id_paketkelas = pk.id_paketkelas
-                        WHERE mk.id_user = :id_user
-                          AND mk.status = 1
-                          AND pk.status = 1
-                        LIMIT 1
-                    """),
-                    {"id_user": id_user}
-                ).mappings().fetchone()
-
-                if kelas_result:
-                    response["id_paketkelas"] = kelas_result["id_paketkelas"]
-                    response["nama_kelas"] = kelas_result["nama_kelas"]
+            if role in ("peserta", "mentor"):
+                if cached_kelas is MISSING:
+                    cached_kelas = (user_result["id_paketkelas"], user_result["nama_kelas"])
+                    set_cached_kelas(kelas_key, *cached_kelas)
+                response["id_paketkelas"], response["nama_kelas"] = cached_kelas
 
             return response
 
@@ -4,6 +4,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.helper import convert_to_html_question, remove_images_from_html, sanitize_html, serialize_row, serialize_row_datetime
 from ..utils.config import CDN_API_KEY, CDN_UPLOAD_URL, get_connection, get_wita
+from ..utils.db_routing import read_only
 
 
 """#=== query helper ===#"""
@@ -126,6 +127,7 @@ def insert_bulk_soaltryout(id_tryout, soal_list, existing_count):
         return False
 
 
+@read_only
 def get_soal_by_tryout(id_tryout):
     engine = get_connection()
 
@@ -195,6 +197,7 @@ def get_soal_by_tryout(id_tryout):
         return None
 
 
+@read_only
 def get_detail_soaltryout(id_soaltryout):
     engine = get_connection()
     try:
@@ -351,6 +354,7 @@ def soft_delete_soaltryout(id_soaltryout: int):
         return False
 
 
+@read_only
 def get_soal_by_id(id_soaltryout: int):
     engine = get_connection()
     try:
@@ -0,0 +1,176 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from .q_tryout import serialize_tryout_list_row
+
+# === Sinkronisasi delta konten aplikasi mobile (materi, modul, tryout) === #
+# Perubahan dideteksi dari kolom updated_at (termasuk soft delete status = 0) pada
+# item, relasi ke kelas, kelas, dan keanggotaan peserta. Watermark baru = waktu
+# mulai sync dikurangi SYNC_OVERLAP_SECONDS: transaksi yang updated_at-nya sudah
+# terisi tapi belum commit (atau belum sampai di replica) tetap terbawa di sync
+# berikutnya. Akibatnya item bisa terkirim dua kali → client cukup upsert per key.
+SYNC_OVERLAP_SECONDS = int(os.getenv("SYNC_OVERLAP_SECONDS", "120"))
+
+# Kelas aktif peserta + kapan keanggotaannya terakhir berubah (kelas baru → semua isinya terkirim)
+KELAS_PESERTA = """
+    kelas AS (
+        SELECT id_paketkelas, MAX(updated_at) AS member_since
+        FROM pesertakelas
+        WHERE id_user = :id_user AND status = 1
+        GROUP BY id_paketkelas
+    )
+"""
+# Sama dengan keanggotaan daftar materi peserta (q_catalog "peserta_batch")
+KELAS_PESERTA_BATCH = """
+    kelas AS (
+        SELECT pkls.id_paketkelas, MAX(GREATEST(pkls.updated_at, ub.updated_at)) AS member_since
+        FROM pesertakelas pkls
+        JOIN paketkelas pk ON pk.id_paketkelas = pkls.id_paketkelas AND pk.status = 1
+        JOIN userbatch ub ON ub.id_user = pkls.id_user AND ub.id_batch = pk.id_batch AND ub.status = 1
+        WHERE pkls.id_user = :id_user AND pkls.status = 1
+        GROUP BY pkls.id_paketkelas
+    )
+"""
+# Kelas yang keanggotaannya berubah sejak watermark tapi tidak aktif lagi → client buang isinya
+REMOVED_KELAS = """
+    WITH {kelas}
+    SELECT DISTINCT pkls.id_paketkelas
+    FROM pesertakelas pkls
+    JOIN paketkelas pk ON pk.id_paketkelas = pkls.id_paketkelas
+    LEFT JOIN userbatch ub ON ub.id_user = pkls.id_user AND ub.id_batch = pk.id_batch
+    WHERE pkls.id_user = :id_user
+      AND GREATEST(pkls.updated_at, pk.updated_at, ub.updated_at) > :since
+      AND pkls.id_paketkelas NOT IN (SELECT id_paketkelas FROM kelas)
+"""
+
+
+def parse_watermark(value):
+    """Watermark dari respons sync sebelumnya (ISO 8601). ValueError jika tidak valid."""
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+
+def _changed_since(since, *columns):
+    if since is None:
+        return ""
+    return f"WHERE GREATEST({', '.join(columns)}) > :since"
+
+
+def _delta(rows, key, serialize, since):
+    """
+    Pisahkan baris menjadi upserted (aktif) & deleted (hanya key).
+    Snapshot penuh (since None) tidak mengirim deleted.
+    """
+    upserted, deleted = [], []
+    for row in rows:
+        row = dict(row)
+        if row.pop("sync_aktif"):
+            upserted.append(serialize(row))
+        elif since is not None:
+            deleted.append({k: row[k] for k in key})
+    return {"upserted": upserted, "deleted": deleted}
+
+
+def _removed_kelas(conn, kelas_cte, id_user, since):
+    if since is None:
+        return []
+    return conn.execute(
+        text(REMOVED_KELAS.format(kelas=kelas_cte)), {"id_user": id_user, "since": since}
+    ).scalars().all()
+
+
+def _sync_materi(conn, id_user, since):
+    # modulkelas diringkas per (kelas, modul): relasi ganda aktif/nonaktif tidak menghasilkan upsert + delete sekaligus
+    rows = conn.execute(text(f"""
+        WITH {KELAS_PESERTA_BATCH},
+        mk AS (
+            SELECT mk.id_paketkelas, mk.id_modul,
+                   bool_or(mk.status = 1) AS aktif, MAX(mk.updated_at) AS updated_at
+            FROM modulkelas mk
+            JOIN kelas k ON k.id_paketkelas = mk.id_paketkelas
+            GROUP BY mk.id_paketkelas, mk.id_modul
+        )
+        SELECT m.id_materi, m.judul, m.tipe_materi, m.url_file, m.is_downloadable,
+               m.id_modul, pk.id_paketkelas, pk.nama_kelas,
+               (mk.aktif AND m.status = 1 AND m.visibility = 'open') AS sync_aktif
+        FROM mk
+        JOIN kelas k ON k.id_paketkelas = mk.id_paketkelas
+        JOIN paketkelas pk ON pk.id_paketkelas = mk.id_paketkelas
+        JOIN modul mo ON mo.id_modul = mk.id_modul
+        JOIN materi m ON m.id_modul = mo.id_modul
+        {_changed_since(since, "m.updated_at", "mk.updated_at", "pk.updated_at", "k.member_since")}
+        ORDER BY mo.created_at ASC, m.id_materi ASC
+    """), {"id_user": id_user, "since": since}).mappings().fetchall()
+    result = _delta(rows, ("id_materi", "id_paketkelas"), dict, since)
+    result["removed_kelas"] = _removed_kelas(conn, KELAS_PESERTA_BATCH, id_user, since)
+    return result
+
+
+def _sync_modul(conn, id_user, since):
+    rows = conn.execute(text(f"""
+        WITH {KELAS_PESERTA},
+        mk AS (
+            SELECT mk.id_paketkelas, mk.id_modul,
+                   bool_or(mk.status = 1) AS aktif, MAX(mk.updated_at) AS updated_at
+            FROM modulkelas mk
+            JOIN kelas k ON k.id_paketkelas = mk.id_paketkelas
+            GROUP BY mk.id_paketkelas, mk.id_modul
+        )
+        SELECT m.id_modul, m.judul, m.deskripsi, m.owner, m.visibility, m.status,
+               pk.id_paketkelas, pk.nama_kelas, pk.deskripsi AS deskripsi_kelas,
+               (mk.aktif AND pk.status = 1 AND m.status = 1 AND m.visibility = 'open') AS sync_aktif
+        FROM mk
+        JOIN kelas k ON k.id_paketkelas = mk.id_paketkelas
+        JOIN paketkelas pk ON pk.id_paketkelas = mk.id_paketkelas
+        JOIN modul m ON m.id_modul = mk.id_modul
+        {_changed_since(since, "m.updated_at", "mk.updated_at", "pk.updated_at", "k.member_since")}
+        ORDER BY m.id_modul, pk.id_paketkelas
+    """), {"id_user": id_user, "since": since}).mappings().fetchall()
+    result = _delta(rows, ("id_modul", "id_paketkelas"), dict, since)
+    result["removed_kelas"] = _removed_kelas(conn, KELAS_PESERTA, id_user, since)
+    return result
+
+
+def _sync_tryout(conn, id_user, since):
+    # Kriteria aktif mengikuti get_tryout_list_by_user (peserta)
+    rows = conn.execute(text(f"""
+        WITH {KELAS_PESERTA}
+        SELECT t.*, tp.id_paketkelas, pk.nama_kelas,
+               (t.status = 1 AND pk.status = 1) AS sync_aktif
+        FROM kelas k
+        JOIN to_paketkelas tp ON tp.id_paketkelas = k.id_paketkelas
+        JOIN paketkelas pk ON pk.id_paketkelas = tp.id_paketkelas
+        JOIN tryout t ON t.id_tryout = tp.id_tryout
+        {_changed_since(since, "t.updated_at", "tp.updated_at", "pk.updated_at", "k.member_since")}
+        ORDER BY t.created_at DESC
+    """), {"id_user": id_user, "since": since}).mappings().fetchall()
+    result = _delta(rows, ("id_tryout", "id_paketkelas"), serialize_tryout_list_row, since)
+    result["removed_kelas"] = _removed_kelas(conn, KELAS_PESERTA, id_user, since)
+    return result
+
+
+@read_only
+def get_mobile_sync(id_user, since=None):
+    """
+    Delta materi, modul & tryout peserta sejak watermark `since` (None = snapshot penuh).
+    Return {full, watermark, materi, modul, tryout} dengan tiap bagian berisi
+    upserted, deleted (key saja) dan removed_kelas; None jika gagal.
+    """
+    watermark = get_wita() - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+    engine = get_connection()
+    try:
+        with engine.connect() as conn:
+            return {
+                "full": since is None,
+                "watermark": watermark.isoformat(),
+                "materi": _sync_materi(conn, id_user, since),
+                "modul": _sync_modul(conn, id_user, since),
+                "tryout": _sync_tryout(conn, id_user, since),
+            }
+    except SQLAlchemyError as e:
+        print(f"[get_mobile_sync] Error: {e}")
+        return None
@@ -6,6 +6,8 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.helper import enrich_datetime_fields, normalize_access_datetime, serialize_datetime_uuid, serialize_row, serialize_value, split_datetime_fields
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from ..utils.metrics import get_counter
 
 
 """#=== query helper ===#"""
@@ -22,7 +24,17 @@ def is_valid_paketkelas(id_paketkelas: int):
         return result is not None
 
 
+def serialize_tryout_list_row(row):
+    """Baris daftar tryout (t.*, id_paketkelas, nama_kelas) → dict siap JSON."""
+    row_dict = dict(row)  # RowMapping → dict
+    # ⬅️ PECAH DATETIME SEBELUM SERIALIZE
+    enrich_datetime_fields(row_dict, "access_start_at")
+    enrich_datetime_fields(row_dict, "access_end_at")
+    return serialize_row(row_dict)
+
+
 """#=== basic CRUD ===#"""
+@read_only
 def get_tryout_list_by_user(id_user: int, role: str):
     engine = get_connection()
     try:
@@ -50,18 +62,12 @@ def get_tryout_list_by_user(id_user: int, role: str):
             else:
                 return []
             
-            processed = []
-            for row in result:
-                row_dict = dict(row)  # RowMapping → dict
-                # ⬅️ PECAH DATETIME SEBELUM SERIALIZE
-                enrich_datetime_fields(row_dict, "access_start_at")
-                enrich_datetime_fields(row_dict, "access_end_at")
-                processed.append(serialize_row(row_dict))
-            return processed
+            return [serialize_tryout_list_row(row) for row in result]
     except SQLAlchemyError as e:
         print(f"[ERROR get_tryout_list_by_user] {e}")
         return []
     
+@read_only
 def get_tryout_by_id(id_tryout: int):
     engine = get_connection()
     try:
@@ -76,6 +82,7 @@ def get_tryout_by_id(id_tryout: int):
         print(f"[ERROR get_tryout_by_id] {e}")
         return None
     
+@read_only
 def get_tryout_list_admin(page=1, limit=20, search=None):
     engine = get_connection()
     offset = (page - 1) * limit
@@ -159,6 +166,7 @@ def get_tryout_list_admin(page=1, limit=20, search=None):
         print(f"[ERROR get_tryout_list_admin] {e}")
         return None
     
+@read_only
 def get_paketkelas_by_tryout(id_tryout):
     engine = get_connection()
 
@@ -747,9 +755,12 @@ def save_tryout_answer(attempt_token: str, id_user: int, nomor_soal: int, jawaba
                 "id_hasiltryout": row["id_hasiltryout"]
             })
 
-            # Kembalikan jawaban_user yang sudah diupdate
-            # return jawaban_user, None
-            return True, None
+        # Dihitung setelah commit: simpan yang di-rollback tidak ikut tercatat
+        get_counter("tryout.answers_saved").inc()
+
+        # Kembalikan jawaban_user yang sudah diupdate
+        # return jawaban_user, None
+        return True, None
 
     except SQLAlchemyError as e:
         print(f"[save_tryout_answer] Error: {e}")
@@ -877,8 +888,8 @@ def submit_tryout_attempt(attempt_token: str, id_user: int):
                 "id_hasiltryout": id_hasiltryout
             })
 
-            # 6) Kembalikan ringkasan
-            return {
+            # 6) Ringkasan
+            hasil = {
                 "id_hasiltryout": id_hasiltryout,
                 "id_tryout": id_tryout,
                 "attempt_ke": row["attempt_ke"],
@@ -888,8 +899,30 @@ def submit_tryout_attempt(attempt_token: str, id_user: int):
                 "kosong": kosong,
                 "ragu_ragu": ragu_ragu,
                 "nilai": nilai
-            }, None
+            }
+
+        # Dihitung setelah commit: submit yang di-rollback tidak ikut tercatat
+        get_counter("tryout.submits").inc()
+        return hasil, None
 
     except SQLAlchemyError as e:
         print(f"[submit_tryout_attempt] Error: {e}")
         return None, "Internal server error"
+
+
+@read_only
+def count_active_attempts():
+    """Jumlah attempt yang sedang dikerjakan (ongoing & belum lewat end_time)."""
+    engine = get_connection()
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("""
+                SELECT COUNT(*)
+                FROM hasiltryout
+                WHERE status = 1
+                  AND status_pengerjaan = 'ongoing'
+                  AND (end_time IS NULL OR end_time > :now)
+            """), {"now": get_wita()}).scalar() or 0
+    except SQLAlchemyError as e:
+        print(f"[count_active_attempts] Error: {e}")
+        return None
@@ -3,7 +3,11 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.helper import serialize_row
 from ..utils.config import get_connection, get_wita
+from ..utils.db_routing import read_only
+from .q_catalog import invalidate_membership
+from .q_validasi import exists
 
+@read_only
 def get_all_userbatch(status_enroll=None):
     engine = get_connection()
     try:
@@ -30,6 +34,7 @@ def get_all_userbatch(status_enroll=None):
         print(f"Error: {e}")
         return []
 
+@read_only
 def get_userbatch_by_id(id_userbatch):
     engine = get_connection()
     try:
@@ -47,28 +52,10 @@ def get_userbatch_by_id(id_userbatch):
         return None
 
 def is_valid_peserta(id_user):
-    engine = get_connection()
-    try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id_user FROM users
-                WHERE id_user = :id AND role = 'peserta' AND status = 1
-            """), {"id": id_user}).scalar()
-            return result is not None
-    except SQLAlchemyError:
-        return False
+    return exists("peserta", id_user=id_user)
 
 def is_valid_batch(id_batch):
-    engine = get_connection()
-    try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id_batch FROM batch
-                WHERE id_batch = :id AND status = 1
-            """), {"id": id_batch}).scalar()
-            return result is not None
-    except SQLAlchemyError:
-        return False
+    return exists("batch", id_batch=id_batch)
 
 def insert_userbatch(payload):
     engine = get_connection()
@@ -83,6 +70,7 @@ def insert_userbatch(payload):
                 **payload,
                 "now": now
             }).mappings().fetchone()
+            invalidate_membership(conn, [payload.get("id_user")])
             return dict(result)
     except SQLAlchemyError as e:
         print(f"Error: {e}")
@@ -92,20 +80,25 @@ def update_userbatch(id_userbatch, payload):
     engine = get_connection()
     try:
         with engine.begin() as conn:
+            # id_user lama diambil di statement yang sama: batch user lama juga berubah
             result = conn.execute(text("""
-                UPDATE userbatch
+                UPDATE userbatch ub
                 SET id_user = :id_user,
                     id_batch = :id_batch,
                     tanggal_join = :tanggal_join,
                     updated_at = :now
-                WHERE id_userbatch = :id AND status = 1
-                RETURNING id_userbatch
+                FROM (SELECT id_userbatch, id_user FROM userbatch WHERE id_userbatch = :id FOR UPDATE) lama
+                WHERE ub.id_userbatch = lama.id_userbatch AND ub.status = 1
+                RETURNING ub.id_userbatch, lama.id_user AS id_user_lama
             """), {
                 **payload,
                 "id": id_userbatch,
                 "now": get_wita()
             }).mappings().fetchone()
-            return dict(result) if result else None
+            if not result:
+                return None
+            invalidate_membership(conn, [result["id_user_lama"], payload.get("id_user")])
+            return {"id_userbatch": result["id_userbatch"]}
     except SQLAlchemyError:
         return None
 
@@ -117,17 +110,21 @@ def delete_userbatch(id_userbatch):
                 UPDATE userbatch
                 SET status = 0, updated_at = :now
                 WHERE id_userbatch = :id AND status = 1
-                RETURNING id_userbatch
+                RETURNING id_userbatch, id_user
             """), {
                 "id": id_userbatch,
                 "now": get_wita()
             }).mappings().fetchone()
-            return dict(result) if result else None
+            if not result:
+                return None
+            invalidate_membership(conn, [result["id_user"]])
+            return {"id_userbatch": result["id_userbatch"]}
     except SQLAlchemyError:
         return None
 
 
 """#=== Peserta ===#"""
+@read_only
 def get_peserta_by_batch(id_batch):
     engine = get_connection()
     try:
@@ -183,6 +180,7 @@ def insert_userbatch_enroll(id_user, id_batch):
                 "created_at": now,
                 "updated_at": now
             }).mappings().fetchone()
+            invalidate_membership(conn, [id_user])
 
             return dict(result)
 
@@ -0,0 +1,105 @@
+import re
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..utils.config import get_connection
+
+
+"""#=== daftar cek keberadaan ===#"""
+# nama_cek: (kondisi EXISTS, nama parameter). Parameter diberi prefix unik saat digabung.
+EXISTENCE_CHECKS = {
+    "batch": ("""
+        SELECT 1 FROM batch WHERE id_batch = :id_batch AND status = 1
+    """, ("id_batch",)),
+    "paketkelas": ("""
+        SELECT 1 FROM paketkelas WHERE id_paketkelas = :id_paketkelas AND status = 1
+    """, ("id_paketkelas",)),
+    "modul": ("""
+        SELECT 1 FROM modul WHERE id_modul = :id_modul AND status = 1
+    """, ("id_modul",)),
+    "peserta": ("""
+        SELECT 1 FROM users WHERE id_user = :id_user AND role = 'peserta' AND status = 1
+    """, ("id_user",)),
+    "mentor": ("""
+        SELECT 1 FROM users WHERE id_user = :id_user AND role = 'mentor' AND status = 1
+    """, ("id_user",)),
+    "mentor_of_kelas": ("""
+        SELECT 1 FROM mentorkelas
+        WHERE id_user = :id_mentor AND id_paketkelas = :id_paketkelas AND status = 1
+    """, ("id_mentor", "id_paketkelas")),
+    "parent_komentar": ("""
+        SELECT 1 FROM komentarmateri
+        WHERE id_komentarmateri = :parent_id AND id_materi = :id_materi AND status = 1
+    """, ("id_materi", "parent_id")),
+    "akses_materi_mentor": ("""
+        SELECT 1
+        FROM materi m
+        JOIN modul mo ON m.id_modul = mo.id_modul
+        JOIN modulkelas mkls ON mo.id_modul = mkls.id_modul
+        JOIN paketkelas pk ON mkls.id_paketkelas = pk.id_paketkelas
+        JOIN mentorkelas mk ON pk.id_paketkelas = mk.id_paketkelas
+        WHERE mk.id_user = :id_user
+          AND pk.id_paketkelas = :id_paketkelas
+          AND m.id_materi = :id_materi
+          AND m.status = 1
+          AND mk.status = 1
+          AND mkls.status = 1
+    """, ("id_user", "id_materi", "id_paketkelas")),
+    "akses_materi_peserta": ("""
+        SELECT 1
+        FROM materi m
+        JOIN modul mo ON m.id_modul = mo.id_modul
+        JOIN modulkelas mkls ON mo.id_modul = mkls.id_modul
+        JOIN paketkelas pk ON mkls.id_paketkelas = pk.id_paketkelas
+        JOIN pesertakelas ps ON pk.id_paketkelas = ps.id_paketkelas
+        WHERE ps.id_user = :id_user
+          AND pk.id_paketkelas = :id_paketkelas
+          AND m.id_materi = :id_materi
+          AND m.status = 1
+          AND ps.status = 1
+          AND mkls.status = 1
+    """, ("id_user", "id_materi", "id_paketkelas")),
+}
+
+
+def check_exists(checks):
+    """
+    Validasi banyak id sekaligus dalam satu query.
+    checks: {"label": ("nama_cek", {param: nilai})}, contoh:
+        check_exists({
+            "peserta": ("peserta", {"id_user": 5}),
+            "batch": ("batch", {"id_batch": 2}),
+        })
+    Return {"label": bool}. Jika query gagal semua dianggap False.
+    """
+    if not checks:
+        return {}
+
+    columns, params = [], {}
+    for i, (label, (nama_cek, values)) in enumerate(checks.items()):
+        sql, param_names = EXISTENCE_CHECKS[nama_cek]
+        for name in param_names:
+            sql = re.sub(rf":{name}\b", f":c{i}_{name}", sql)
+            params[f"c{i}_{name}"] = values[name]
+        columns.append(f"EXISTS ({sql}) AS c{i}")
+
+    engine = get_connection()
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(text("SELECT " + ",\n".join(columns)), params).fetchone()
+    except SQLAlchemyError as e:
+        print(f"[check_exists] Error: {e}")
+        return {label: False for label in checks}
+    return {label: bool(row[i]) for i, label in enumerate(checks)}
+
+
+def exists(nama_cek, **values):
+    """Satu cek saja, contoh: exists("batch", id_batch=2)."""
+    return check_exists({nama_cek: (nama_cek, values)})[nama_cek]
+
+
+def first_missing(checks):
+    """Label pertama (urutan dict) yang tidak lolos cek, atau None jika semua valid."""
+    result = check_exists(checks)
+    return next((label for label in checks if not result[label]), None)
@@ -0,0 +1,122 @@
+import json
+import os
+import sys
+import threading
+import time
+
+from flask import Response, request
+from flask_jwt_extended import jwt_required
+from flask_restx import Namespace, Resource
+
+from .query.q_materi import is_user_have_access_to_materi
+from .utils.pubsub import subscribe
+from .utils.request_context import get_request_context
+
+
+realtime_ns = Namespace('realtime', description='Push event forum & komentar materi (Server-Sent Events)')
+
+SSE_HEARTBEAT_SECONDS = int(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# Koneksi ditutup berkala agar worker tidak tertahan selamanya; EventSource reconnect otomatis
+SSE_MAX_SECONDS = int(os.getenv("SSE_MAX_SECONDS", "300"))
+SSE_MAX_THREADS = 20
+# Setiap stream menahan satu thread/greenlet worker sampai SSE_MAX_SECONDS. Batas per proses
+# menjaga sisa thread untuk endpoint lain; stream ke-(N+1) ditolak 503 dan EventSource retry.
+# Butuh worker threaded (gunicorn --worker-class gthread --threads T, dengan
+# SSE_MAX_STREAMS < T) atau gevent; di worker sync satu stream memblokir seluruh worker,
+# jadi stream ditolak di sana (lihat _stream_supported).
+SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", "8"))
+SSE_RETRY_AFTER = int(os.getenv("SSE_RETRY_AFTER", "10"))
+
+_stream_slots = threading.BoundedSemaphore(max(1, SSE_MAX_STREAMS))
+_warned_sync_worker = False
+
+stream_parser = realtime_ns.parser()
+stream_parser.add_argument('id_thread', type=int, action='append', required=False, help='Thread forum yang diikuti (boleh berulang)')
+stream_parser.add_argument('id_materi', type=int, required=False, help='Materi yang komentarnya diikuti')
+stream_parser.add_argument('id_paketkelas', type=int, required=False, help='Paket kelas materi (wajib bersama id_materi)')
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n"
+
+
+def _event_stream(topics):
+    """
+    Generator SSE. Tidak memakai stream_with_context: request (dan koneksi DB
+    unit of work) sudah selesai sebelum stream berjalan.
+    Subscribe di dalam generator agar selalu dilepas saat client putus (GeneratorExit).
+    """
+    deadline = time.monotonic() + SSE_MAX_SECONDS
+    with subscribe(topics) as sub:
+        yield f"retry: 3000\n{_sse('ready', {'topics': sorted(sub.topics)})}"
+        while time.monotonic() < deadline:
+            item = sub.get(timeout=SSE_HEARTBEAT_SECONDS)
+            if sub.dropped:
+                # Event terlewat karena antrian penuh → client sebaiknya fetch ulang
+                yield _sse('reset', {})
+                return
+            if item is None:
+                yield ": ping\n\n"
+                continue
+            topic, data = item
+            yield _sse(data.get('type', 'message'), {'topic': topic, **data})
+
+
+def _gevent_patched():
+    # Worker gevent sudah mem-patch socket sebelum aplikasi dimuat; tanpa gevent modul ini tidak ada
+    monkey = sys.modules.get("gevent.monkey")
+    return bool(monkey and monkey.is_module_patched("socket"))
+
+
+def _stream_supported():
+    """Worker threaded (wsgi.multithread) atau gevent; worker sync tidak boleh menahan stream."""
+    global _warned_sync_worker
+    if request.environ.get("wsgi.multithread") or _gevent_patched():
+        return True
+    if not _warned_sync_worker:
+        _warned_sync_worker = True
+        print("[realtime] Worker sync terdeteksi: stream SSE dinonaktifkan, pakai worker gthread/gevent")
+    return False
+
+
+@realtime_ns.route('/stream')
+class RealtimeStreamResource(Resource):
+    @realtime_ns.expect(stream_parser)
+    @jwt_required()
+    def get(self):
+        """
+        Akses: (mahasiswa, mentor, admin)
+        Stream SSE berisi delta: komentar baru, vote, solved (per thread),
+        komentar materi baru (per materi & paket kelas), dan notifikasi milik user
+        """
+        args = stream_parser.parse_args()
+        ctx = get_request_context()
+
+        topics = {f"user.{ctx.id_user}"}
+        id_threads = args.get('id_thread') or []
+        if len(id_threads) > SSE_MAX_THREADS:
+            return {'status': 'error', 'message': f'Maksimal {SSE_MAX_THREADS} thread per stream'}, 400
+        topics.update(f"forum.thread.{id_thread}" for id_thread in id_threads)
+
+        id_materi, id_paketkelas = args.get('id_materi'), args.get('id_paketkelas')
+        if id_materi or id_paketkelas:
+            if not (id_materi and id_paketkelas):
+                return {'status': 'error', 'message': 'id_materi dan id_paketkelas wajib diisi bersamaan'}, 400
+            if not ctx.is_admin and not is_user_have_access_to_materi(ctx.id_user, id_materi, ctx.role, id_paketkelas):
+                return {'status': 'error', 'message': 'Akses ditolak.'}, 403
+            topics.add(f"materi.{id_materi}.{id_paketkelas}")
+
+        retry = {'Retry-After': str(SSE_RETRY_AFTER)}
+        if not _stream_supported():
+            return {'status': 'error', 'message': 'Realtime tidak tersedia di server ini'}, 503, retry
+        if not _stream_slots.acquire(blocking=False):
+            return {'status': 'error', 'message': 'Realtime sedang penuh, coba lagi'}, 503, retry
+
+        response = Response(
+            _event_stream(topics),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        # Dipanggil server WSGI saat stream selesai / client putus (juga jika generator belum jalan)
+        response.call_on_close(_stream_slots.release)
+        return response
@@ -1,5 +1,4 @@
 import requests
-import pandas as pd
 from flask import request
 from flask_restx import Namespace, Resource, reqparse, fields
 from flask_restx.reqparse import FileStorage
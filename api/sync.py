@@ -0,0 +1,38 @@
+from flask_jwt_extended import jwt_required
+from flask_restx import Namespace, Resource
+
+from .query.q_sync import get_mobile_sync, parse_watermark
+from .utils.decorator import role_required, session_required
+from .utils.request_context import get_request_context
+
+
+sync_ns = Namespace("sync", description="Sinkronisasi delta konten (materi, modul, tryout) untuk aplikasi mobile")
+
+sync_parser = sync_ns.parser()
+sync_parser.add_argument("since", type=str, required=False, help="watermark dari respons sync sebelumnya; kosong = snapshot penuh")
+
+
+@sync_ns.route('/mobile')
+class MobileSyncResource(Resource):
+    @sync_ns.expect(sync_parser)
+    @session_required
+    @jwt_required()
+    @role_required('peserta')
+    def get(self):
+        """
+        Akses: (peserta), Perubahan materi, modul & tryout sejak `since`.
+        Tiap bagian berisi upserted (item baru/berubah), deleted (key item yang dihapus/disembunyikan)
+        dan removed_kelas (kelas yang tidak lagi diikuti). Simpan `watermark` untuk sync berikutnya.
+        """
+        args = sync_parser.parse_args()
+        since = None
+        if args.get("since"):
+            try:
+                since = parse_watermark(args["since"])
+            except ValueError:
+                return {"status": "error", "message": "Watermark tidak valid"}, 400
+
+        result = get_mobile_sync(get_request_context().id_user, since)
+        if result is None:
+            return {"status": "error", "message": "Gagal mengambil data sinkronisasi"}, 500
+        return {"status": "success", **result}, 200
@@ -8,6 +8,7 @@ from .utils.decorator import role_required, session_required
 from .utils.helper import is_valid_date
 from .query.q_batch import get_batch_by_id
 from .query.q_userbatch import *
+from .query.q_validasi import first_missing
 
 userbatch_ns = Namespace("userbatch", description="Manajemen pendaftaran peserta ke batch")
 
@@ -46,9 +47,13 @@ class UserBatchListResource(Resource):
         """Akses: (admin), Tambah peserta ke batch"""
         payload = request.get_json()
 
-        if not is_valid_peserta(payload["id_user"]): # Validasi peserta
+        invalid = first_missing({ # Validasi peserta & batch dalam satu query
+            "peserta": ("peserta", {"id_user": payload["id_user"]}),
+            "batch": ("batch", {"id_batch": payload["id_batch"]})
+        })
+        if invalid == "peserta":
             return {"status": "error", "message": "Peserta tidak ditemukan"}, 400
-        if not is_valid_batch(payload["id_batch"]): # Validasi batch
+        if invalid == "batch":
             return {"status": "error", "message": "Batch tidak ditemukan"}, 400
         if not is_valid_date(payload.get("tanggal_join", "")): # Validasi format tanggal
             return {"status": "error", "message": "Format tanggal_join tidak valid (YYYY-MM-DD)"}, 400
@@ -91,9 +96,13 @@ class UserBatchDetailResource(Resource):
             "tanggal_join": data.get("tanggal_join", old["tanggal_join"])
         }
 
-        if not is_valid_peserta(updated["id_user"]):
+        invalid = first_missing({
+            "peserta": ("peserta", {"id_user": updated["id_user"]}),
+            "batch": ("batch", {"id_batch": updated["id_batch"]})
+        })
+        if invalid == "peserta":
             return {"status": "error", "message": "Peserta tidak valid"}, 400
-        if not is_valid_batch(updated["id_batch"]):
+        if invalid == "batch":
             return {"status": "error", "message": "Batch tidak ditemukan"}, 400
 
         try:
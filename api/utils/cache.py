@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Cache in-memory sederhana (per worker) dengan masa berlaku per entry.
+    Dipakai untuk data yang sering dibaca tapi jarang berubah.
+    """
+
+    def __init__(self, ttl_seconds, max_entries=10000):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            with self._lock:
+                self._data.pop(key, None)
+            return default
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                self._evict_expired()
+                if len(self._data) >= self.max_entries:
+                    # Masih penuh → buang entry paling lama dimasukkan
+                    self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (exp, _) in self._data.items() if exp < now]:
+            del self._data[key]
+
+
+class CacheVersions:
+    """
+    Versi per scope (mis. satu materi+kelas). Key cache menyertakan versi saat ini,
+    invalidasi cukup menaikkan versi: semua entry lama otomatis tidak terpakai lagi
+    tanpa perlu tahu key/varian apa saja yang pernah disimpan.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def current(self, scope):
+        return self._versions.get(scope, 0)
+
+    def bump(self, scope):
+        with self._lock:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+
+
+# === Cache keanggotaan kelas (dipakai login, /profile/kelas-saya & query/q_catalog.py) === #
+# Key menyertakan versi per user (lihat CacheVersions): hasil query yang kalah balapan dengan
+# invalidasi tersimpan di versi lama dan tidak pernah dibaca lagi.
+MISSING = object()
+membership_cache = TTLCache(int(os.getenv("MEMBERSHIP_CACHE_TTL", "60")))
+_membership_versions = CacheVersions()
+_SEMUA_USER = "semua"
+
+
+def membership_cache_key(id_user, kind):
+    """
+    Key cache keanggotaan; ambil SEBELUM query ke DB.
+    kind: role ("peserta" / "mentor") untuk kelas aktif, atau ("katalog", akses) untuk q_catalog.
+    """
+    id_user = int(id_user)
+    return (id_user, kind, _membership_versions.current(id_user))
+
+
+def membership_epoch():
+    """
+    Versi gabungan semua user, untuk pembaca yang baru tahu id_user setelah query (login):
+    simpan ke cache hanya jika nilainya tidak berubah sejak sebelum query.
+    """
+    return _membership_versions.current(_SEMUA_USER)
+
+
+def get_cached_kelas(key):
+    """Return (id_paketkelas, nama_kelas) dari cache, atau MISSING jika belum ada."""
+    return membership_cache.get(key, MISSING)
+
+
+def set_cached_kelas(key, id_paketkelas, nama_kelas):
+    membership_cache.set(key, (id_paketkelas, nama_kelas))
+
+
+def invalidate_kelas_user(id_user):
+    """Naikkan versi keanggotaan user (lewat event q_catalog.invalidate_membership setelah commit)."""
+    if id_user is None:
+        return
+    _membership_versions.bump(int(id_user))
+    _membership_versions.bump(_SEMUA_USER)
+
+
+# === Cache session (dipakai RequestContext / session_required) === #
+# 0 = nonaktif: session dicek ke DB tiap request (login di device lain langsung berlaku)
+SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", "0"))
+session_cache = TTLCache(SESSION_CACHE_TTL)
+
+
+def invalidate_session(id_user, device_type):
+    session_cache.delete((int(id_user), device_type))
+
+
+# === Cache halaman pertama komentar materi (per worker) === #
+# Invalidasi dikirim lewat pubsub setelah commit (query/q_komentarmateri.py) → berlaku di
+# semua worker jika PUBSUB_BACKPLANE=postgres; tanpa backplane worker lain basi maks. TTL ini
+KOMENTAR_CACHE_TTL = int(os.getenv("KOMENTAR_CACHE_TTL", "10"))
+komentar_cache = TTLCache(KOMENTAR_CACHE_TTL, max_entries=2000)
+_komentar_versions = CacheVersions()
+
+
+def komentar_cache_key(id_materi, id_paketkelas, variant):
+    """
+    Key cache halaman pertama komentar; ambil SEBELUM query ke DB agar hasil query yang
+    kalah balapan dengan invalidasi tersimpan di versi lama (tidak pernah dibaca lagi).
+    variant: parameter halaman (limit, jumlah balasan).
+    """
+    scope = (int(id_materi), int(id_paketkelas))
+    return scope + (_komentar_versions.current(scope), variant)
+
+
+def invalidate_komentar_materi(id_materi, id_paketkelas):
+    if id_materi is None or id_paketkelas is None:
+        return
+    _komentar_versions.bump((int(id_materi), int(id_paketkelas)))
+
+
+# === Cache katalog konten per paket kelas / mentorship (lihat query/q_catalog.py) === #
+# Invalidasi dikirim lewat pubsub setelah commit → berlaku di semua worker jika
+# PUBSUB_BACKPLANE=postgres; tanpa backplane worker lain basi maks. TTL ini
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "60"))
+catalog_cache = TTLCache(CATALOG_CACHE_TTL, max_entries=5000)
+_catalog_versions = CacheVersions()
+
+
+def catalog_cache_key(kind, scope, ident):
+    """kind: jenis katalog ("materi", "modul", ...); scope: ("kelas" | "mentorship"). Ambil sebelum query."""
+    key = (scope, int(ident))
+    return (kind,) + key + (_catalog_versions.current(key),)
+
+
+def invalidate_catalog(scope, idents):
+    for ident in idents or ():
+        if ident is not None:
+            _catalog_versions.bump((scope, int(ident)))
@@ -0,0 +1,103 @@
+import gzip
+import os
+import zlib
+
+from flask import request
+
+from .metrics import get_counter
+
+try:
+    import brotli  # opsional, tidak ada di requirements.txt
+except ImportError:
+    brotli = None
+
+# === Konfigurasi kompresi response === #
+COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "True") == "True"
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))    # byte; di bawah ini tidak dikompres
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+COMPRESS_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/plain",
+    "text/html",
+}
+
+
+def _choose_encoding():
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    # best_match menghormati q-value, mis. "gzip;q=1.0, br;q=0"
+    return request.accept_encodings.best_match(supported)
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL)
+
+
+def _compress_stream(chunks, encoding):
+    """Kompres response streaming per chunk (flush tiap chunk agar client bisa langsung parse)."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = format gzip
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _after_request(response):
+    if (
+        request.method == "HEAD"
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESS_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _choose_encoding()
+    if not encoding:
+        return response
+
+    if response.is_streamed:
+        if response.direct_passthrough:
+            return response  # send_file dsb. dibiarkan apa adanya
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+        response.headers["Content-Encoding"] = encoding
+        get_counter("http.compressed", labels={"encoding": encoding, "mode": "stream"}).inc()
+        return response
+
+    if response.direct_passthrough:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    compressed = _compress(data, encoding)
+    if len(compressed) >= len(data):
+        return response
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    get_counter("http.compressed", labels={"encoding": encoding, "mode": "buffer"}).inc()
+    get_counter("http.compressed_bytes_saved").inc(len(data) - len(compressed))
+    return response
+
+
+def init_compression(app):
+    """Kompresi gzip/brotli sesuai Accept-Encoding untuk response JSON/teks yang cukup besar."""
+    if COMPRESS_ENABLED:
+        app.after_request(_after_request)
@@ -4,6 +4,10 @@ from datetime import datetime
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 
+from .db_instrumentation import TimedQueuePool, instrument_engine
+from .db_routing import is_read_only
+from .unit_of_work import shared
+
 
 load_dotenv()
 
@@ -12,6 +16,11 @@ CDN_UPLOAD_URL = os.getenv("CDN_UPLOAD_URL")
 CDN_API_KEY = os.getenv("CDN_API_KEY")
 
 
+# === Konfigurasi Email Massal === #
+MAIL_POOL_SIZE = int(os.getenv("MAIL_POOL_SIZE", "3"))            # koneksi SMTP paralel maksimum
+MAIL_MAX_JOBS_TERSIMPAN = int(os.getenv("MAIL_MAX_JOBS_TERSIMPAN", "50"))
+
+
 # === Konfigurasi Database === #
 host = os.getenv("DB_HOST", "localhost")
 port = os.getenv("DB_PORT", "5432")
@@ -19,20 +28,80 @@ dbname = os.getenv("DB_NAME")
 username = os.getenv("DB_USER")
 password = os.getenv("DB_PASS")
 
-DATABASE_URL = f'postgresql+psycopg2://{username}:{password}@{host}:{port}/{dbname}'
+# DATABASE_URL bisa di-override langsung (mis. sqlite:///lokal.db untuk stand-in lokal)
+DATABASE_URL = os.getenv("DATABASE_URL") or f'postgresql+psycopg2://{username}:{password}@{host}:{port}/{dbname}'
 
-# ⛽️ Engine dibuat sekali dan dipakai ulang (pool aman)
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=10,
-    max_overflow=5,
-    pool_timeout=30,
-    pool_recycle=1800,
-    pool_pre_ping=True  # opsional tapi direkomendasikan
+# Replica read-only (opsional). Kosong → semua query ke primary
+replica_host = os.getenv("DB_REPLICA_HOST")
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or (
+    f'postgresql+psycopg2://{os.getenv("DB_REPLICA_USER", username)}:{os.getenv("DB_REPLICA_PASS", password)}'
+    f'@{replica_host}:{os.getenv("DB_REPLICA_PORT", port)}/{os.getenv("DB_REPLICA_NAME", dbname)}'
+    if replica_host else None
 )
 
+# Ukuran pool per worker. Jika DB_MAX_CONNECTIONS diisi, jatah koneksi dibagi rata
+# ke WEB_CONCURRENCY worker (gunicorn) supaya total tidak melebihi max_connections server
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "0"))
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+_pool_default = max(2, DB_MAX_CONNECTIONS // WEB_CONCURRENCY) if DB_MAX_CONNECTIONS else 10
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(_pool_default)))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "0" if DB_MAX_CONNECTIONS else "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Pre-ping = 1 round trip tambahan tiap checkout. Default mati: koneksi putus dideteksi
+# lewat TCP keepalive + invalidasi pool otomatis saat error disconnect (lihat handle_error)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "False") == "True"
+DB_TCP_KEEPALIVE_IDLE = int(os.getenv("DB_TCP_KEEPALIVE_IDLE", "60"))
+
+
+def _build_engine(url, role):
+    options = {
+        "poolclass": TimedQueuePool,  # catat waktu tunggu checkout pool
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING
+    }
+    if url.startswith("postgresql"):
+        options["connect_args"] = {
+            "keepalives": 1,
+            "keepalives_idle": DB_TCP_KEEPALIVE_IDLE,
+            "keepalives_interval": 10,
+            "keepalives_count": 3
+        }
+    new_engine = create_engine(url, **options)
+    return instrument_engine(new_engine, role=role)  # latency, rows, slow query per fungsi q_*
+
+
+# ⛽️ Engine dibuat sekali dan dipakai ulang (pool aman)
+engine = _build_engine(DATABASE_URL, "primary")
+replica_engine = _build_engine(DATABASE_REPLICA_URL, "replica") if DATABASE_REPLICA_URL else None
+
+
+def _dispose_after_fork():
+    # gunicorn --preload: koneksi milik parent jangan dipakai bersama oleh worker
+    engine.dispose(close=False)
+    if replica_engine is not None:
+        replica_engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_after_fork)
+
+
 def get_connection():
-    return engine
+    """
+    Engine primary; di dalam fungsi @read_only otomatis ke replica jika tersedia.
+    Selama request, connect()/begin() memakai satu koneksi bersama (lihat unit_of_work).
+    """
+    if replica_engine is not None and is_read_only():
+        return shared(replica_engine)
+    return shared(engine)
+
+
+def get_read_connection():
+    return shared(replica_engine if replica_engine is not None else engine)
 
 # === Mencari Timestamp WITA === #
 def get_wita():
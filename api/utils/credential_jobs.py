@@ -0,0 +1,80 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from .config import MAIL_POOL_SIZE
+from .mailer import compile_kredensial_template, send_kredensial_batch
+from ..query.q_credential_job import (
+    catat_hasil_credential_job, get_credential_job_by_id, insert_credential_job, update_credential_job_status
+)
+
+# Progress job disimpan di database (query/q_credential_job.py): request poll bisa
+# dilayani worker gunicorn mana pun, bukan hanya worker yang menjalankan thread job.
+# Hasil per penerima ditulis per kelompok kecil agar tidak satu UPDATE per email.
+CATAT_HASIL_SETIAP = 20
+
+# Batasi total koneksi SMTP yang terbuka bersamaan lintas job
+_smtp_slots = threading.BoundedSemaphore(MAIL_POOL_SIZE)
+
+
+def _kirim_chunk(app, id_job, template, chunk):
+    hasil = []
+
+    def on_result(id_user, sukses, error):
+        hasil.append((id_user, sukses, error))
+        if len(hasil) >= CATAT_HASIL_SETIAP:
+            catat_hasil_credential_job(id_job, hasil)
+            hasil.clear()
+
+    try:
+        with _smtp_slots, app.app_context():
+            send_kredensial_batch(template, chunk, on_result)
+    finally:
+        catat_hasil_credential_job(id_job, hasil)
+
+
+def _jalankan_job(app, id_job, penerima_list):
+    update_credential_job_status(id_job, "berjalan")
+    # Template di-compile sekali untuk seluruh batch
+    template = compile_kredensial_template()
+
+    # Bagi penerima ke beberapa chunk, satu chunk = satu koneksi SMTP
+    jumlah_worker = max(1, min(MAIL_POOL_SIZE, len(penerima_list)))
+    chunks = [penerima_list[i::jumlah_worker] for i in range(jumlah_worker)]
+
+    status = "selesai"
+    try:
+        with ThreadPoolExecutor(max_workers=jumlah_worker) as executor:
+            futures = [executor.submit(_kirim_chunk, app, id_job, template, c) for c in chunks]
+            for f in futures:
+                f.result()
+    except Exception as e:
+        print(f"[credential_jobs] Job {id_job} error: {e}")
+        status = "error"
+    finally:
+        update_credential_job_status(id_job, status, selesai=True)
+
+
+def start_credential_job(penerima_list):
+    """
+    Mulai job pengiriman kredensial untuk hasil satu import roster.
+    penerima_list: list dict {id_user, nama, email, password_awal, kode_pemulihan, nama_kelas}
+    Return id_job yang bisa di-poll lewat get_credential_job(), atau None jika job gagal disimpan.
+    """
+    id_job = uuid.uuid4().hex
+    if not insert_credential_job(id_job, penerima_list):
+        return None
+
+    app = current_app._get_current_object()
+    threading.Thread(
+        target=_jalankan_job, args=(app, id_job, list(penerima_list)), daemon=True
+    ).start()
+
+    return id_job
+
+
+def get_credential_job(id_job, include_detail=True):
+    """Snapshot progress job; None jika job tidak ditemukan."""
+    return get_credential_job_by_id(id_job, include_detail=include_detail)
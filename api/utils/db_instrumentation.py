@@ -0,0 +1,134 @@
+import logging
+import os
+import re
+import sys
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from .metrics import get_counter, get_gauge, get_histogram, register_collector
+from .request_timing import add_stage_time
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SQL_LOG_MAX_CHARS = int(os.getenv("SQL_LOG_MAX_CHARS", "1000"))
+
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+logger = logging.getLogger("api.sql")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool yang mencatat lama menunggu checkout koneksi dari pool & jumlah timeout."""
+
+    metrics_role = "primary"
+
+    def _do_get(self):
+        labels = {"db": self.metrics_role}
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            get_counter("db.pool_timeouts", labels=labels).inc()
+            raise
+        finally:
+            get_histogram("db.pool_wait_ms", labels=labels).observe((time.perf_counter() - start) * 1000)
+
+    def recreate(self):
+        # engine.dispose() membuat pool baru → role harus ikut terbawa
+        pool = super().recreate()
+        pool.metrics_role = self.metrics_role
+        return pool
+
+
+def find_query_caller(max_depth=40):
+    """Cari fungsi q_* yang memicu query, contoh: 'q_forum.get_all_forum_thread'."""
+    frame = sys._getframe(2)
+    depth = 0
+    while frame is not None and depth < max_depth:
+        module = frame.f_globals.get("__name__", "")
+        if ".query.q_" in module:
+            return f"{module.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+        depth += 1
+    return "lainnya"
+
+
+def redact_params(parameters):
+    """Hanya tampilkan nama & tipe parameter, nilainya tidak pernah ditulis ke log."""
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {"executemany": len(parameters), "contoh": redact_params(parameters[0])}
+        return [type(v).__name__ for v in parameters]
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+    caller = find_query_caller()
+    rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else 0
+
+    get_histogram("db.query_ms", labels={"fn": caller}).observe(elapsed_ms)
+    get_histogram("db.rows", ROW_BUCKETS, labels={"fn": caller}).observe(rows)
+    add_stage_time("db", elapsed_ms)
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        get_counter("db.slow_queries", labels={"fn": caller}).inc()
+        logger.warning(
+            "Slow query %.1f ms (%s rows) di %s: %s | params=%s",
+            elapsed_ms, rows, caller,
+            _WHITESPACE.sub(" ", statement).strip()[:SQL_LOG_MAX_CHARS],
+            redact_params(parameters)
+        )
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+    caller = find_query_caller()
+    get_counter("db.errors", labels={"fn": caller}).inc()
+    if exception_context.is_disconnect:
+        # SQLAlchemy meng-invalidate koneksi ini + semua koneksi lama di pool,
+        # checkout berikutnya otomatis membuka koneksi baru (pengganti pre-ping)
+        get_counter("db.disconnects").inc()
+    logger.error("Query error di %s: %s", caller, exception_context.original_exception)
+
+
+def _pool_counter(name, labels):
+    def listener(*args):
+        get_counter(name, labels=labels).inc()
+    return listener
+
+
+def _collect_pool_gauges(engine, labels):
+    def collect():
+        # engine.pool dibaca ulang tiap kali karena bisa diganti oleh dispose()
+        pool = engine.pool
+        get_gauge("db.pool_size", labels=labels).set(pool.size())
+        get_gauge("db.pool_checked_out", labels=labels).set(pool.checkedout())
+        get_gauge("db.pool_overflow", labels=labels).set(max(0, pool.overflow()))
+    return collect
+
+
+def instrument_engine(engine, role="primary"):
+    """Pasang pencatat latency, jumlah row, slow query, error & statistik pool ke engine."""
+    labels = {"db": role}
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.metrics_role = role
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    event.listen(engine.pool, "checkout", _pool_counter("db.pool_checkouts", labels))
+    event.listen(engine.pool, "connect", _pool_counter("db.pool_connects", labels))
+    register_collector(_collect_pool_gauges(engine, labels))
+    return engine
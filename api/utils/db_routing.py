@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# True selama fungsi bertanda @read_only berjalan → get_connection() boleh memilih replica
+_read_only = ContextVar("db_read_only", default=False)
+# True selama blok use_primary() → paksa primary (read-your-writes)
+_force_primary = ContextVar("db_force_primary", default=False)
+
+
+def is_read_only():
+    return _read_only.get() and not _force_primary.get()
+
+
+def read_only(fn):
+    """
+    Tandai fungsi q_* yang hanya SELECT. Di dalamnya get_connection()
+    mengembalikan engine replica (jika DB_REPLICA_* / DATABASE_REPLICA_URL diisi).
+    """
+    @wraps(fn)
+    def decorator(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return decorator
+
+
+@contextmanager
+def use_primary():
+    """Paksa semua query di dalam blok ke primary, mis. membaca data yang baru saja ditulis."""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
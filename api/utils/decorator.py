@@ -1,8 +1,7 @@
 from functools import wraps
-from sqlalchemy import text
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request, get_jwt
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
 
-from .config import get_connection
+from .request_context import get_request_context
 
 def role_required(expected_roles):
     def wrapper(fn):
@@ -27,39 +26,13 @@ def role_required(expected_roles):
 def session_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        # Step 1: Verify JWT
-        verify_jwt_in_request()
-        claims = get_jwt()
-        user_id = get_jwt_identity()
-        role = claims.get("role")
+        # Step 1: Verify JWT (sekali per request, hasilnya dipakai ulang handler)
+        ctx = get_request_context()
 
         # Step 2: Jika role peserta → validasi session
-        if role == "peserta":
-            session_id = claims.get("session_id")
-            device_type = claims.get("device_type")
-
-            engine = get_connection()
-            with engine.connect() as connection:
-                result = connection.execute(
-                    text("""
-                        SELECT id_session 
-                        FROM sessions 
-                        WHERE id_user = :user_id 
-                          AND session_id = :session_id 
-                          AND device_type = :device_type
-                          AND status = 1
-                        LIMIT 1
-                    """),
-                    {
-                        "user_id": user_id,
-                        "session_id": session_id,
-                        "device_type": device_type
-                    }
-                ).fetchone()
-
-            if not result:
-                return {"message": "Session invalid or expired"}, 401
+        if ctx.is_peserta and not ctx.check_session():
+            return {"message": "Session invalid or expired"}, 401
 
         # Kalau role bukan peserta → skip validasi session
         return fn(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
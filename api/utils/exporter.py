@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import pandas as pd
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+# === Export laporan (Excel / PDF) === #
+# pandas & reportlab berat di-import (ratusan ms, puluhan MB per worker), jadi modul ini
+# hanya di-import di dalam handler export, bukan saat aplikasi dimuat.
+
+
+def generate_excel_hasiltryout(id_tryout: int, data: list):
+    df = pd.DataFrame(data)
+
+    temp_path = f"/tmp/export_tryout_{id_tryout}_{datetime.now().timestamp()}.xlsx"
+    df.to_excel(temp_path, index=False)
+
+    return temp_path
+
+
+def generate_pdf_hasiltryout(id_tryout: int, data: list):
+    temp_path = f"/tmp/export_tryout_{id_tryout}.pdf"
+    c = canvas.Canvas(temp_path, pagesize=letter)
+
+    y = 750
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(30, y, f"Laporan Hasil Tryout ID {id_tryout}")
+    y -= 30
+
+    c.setFont("Helvetica", 10)
+
+    for row in data:
+        text = f"{row['nama_user']} | Nilai: {row['nilai']} | Benar: {row['benar']} | Salah: {row['salah']} | Kosong: {row['kosong']}"
+        c.drawString(30, y, text)
+        y -= 20
+
+        if y < 50:
+            c.showPage()
+            c.setFont("Helvetica", 10)
+            y = 750
+
+    c.save()
+    return temp_path
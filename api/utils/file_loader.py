@@ -1,7 +1,5 @@
 import csv
-import pandas as pd
 from io import StringIO
-from openpyxl import load_workbook
 
 def load_question_file(file):
     """
@@ -14,6 +12,9 @@ def load_question_file(file):
     - Return DataFrame siap pakai
     """
 
+    # pandas (dan openpyxl lewat read_excel) di-import saat upload saja, bukan saat worker start
+    import pandas as pd
+
     filename = file.filename.lower()
 
     # ========= HANDLE XLSX ==========
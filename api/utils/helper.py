@@ -2,12 +2,9 @@ import os
 import re
 import uuid
 import pytz
-import bleach
-import pandas as pd
 from decimal import Decimal
 from datetime import date, datetime, time
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from sqlalchemy.engine import RowMapping
 
 
 ALLOWED_TAGS = ['p', 'b', 'i', 'u', 'strong', 'em', 'br', 'img', 'div', 'span']
@@ -120,7 +117,6 @@ def serialize_value(obj):
     if isinstance(obj, dict):
         return {k: serialize_value(v) for k, v in obj.items()}
     # SQLAlchemy RowMapping
-    from sqlalchemy.engine import RowMapping
     if isinstance(obj, RowMapping):
         return {k: serialize_value(v) for k, v in dict(obj).items()}
     # Decimal
@@ -177,40 +173,6 @@ def generate_judul(payload):
     return judul
 
 
-def generate_excel_hasiltryout(id_tryout: int, data: list):
-    df = pd.DataFrame(data)
-
-    temp_path = f"/tmp/export_tryout_{id_tryout}_{datetime.now().timestamp()}.xlsx"
-    df.to_excel(temp_path, index=False)
-
-    return temp_path
-
-
-def generate_pdf_hasiltryout(id_tryout: int, data: list):
-    temp_path = f"/tmp/export_tryout_{id_tryout}.pdf"
-    c = canvas.Canvas(temp_path, pagesize=letter)
-
-    y = 750
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(30, y, f"Laporan Hasil Tryout ID {id_tryout}")
-    y -= 30
-
-    c.setFont("Helvetica", 10)
-
-    for row in data:
-        text = f"{row['nama_user']} | Nilai: {row['nilai']} | Benar: {row['benar']} | Salah: {row['salah']} | Kosong: {row['kosong']}"
-        c.drawString(30, y, text)
-        y -= 20
-
-        if y < 50:
-            c.showPage()
-            c.setFont("Helvetica", 10)
-            y = 750
-
-    c.save()
-    return temp_path
-
-
 def convert_to_html_question(text, image_url=None):
     # normalize text
     if text is None:
@@ -236,6 +198,7 @@ def remove_images_from_html(html):
     return re.sub(r'<img[^>]*>', '', html)
 
 def sanitize_html(html):
+    import bleach  # lazy: hanya dipakai saat simpan soal, tidak perlu dimuat tiap worker
     return bleach.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRS, strip=True)
 
 def normalize_bool_to_int(value):
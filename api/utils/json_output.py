@@ -0,0 +1,55 @@
+import json
+import os
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask import current_app, make_response
+
+from .request_timing import timed_stage
+
+try:
+    import orjson  # opsional, tidak ada di requirements.txt
+except ImportError:
+    orjson = None
+
+# FAST_JSON=False → kembali ke json.dumps bawaan flask-restx
+FAST_JSON = os.getenv("FAST_JSON", "True") == "True"
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+@timed_stage("serialize")
+def dumps(data):
+    """Encode response ke JSON (bytes jika orjson tersedia, str jika tidak)."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def output_json(data, code, headers=None):
+    """Pengganti representation application/json bawaan flask-restx."""
+    if current_app.debug:
+        # Mode debug: tetap indent agar mudah dibaca
+        settings = dict(current_app.config.get("RESTX_JSON", {}))
+        settings.setdefault("indent", 4)
+        settings.setdefault("default", _default)
+        body = json.dumps(data, **settings) + "\n"
+    else:
+        body = dumps(data)
+    resp = make_response(body, code)
+    resp.headers.extend(headers or {})
+    return resp
+
+
+def init_json_output(restx_api):
+    if FAST_JSON:
+        restx_api.representation("application/json")(output_json)
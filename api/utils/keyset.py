@@ -0,0 +1,40 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values):
+    """
+    Cursor keyset (opaque) dari nilai kolom urutan row terakhir, mis. (last_activity, id_thread).
+    Klien cukup mengirim balik string ini sebagai ?cursor= untuk halaman berikutnya.
+    """
+    raw = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, types):
+    """
+    Kebalikan encode_cursor. types: tipe per posisi, mis. (datetime, int).
+    Cursor rusak/dimanipulasi → ValueError (handler membalas 400).
+    """
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor tidak valid") from e
+    if not isinstance(raw, list) or len(raw) != len(types):
+        raise ValueError("Cursor tidak valid")
+    try:
+        return tuple(datetime.fromisoformat(v) if t is datetime else t(v) for v, t in zip(raw, types))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor tidak valid") from e
+
+
+def keyset_page(rows, limit, key):
+    """
+    rows diambil dengan LIMIT limit + 1 → (rows halaman ini, next_cursor atau None).
+    key: fungsi row → tuple nilai urutan untuk encode_cursor.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
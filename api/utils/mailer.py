@@ -1,6 +1,26 @@
 from flask_mail import Message
+from jinja2 import Template
 from ..extensions import mail
 
+KREDENSIAL_SUBJECT = "Akun Ukai Syndrome Anda"
+
+KREDENSIAL_TEMPLATE = """
+Halo {{ nama }},
+
+Akun Ukai Syndrome kamu sudah dibuat{% if nama_kelas %} untuk kelas {{ nama_kelas }}{% endif %}.
+
+Email login    : {{ email }}
+Password awal  : {{ password_awal }}
+Kode pemulihan : {{ kode_pemulihan }}
+
+Login pertama (web maupun aplikasi mobile) memakai password awal di atas,
+lalu segera ganti password melalui menu profil. Simpan kode pemulihan
+untuk memulihkan akun jika lupa password.
+
+Salam,
+Tim Ukai Syndrome
+"""
+
 def send_recovery_email(to_email, kode_pemulihan):
     try:
         msg = Message(
@@ -22,3 +42,41 @@ Tim Ukai Syndrome
     except Exception as e:
         print(f"Email error: {e}")
         return False
+
+def compile_kredensial_template(template_str=None):
+    """
+    Compile template email kredensial satu kali per batch,
+    hasilnya dipakai ulang untuk render setiap penerima.
+    """
+    return Template(template_str or KREDENSIAL_TEMPLATE)
+
+def send_kredensial_batch(template, penerima_list, on_result):
+    """
+    Kirim email kredensial ke sekumpulan penerima lewat SATU koneksi SMTP.
+    - template     : hasil compile_kredensial_template()
+    - penerima_list: list dict {id_user, nama, email, password_awal, kode_pemulihan, nama_kelas}
+    - on_result    : callback(id_user, sukses, error) dipanggil per penerima
+    Flask-Mail otomatis reconnect setiap MAIL_MAX_EMAILS pesan.
+    """
+    dilaporkan = 0  # penerima (urut penerima_list) yang hasilnya sudah dikirim ke on_result
+    try:
+        with mail.connect() as conn:
+            for penerima in penerima_list:
+                try:
+                    msg = Message(
+                        subject=KREDENSIAL_SUBJECT,
+                        recipients=[penerima["email"]],
+                        body=template.render(**penerima)
+                    )
+                    conn.send(msg)
+                    sukses, error = True, None
+                except Exception as e:
+                    print(f"[send_kredensial_batch] Email error ({penerima['email']}): {e}")
+                    sukses, error = False, str(e)
+                dilaporkan += 1
+                on_result(penerima["id_user"], sukses, error)
+    except Exception as e:
+        # Koneksi SMTP gagal dibuka / putus → hanya penerima yang belum dilaporkan yang gagal
+        print(f"[send_kredensial_batch] SMTP error: {e}")
+        for penerima in penerima_list[dilaporkan:]:
+            on_result(penerima["id_user"], False, f"Koneksi SMTP gagal: {e}")
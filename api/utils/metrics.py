@@ -0,0 +1,343 @@
+import glob
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+
+# Batas bucket histogram latency (ms)
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Mode multiprocess (gunicorn): tiap worker menulis snapshot ke folder ini,
+# endpoint /metrics menjumlahkan semua snapshot
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+
+class Histogram:
+    """Histogram latency in-process (per worker), thread-safe."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # slot terakhir = +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms):
+        idx = bisect_left(self.buckets, value_ms)
+        with self._lock:
+            self._counts[idx] += 1
+            self._count += 1
+            self._sum += value_ms
+            if value_ms > self._max:
+                self._max = value_ms
+
+    def state(self):
+        with self._lock:
+            return {
+                "buckets": list(self.buckets),
+                "counts": list(self._counts),
+                "count": self._count,
+                "sum": self._sum,
+                "max": self._max
+            }
+
+    def snapshot(self):
+        return _histogram_summary(self.state())
+
+
+class Counter:
+    """Counter monoton sederhana, thread-safe."""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+
+class Gauge(Counter):
+    """Nilai yang bisa naik/turun (koneksi aktif, overflow pool, dsb)."""
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+
+
+def _quantile(state, q):
+    total = state["count"]
+    if not total:
+        return 0.0
+    target = q * total
+    cumulative = 0
+    for i, c in enumerate(state["counts"]):
+        cumulative += c
+        if cumulative >= target:
+            return float(state["buckets"][i]) if i < len(state["buckets"]) else state["max"]
+    return state["max"]
+
+
+def _histogram_summary(state):
+    cumulative = 0
+    buckets = {}
+    for le, c in zip(list(state["buckets"]) + ["+Inf"], state["counts"]):
+        cumulative += c
+        buckets[str(le)] = cumulative
+
+    total, total_sum = state["count"], state["sum"]
+    return {
+        "count": total,
+        "sum_ms": round(total_sum, 3),
+        "avg_ms": round(total_sum / total, 3) if total else 0.0,
+        "max_ms": round(state["max"], 3),
+        "p50_ms": _quantile(state, 0.50),
+        "p95_ms": _quantile(state, 0.95),
+        "p99_ms": _quantile(state, 0.99),
+        "buckets": buckets
+    }
+
+
+""" #=== Registry ===# """
+
+_histograms = {}
+_counters = {}
+_gauges = {}
+_registry_lock = threading.Lock()
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())) if labels else ())
+
+
+def _get_or_create(store, name, labels, factory):
+    key = _key(name, labels)
+    metric = store.get(key)
+    if metric is None:
+        with _registry_lock:
+            metric = store.setdefault(key, factory())
+    return metric
+
+
+def get_histogram(name, buckets=DEFAULT_BUCKETS_MS, labels=None):
+    return _get_or_create(_histograms, name, labels, lambda: Histogram(buckets))
+
+
+def get_counter(name, labels=None):
+    return _get_or_create(_counters, name, labels, Counter)
+
+
+def get_gauge(name, labels=None):
+    return _get_or_create(_gauges, name, labels, Gauge)
+
+
+_collectors = []
+
+
+def register_collector(fn):
+    """fn() dipanggil sebelum snapshot/export untuk memperbarui gauge (mis. status pool)."""
+    _collectors.append(fn)
+
+
+def _run_collectors():
+    for collect in _collectors:
+        try:
+            collect()
+        except Exception as e:
+            print(f"[metrics] Collector error: {e}")
+
+
+def _display_name(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+def snapshot_metrics(prefix=""):
+    """Snapshot (JSON) semua metric worker ini yang namanya diawali prefix."""
+    _run_collectors()
+    return {
+        "histograms": {
+            _display_name(n, l): h.snapshot()
+            for (n, l), h in list(_histograms.items()) if n.startswith(prefix)
+        },
+        "counters": {
+            _display_name(n, l): c.value
+            for (n, l), c in list(_counters.items()) if n.startswith(prefix)
+        },
+        "gauges": {
+            _display_name(n, l): g.value
+            for (n, l), g in list(_gauges.items()) if n.startswith(prefix)
+        }
+    }
+
+
+""" #=== Export & agregasi multiprocess ===# """
+
+def export_state():
+    """State mentah worker ini (bisa di-serialize JSON & dijumlahkan antar worker)."""
+    _run_collectors()
+    return {
+        "histograms": [[n, list(l), h.state()] for (n, l), h in list(_histograms.items())],
+        "counters": [[n, list(l), c.value] for (n, l), c in list(_counters.items())],
+        "gauges": [[n, list(l), g.value] for (n, l), g in list(_gauges.items())]
+    }
+
+
+def merge_states(states):
+    merged = {"histograms": {}, "counters": {}, "gauges": {}}
+    for state in states:
+        for kind in ("counters", "gauges"):
+            for name, labels, value in state.get(kind, []):
+                key = (name, tuple(tuple(x) for x in labels))
+                merged[kind][key] = merged[kind].get(key, 0) + value
+        for name, labels, h in state.get("histograms", []):
+            key = (name, tuple(tuple(x) for x in labels))
+            acc = merged["histograms"].get(key)
+            if acc is None or acc["buckets"] != h["buckets"]:
+                if acc is None:
+                    merged["histograms"][key] = {**h, "counts": list(h["counts"])}
+                continue
+            acc["counts"] = [a + b for a, b in zip(acc["counts"], h["counts"])]
+            acc["count"] += h["count"]
+            acc["sum"] += h["sum"]
+            acc["max"] = max(acc["max"], h["max"])
+    return merged
+
+
+def _state_path(pid):
+    return os.path.join(METRICS_MULTIPROC_DIR, f"metrics_{pid}.json")
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def flush_state():
+    """Tulis state worker ini ke METRICS_MULTIPROC_DIR (atomic rename)."""
+    if not METRICS_MULTIPROC_DIR:
+        return
+    path = _state_path(os.getpid())
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(export_state(), f)
+    os.replace(tmp_path, path)
+
+
+def collect_states():
+    """State semua worker; tanpa multiprocess dir hanya worker ini."""
+    if not METRICS_MULTIPROC_DIR:
+        return [export_state()]
+
+    flush_state()
+    states = []
+    for path in glob.glob(os.path.join(METRICS_MULTIPROC_DIR, "metrics_*.json")):
+        try:
+            pid = int(os.path.basename(path)[len("metrics_"):-len(".json")])
+            with open(path) as f:
+                state = json.load(f)
+        except (ValueError, OSError):
+            continue
+        if not _pid_alive(pid):
+            # Worker sudah mati: counter & histogram tetap dihitung, gauge dibuang
+            state["gauges"] = []
+        states.append(state)
+    return states
+
+
+_flush_thread = None
+_flush_pid = None
+
+
+def start_flush_thread():
+    """Thread background per worker untuk flush state secara berkala."""
+    global _flush_thread, _flush_pid
+    if not METRICS_MULTIPROC_DIR or _flush_pid == os.getpid():
+        return
+    os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+
+    def loop():
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            try:
+                flush_state()
+            except OSError as e:
+                print(f"[metrics] Gagal flush state: {e}")
+
+    _flush_pid = os.getpid()
+    _flush_thread = threading.Thread(target=loop, daemon=True)
+    _flush_thread.start()
+
+
+""" #=== Format Prometheus ===# """
+
+_INVALID_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _prom_name(name):
+    return _INVALID_CHARS.sub("_", name)
+
+
+def _prom_labels(labels, extra=None):
+    items = list(labels) + (list(extra) if extra else [])
+    if not items:
+        return ""
+    escaped = [
+        f'{_prom_name(k)}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for k, v in items
+    ]
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus(merged, extra_gauges=None):
+    """Render hasil merge_states() ke text exposition format Prometheus."""
+    lines = []
+
+    def by_name(items):
+        grouped = {}
+        for (name, labels), value in sorted(items, key=lambda x: (x[0][0], x[0][1])):
+            grouped.setdefault(name, []).append((labels, value))
+        return grouped
+
+    for name, series in by_name(merged["counters"].items()).items():
+        prom = _prom_name(name) + "_total"
+        lines.append(f"# TYPE {prom} counter")
+        for labels, value in series:
+            lines.append(f"{prom}{_prom_labels(labels)} {value}")
+
+    gauges = dict(merged["gauges"])
+    for name, value in (extra_gauges or {}).items():
+        gauges[(name, ())] = value
+    for name, series in by_name(gauges.items()).items():
+        prom = _prom_name(name)
+        lines.append(f"# TYPE {prom} gauge")
+        for labels, value in series:
+            lines.append(f"{prom}{_prom_labels(labels)} {value}")
+
+    for name, series in by_name(merged["histograms"].items()).items():
+        prom = _prom_name(name)
+        lines.append(f"# TYPE {prom} histogram")
+        for labels, h in series:
+            cumulative = 0
+            for le, c in zip(list(h["buckets"]) + ["+Inf"], h["counts"]):
+                cumulative += c
+                lines.append(f"{prom}_bucket{_prom_labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{prom}_sum{_prom_labels(labels)} {h['sum']}")
+            lines.append(f"{prom}_count{_prom_labels(labels)} {h['count']}")
+
+    return "\n".join(lines) + "\n"
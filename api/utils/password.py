@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from .metrics import get_counter, get_histogram
+
+# === Konfigurasi verifikasi password === #
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", "2"))     # 0 = verifikasi di thread request
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "16"))      # antrian maksimum di luar worker
+PASSWORD_TIMEOUT = float(os.getenv("PASSWORD_TIMEOUT", "10"))            # detik
+PASSWORD_RETRY_AFTER = int(os.getenv("PASSWORD_RETRY_AFTER", "2"))       # detik, header Retry-After
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000000")
+
+
+class PasswordVerifierBusy(Exception):
+    """Antrian verifikasi password penuh, request harus ditolak (503)."""
+
+    def __init__(self, retry_after=PASSWORD_RETRY_AFTER):
+        super().__init__("Password verifier busy")
+        self.retry_after = retry_after
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_admission = threading.BoundedSemaphore(max(1, PASSWORD_POOL_WORKERS) + PASSWORD_QUEUE_LIMIT)
+
+
+def _mp_context():
+    # fork di worker yang sudah punya thread (gthread, thread flush metrics, LISTEN pubsub) bisa
+    # mewarisi lock yang sedang dipegang → deadlock di proses anak. forkserver/spawn memulai
+    # proses bersih (modul ini diimpor ulang sekali per proses pool).
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _get_executor():
+    # Pool dibuat per proses (setelah fork worker gunicorn)
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ProcessPoolExecutor(max_workers=PASSWORD_POOL_WORKERS, mp_context=_mp_context())
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def _release_admission(_future):
+    _admission.release()
+
+
+def needs_rehash(pwhash, method=PASSWORD_HASH_METHOD):
+    """
+    True jika hash dibuat dengan parameter lama/lebih murah.
+    Format werkzeug: "pbkdf2:sha256:600000$salt$hash" / "scrypt:32768:8:1$salt$hash"
+    """
+    if not pwhash or "$" not in pwhash:
+        return False
+    current = pwhash.split("$", 1)[0]
+    if current == method:
+        return False
+
+    cur_parts, target_parts = current.split(":"), method.split(":")
+    if cur_parts[0] != target_parts[0]:
+        return True
+    if cur_parts[0] == "pbkdf2":
+        cur_hash = cur_parts[1] if len(cur_parts) > 1 else "sha256"
+        target_hash = target_parts[1] if len(target_parts) > 1 else "sha256"
+        try:
+            cur_iter = int(cur_parts[2]) if len(cur_parts) > 2 else 0
+            target_iter = int(target_parts[2]) if len(target_parts) > 2 else 0
+        except ValueError:
+            return False
+        return cur_hash != target_hash or cur_iter < target_iter
+    return True
+
+
+def _verify_job(pwhash, password, method, submitted_at):
+    """Dijalankan di process pool: verifikasi + rehash jika perlu."""
+    started_at = time.time()
+    ok = check_password_hash(pwhash, password)
+    verified_at = time.time()
+    new_hash = None
+    if ok and needs_rehash(pwhash, method):
+        new_hash = generate_password_hash(password, method=method)
+    return ok, new_hash, started_at - submitted_at, verified_at - started_at, time.time() - verified_at
+
+
+def verify_password(pwhash, password):
+    """
+    Verifikasi password di process pool terpisah.
+    Return (ok, new_hash); new_hash terisi jika hash lama perlu diganti.
+    Raise PasswordVerifierBusy jika antrian penuh / timeout.
+    """
+    if not pwhash:
+        return False, None
+
+    if not _admission.acquire(blocking=False):
+        get_counter("password.rejected").inc()
+        raise PasswordVerifierBusy()
+
+    start = time.perf_counter()
+    if PASSWORD_POOL_WORKERS <= 0:
+        try:
+            ok, new_hash, wait_s, verify_s, rehash_s = _verify_job(
+                pwhash, password, PASSWORD_HASH_METHOD, time.time()
+            )
+        finally:
+            _admission.release()
+    else:
+        try:
+            future = _get_executor().submit(_verify_job, pwhash, password, PASSWORD_HASH_METHOD, time.time())
+        except Exception:
+            _admission.release()
+            raise
+        # Slot dilepas saat job benar-benar selesai (atau batal sebelum jalan), bukan saat
+        # request menyerah: job yang sudah berjalan tetap memakai worker pool sampai selesai
+        future.add_done_callback(_release_admission)
+        try:
+            ok, new_hash, wait_s, verify_s, rehash_s = future.result(timeout=PASSWORD_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            get_counter("password.timeout").inc()
+            raise PasswordVerifierBusy()
+
+    get_histogram("password.queue_wait_ms").observe(max(0.0, wait_s) * 1000)
+    get_histogram("password.verify_ms").observe(verify_s * 1000)
+    if new_hash:
+        get_histogram("password.rehash_ms").observe(rehash_s * 1000)
+        get_counter("password.rehashed").inc()
+    get_histogram("password.total_ms").observe((time.perf_counter() - start) * 1000)
+    get_counter("password.ok" if ok else "password.invalid").inc()
+
+    return ok, new_hash
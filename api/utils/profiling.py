@@ -0,0 +1,122 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import g, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+from .config import get_wita
+from .request_timing import PROFILING_ENABLED
+
+# === Konfigurasi profiling (opt-in) === #
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))   # 0.01 = 1% request
+PROFILING_MAX_STORED = int(os.getenv("PROFILING_MAX_STORED", "50"))
+PROFILING_TOP_N = int(os.getenv("PROFILING_TOP_N", "40"))
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+""" #=== Store hasil profiling ===# """
+
+def _simpan_profile(entry):
+    with _profiles_lock:
+        _profiles[entry["id_profile"]] = entry
+        while len(_profiles) > PROFILING_MAX_STORED:
+            _profiles.popitem(last=False)
+
+
+def list_profiles():
+    with _profiles_lock:
+        return [
+            {k: v for k, v in p.items() if k != "stats"}
+            for p in reversed(_profiles.values())
+        ]
+
+
+def get_profile(id_profile):
+    with _profiles_lock:
+        profile = _profiles.get(id_profile)
+        return dict(profile) if profile else None
+
+
+def _is_admin_request():
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt().get("role") == "admin"
+    except Exception:
+        return False
+
+
+def _should_profile():
+    if request.headers.get("X-Profile") == "1" and _is_admin_request():
+        return True
+    return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+
+""" #=== Middleware ===# """
+
+def _before_request():
+    g._stage_timings = {}
+    g._request_start = time.perf_counter()
+    g._profiler = None
+    if _should_profile():
+        g._profiler = cProfile.Profile()
+        g._profiler.enable()
+
+
+def _after_request(response):
+    start = g.get("_request_start")
+    if start is None:
+        return response
+
+    profiler = g.get("_profiler")
+    if profiler is not None:
+        profiler.disable()
+
+    total_ms = (time.perf_counter() - start) * 1000
+    timings = g.get("_stage_timings") or {}
+    db_ms = timings.get("db", 0.0)
+    serialize_ms = timings.get("serialize", 0.0)
+    handler_ms = max(0.0, total_ms - db_ms - serialize_ms)
+
+    response.headers["Server-Timing"] = ", ".join([
+        f"db;dur={db_ms:.1f}",
+        f"serialize;dur={serialize_ms:.1f}",
+        f"handler;dur={handler_ms:.1f}",
+        f"total;dur={total_ms:.1f}",
+    ])
+
+    if profiler is not None:
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(PROFILING_TOP_N)
+        id_profile = uuid.uuid4().hex
+        _simpan_profile({
+            "id_profile": id_profile,
+            "method": request.method,
+            "path": request.path,
+            "status_code": response.status_code,
+            "created_at": get_wita().isoformat(),
+            "total_ms": round(total_ms, 2),
+            "db_ms": round(db_ms, 2),
+            "serialize_ms": round(serialize_ms, 2),
+            "handler_ms": round(handler_ms, 2),
+            "stats": output.getvalue()
+        })
+        response.headers["X-Profile-Id"] = id_profile
+
+    return response
+
+
+def init_profiling(app):
+    """Pasang middleware profiling ke Flask app (hanya jika PROFILING_ENABLED=True)."""
+    if not PROFILING_ENABLED:
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,287 @@
+import json
+import os
+import queue
+import select
+import threading
+import time
+
+from sqlalchemy import event, text
+
+from .metrics import get_counter
+
+# === Pub/sub event realtime (forum & komentar materi) === #
+# Topic: "forum.thread.<id_thread>", "materi.<id_materi>.<id_paketkelas>", "user.<id_user>",
+#        "cache.<nama>" (invalidasi cache antar worker, diterima lewat listen())
+# Backplane menyebarkan event ke worker lain:
+#   none     → hanya subscriber di proses yang sama (cukup untuk 1 worker / development)
+#   postgres → LISTEN/NOTIFY di database utama (tanpa dependency tambahan)
+PUBSUB_BACKPLANE = os.getenv("PUBSUB_BACKPLANE", "none")
+PUBSUB_CHANNEL = os.getenv("PUBSUB_CHANNEL", "ukai_events")
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("PUBSUB_QUEUE_SIZE", "100"))
+NOTIFY_MAX_PAYLOAD = 7900  # batas payload NOTIFY Postgres 8000 byte
+NOTIFY_TOPICS_PER_MESSAGE = 200
+
+
+class Subscription:
+    """Antrian event milik satu client (mis. satu koneksi SSE)."""
+
+    def __init__(self, broker, topics):
+        self.broker = broker
+        self.topics = frozenset(topics)
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = False
+
+    def get(self, timeout=None):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Broker:
+    """Pub/sub in-process: topic → subscription lokal & listener (callback)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = {}
+        self._listeners = {}
+
+    def subscribe(self, topics):
+        sub = Subscription(self, topics)
+        with self._lock:
+            for topic in sub.topics:
+                self._topics.setdefault(topic, set()).add(sub)
+        get_counter("pubsub.subscribe").inc()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for topic in sub.topics:
+                subs = self._topics.get(topic)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._topics[topic]
+
+    def listen(self, topic, callback):
+        with self._lock:
+            self._listeners.setdefault(topic, []).append(callback)
+
+    def deliver(self, topics, data):
+        delivered = 0
+        for topic in topics:
+            with self._lock:
+                subs = list(self._topics.get(topic, ()))
+                listeners = list(self._listeners.get(topic, ()))
+            for callback in listeners:
+                try:
+                    callback(topic, data)
+                except Exception as e:
+                    print(f"[pubsub] Listener {topic} gagal: {e}")
+            for sub in subs:
+                try:
+                    sub.queue.put_nowait((topic, data))
+                except queue.Full:
+                    # Client terlalu lambat → putuskan, client reconnect lalu fetch ulang
+                    sub.dropped = True
+                    get_counter("pubsub.dropped").inc()
+            delivered += len(subs)
+        return delivered
+
+
+class LocalBackplane:
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, topics, data):
+        self.broker.deliver(topics, data)
+
+    def start(self):
+        pass
+
+
+class PostgresBackplane:
+    """
+    Event dikirim lewat NOTIFY dan diterima semua worker (termasuk pengirim)
+    oleh thread LISTEN per proses, lalu diteruskan ke broker lokal.
+    """
+
+    def __init__(self, broker, engine, channel=PUBSUB_CHANNEL):
+        self.broker = broker
+        self.engine = engine
+        self.channel = channel
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _payloads(topics, data):
+        """Satu NOTIFY per kelompok topic (fan-out ke banyak user tetap sedikit statement)."""
+        for i in range(0, len(topics), NOTIFY_TOPICS_PER_MESSAGE):
+            chunk = topics[i:i + NOTIFY_TOPICS_PER_MESSAGE]
+            payload = json.dumps({"topics": chunk, "data": data}, default=str, separators=(",", ":"))
+            if len(payload.encode("utf-8")) > NOTIFY_MAX_PAYLOAD:
+                # Delta terlalu besar untuk NOTIFY → kirim penanda saja, client fetch ulang
+                payload = json.dumps({"topics": chunk, "data": {"type": data.get("type"), "refetch": True}})
+            yield payload
+
+    def publish(self, topics, data):
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            for payload in self._payloads(topics, data):
+                cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            raw.commit()
+        finally:
+            raw.close()
+
+    def publish_in_transaction(self, connection, topics, data):
+        """NOTIFY di transaksi yang sama: Postgres baru mengirimnya saat commit."""
+        for payload in self._payloads(topics, data):
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": payload}
+            )
+
+    def start(self):
+        """Thread LISTEN dimulai sekali per proses (aman setelah fork worker)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._listen_forever, daemon=True).start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                print(f"[pubsub] LISTEN terputus: {e}")
+                get_counter("pubsub.backplane_errors").inc()
+                time.sleep(1)
+
+    def _listen(self):
+        # Koneksi khusus di luar pool: LISTEN butuh koneksi yang hidup terus
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        dbapi_conn = self.engine.dialect.connect(*cargs, **cparams)
+        try:
+            dbapi_conn.autocommit = True
+            dbapi_conn.cursor().execute(f'LISTEN "{self.channel}"')
+            while True:
+                if select.select([dbapi_conn], [], [], 30) == ([], [], []):
+                    continue
+                dbapi_conn.poll()
+                while dbapi_conn.notifies:
+                    notify = dbapi_conn.notifies.pop(0)
+                    try:
+                        message = json.loads(notify.payload)
+                    except ValueError:
+                        continue
+                    self.broker.deliver(message["topics"], message["data"])
+        finally:
+            dbapi_conn.close()
+
+
+broker = Broker()
+_backplane = None
+
+
+def get_backplane():
+    global _backplane
+    if _backplane is None:
+        if PUBSUB_BACKPLANE == "postgres":
+            from .config import engine
+            _backplane = PostgresBackplane(broker, engine)
+        else:
+            _backplane = LocalBackplane(broker)
+    return _backplane
+
+
+def set_backplane(backplane):
+    """Pasang backplane lain (mis. Redis) dengan method publish(topics, data) & start()."""
+    global _backplane
+    _backplane = backplane
+
+
+def _dispatch(topics, data):
+    try:
+        get_backplane().publish(topics, data)
+        get_counter("pubsub.published").inc()
+    except Exception as e:
+        # Push bersifat best-effort: kegagalan tidak boleh menggagalkan request
+        print(f"[pubsub] Gagal publish {topics}: {e}")
+        get_counter("pubsub.backplane_errors").inc()
+
+
+_PENDING_KEY = "pubsub_pending"
+
+
+def publish(topics, data, connection=None):
+    """
+    Publish event (dict kecil berisi "type") ke satu topic atau list topic.
+    Jika connection diberikan, event ditahan sampai transaksi connection
+    commit (dibuang jika rollback).
+    """
+    topics = [topics] if isinstance(topics, str) else list(topics)
+    if not topics:
+        return
+    if connection is None:
+        _dispatch(topics, data)
+        return
+    backplane = get_backplane()
+    if hasattr(backplane, "publish_in_transaction"):
+        # Statement di transaksi yang sama: error di sini ikut menggagalkan transaksi
+        backplane.publish_in_transaction(connection, topics, data)
+        get_counter("pubsub.published").inc()
+        return
+    connection.info.setdefault(_PENDING_KEY, []).append((topics, data))
+
+
+def _on_commit(conn):
+    pending = conn.info.pop(_PENDING_KEY, None)
+    for topics, data in pending or ():
+        _dispatch(topics, data)
+
+
+def _on_rollback(conn):
+    conn.info.pop(_PENDING_KEY, None)
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    # conn.info ikut koneksi pool; jangan sampai event transaksi lama terbawa ke checkout berikutnya
+    connection_record.info.pop(_PENDING_KEY, None)
+
+
+def subscribe(topics):
+    get_backplane().start()
+    return broker.subscribe(topics)
+
+
+def listen(topic, callback):
+    """
+    Daftarkan callback(topic, data) untuk event di topic ini pada proses ini
+    (mis. invalidasi cache). Pemilik listener memanggil ensure_listening()
+    sebelum membaca data yang dijaga agar thread backplane hidup di worker ini.
+    """
+    broker.listen(topic, callback)
+
+
+def ensure_listening():
+    get_backplane().start()
+
+
+def init_pubsub(engine):
+    """Kirim event tertunda saat commit transaksi engine (primary)."""
+    event.listen(engine, "commit", _on_commit)
+    event.listen(engine, "rollback", _on_rollback)
+    event.listen(engine.pool, "checkin", _on_checkin)
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import request
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from .metrics import get_counter
+
+# === Konfigurasi rate limit === #
+# Format aturan: "<kapasitas>/<detik>", contoh "10/60" = 10 request per 60 detik
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True") == "True"
+RATE_LIMIT_STORAGE_URL = os.getenv("RATE_LIMIT_STORAGE_URL", "memory://")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Bucket per IP memakai request.remote_addr. Di balik reverse proxy, isi TRUSTED_PROXY_HOPS
+# dengan jumlah proxy milik kita di depan aplikasi (nginx = 1, load balancer + nginx = 2):
+# ProxyFix lalu mengambil IP client dari entri X-Forwarded-For ke-N dari kanan, yaitu
+# entri yang ditulis proxy kita sendiri; entri kiri yang bisa diisi client diabaikan.
+#   0 (default) → tanpa proxy; jangan dipakai di balik nginx, semua user berbagi IP proxy
+#                 sehingga seluruh situs (atau satu NAT kampus) berbagi satu bucket login
+#   terlalu besar → client bisa memalsukan IP lewat header X-Forwarded-For
+# RATE_LIMIT_TRUST_PROXY=True (lama) setara TRUSTED_PROXY_HOPS=1.
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "False") == "True"
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1" if RATE_LIMIT_TRUST_PROXY else "0"))
+
+# Per IP hanya plafon kasar: pagi hari ujian satu angkatan login dari satu NAT sekolah/kampus.
+# Perlindungan credential stuffing ada di bucket per email.
+LOGIN_LIMIT_IP = os.getenv("LOGIN_LIMIT_IP", "600/60")  # per IP client (lihat TRUSTED_PROXY_HOPS)
+LOGIN_LIMIT_EMAIL = os.getenv("LOGIN_LIMIT_EMAIL", "5/60")
+REGISTER_LIMIT_IP = os.getenv("REGISTER_LIMIT_IP", "5/600")
+REGISTER_LIMIT_EMAIL = os.getenv("REGISTER_LIMIT_EMAIL", "3/600")
+
+
+def parse_rule(rule):
+    """'10/60' → (kapasitas=10, refill per detik=10/60)"""
+    capacity, period = rule.split("/")
+    capacity, period = int(capacity), float(period)
+    return capacity, capacity / period
+
+
+class MemoryBucketStore:
+    """Token bucket in-process (per worker)."""
+
+    def __init__(self, max_keys=RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, cost=1):
+        """Return (diizinkan, retry_after_detik)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * refill_rate)
+
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / refill_rate
+
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now):
+        # Bucket yang sudah lama tidak dipakai pasti sudah penuh lagi → aman dibuang
+        idle = [k for k, (_, last) in self._buckets.items() if now - last > 3600]
+        for k in idle:
+            del self._buckets[k]
+        if len(self._buckets) > self.max_keys:
+            self._buckets.clear()
+
+
+class RedisBucketStore:
+    """
+    Token bucket bersama lintas worker/server lewat Redis.
+    Butuh paket `redis` (opsional, tidak ada di requirements.txt).
+    """
+
+    _SCRIPT = """
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local cost = tonumber(ARGV[4])
+        local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(data[1]) or capacity
+        local ts = tonumber(data[2]) or now
+        tokens = math.min(capacity, tokens + (now - ts) * rate)
+        local allowed = 0
+        if tokens >= cost then
+            tokens = tokens - cost
+            allowed = 1
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+        redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+        return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url):
+        import redis  # import di sini agar redis tetap opsional
+
+        self._client = redis.Redis.from_url(url)
+        self._consume = self._client.register_script(self._SCRIPT)
+
+    def consume(self, key, capacity, refill_rate, cost=1):
+        allowed, tokens = self._consume(
+            keys=[f"ratelimit:{key}"], args=[capacity, refill_rate, time.time(), cost]
+        )
+        if int(allowed):
+            return True, 0
+        return False, (cost - float(tokens)) / refill_rate
+
+
+def _create_store(url):
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisBucketStore(url)
+    return MemoryBucketStore()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store(RATE_LIMIT_STORAGE_URL)
+    return _store
+
+
+def set_store(store):
+    """Ganti backend store (mis. store bersama buatan sendiri)."""
+    global _store
+    _store = store
+
+
+def init_proxy_fix(app):
+    """Pasang ProxyFix sesuai TRUSTED_PROXY_HOPS agar request.remote_addr = IP client asli."""
+    if TRUSTED_PROXY_HOPS > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+
+def get_client_ip():
+    # Sudah dikoreksi ProxyFix (jika dipasang); header X-Forwarded-For tidak dibaca langsung
+    return request.remote_addr or "unknown"
+
+
+def _email_from_body():
+    payload = request.get_json(silent=True) or {}
+    email = payload.get("email")
+    return str(email).strip().lower() if email else None
+
+
+def rate_limit(scope, ip_rule=None, email_rule=None):
+    """
+    Decorator token bucket per IP dan/atau per email (diambil dari body JSON).
+    Dicek sebelum handler jalan → tanpa hashing password maupun akses database.
+    Bucket email dicek lebih dulu: request yang ditolak per email tidak memakai
+    jatah IP yang dibagi bersama satu NAT.
+    """
+    ip_limit = parse_rule(ip_rule) if ip_rule else None
+    email_limit = parse_rule(email_rule) if email_rule else None
+
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            if not RATE_LIMIT_ENABLED:
+                return fn(*args, **kwargs)
+
+            store = get_store()
+            checks = []
+            if email_limit:
+                email = _email_from_body()
+                if email:
+                    checks.append(("email", email, email_limit))
+            if ip_limit:
+                checks.append(("ip", get_client_ip(), ip_limit))
+
+            for key_type, key_value, (capacity, refill_rate) in checks:
+                allowed, retry_after = store.consume(f"{scope}:{key_type}:{key_value}", capacity, refill_rate)
+                if not allowed:
+                    get_counter("ratelimit.rejected", labels={"scope": scope, "key": key_type}).inc()
+                    return (
+                        {"status": "Terlalu banyak percobaan, coba lagi nanti"},
+                        429,
+                        {"Retry-After": str(max(1, int(retry_after + 0.999)))}
+                    )
+
+            get_counter("ratelimit.allowed", labels={"scope": scope}).inc()
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
@@ -0,0 +1,83 @@
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import text
+
+from .cache import SESSION_CACHE_TTL, session_cache
+from .config import get_connection
+
+
+class RequestContext:
+    """
+    Identitas user untuk satu request, dibangun sekali dari klaim JWT.
+    Fungsi q_* memakai role dari sini, bukan SELECT role FROM users lagi.
+    """
+
+    def __init__(self, id_user, role, session_id=None, device_type=None, id_paketkelas=None):
+        self.id_user = int(id_user)
+        self.role = role
+        self.session_id = session_id
+        self.device_type = device_type
+        self.id_paketkelas = id_paketkelas
+        self.session_valid = None  # diisi session_required (sekali per request)
+
+    @property
+    def is_admin(self):
+        return self.role == "admin"
+
+    @property
+    def is_mentor(self):
+        return self.role == "mentor"
+
+    @property
+    def is_peserta(self):
+        return self.role == "peserta"
+
+    def is_owner(self, id_owner):
+        return id_owner is not None and int(id_owner) == self.id_user
+
+    def check_session(self):
+        """Validasi session peserta (device aktif) — maksimal satu query per request."""
+        if self.session_valid is not None:
+            return self.session_valid
+
+        key = (self.id_user, self.device_type)
+        if SESSION_CACHE_TTL > 0 and session_cache.get(key) == self.session_id:
+            self.session_valid = True
+            return True
+
+        with get_connection().connect() as connection:
+            result = connection.execute(text("""
+                SELECT id_session 
+                FROM sessions 
+                WHERE id_user = :user_id 
+                  AND session_id = :session_id 
+                  AND device_type = :device_type
+                  AND status = 1
+                LIMIT 1
+            """), {
+                "user_id": self.id_user,
+                "session_id": self.session_id,
+                "device_type": self.device_type
+            }).fetchone()
+
+        self.session_valid = result is not None
+        if self.session_valid and SESSION_CACHE_TTL > 0:
+            session_cache.set(key, self.session_id)
+        return self.session_valid
+
+
+def get_request_context():
+    """RequestContext untuk request ini (verifikasi JWT + parsing klaim hanya sekali)."""
+    ctx = g.get("_request_context")
+    if ctx is None:
+        verify_jwt_in_request()
+        claims = get_jwt()
+        ctx = RequestContext(
+            id_user=get_jwt_identity(),
+            role=claims.get("role"),
+            session_id=claims.get("session_id"),
+            device_type=claims.get("device_type"),
+            id_paketkelas=claims.get("id_paketkelas")
+        )
+        g._request_context = ctx
+    return ctx
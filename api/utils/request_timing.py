@@ -0,0 +1,44 @@
+import os
+import time
+from functools import wraps
+
+from flask import g, has_request_context
+
+# Diset di sini (bukan profiling.py) agar bisa dipakai config/db_instrumentation tanpa import melingkar
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+
+
+""" #=== Akumulasi waktu per tahap (Server-Timing) ===# """
+
+def add_stage_time(stage, elapsed_ms):
+    """Tambahkan durasi ke tahap (db/serialize) milik request yang sedang berjalan."""
+    if not PROFILING_ENABLED or not has_request_context():
+        return
+    timings = g.get("_stage_timings")
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + elapsed_ms
+
+
+def timed_stage(stage):
+    """
+    Decorator untuk menghitung waktu fungsi ke tahap tertentu (tanpa double count rekursi).
+    Pasang di pemanggil terluar (serialize_rows, dumps), bukan helper per nilai/per row:
+    saat profiling aktif tiap panggilan membayar lookup g. Saat nonaktif fn dikembalikan apa adanya.
+    """
+    def wrapper(fn):
+        if not PROFILING_ENABLED:
+            return fn
+
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            if not has_request_context() or g.get("_active_stage"):
+                return fn(*args, **kwargs)
+            g._active_stage = stage
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                g._active_stage = None
+                add_stage_time(stage, (time.perf_counter() - start) * 1000)
+        return decorator
+    return wrapper
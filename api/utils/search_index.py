@@ -0,0 +1,191 @@
+import html
+import math
+import re
+import threading
+from collections import defaultdict
+
+# Inverted index murni Python untuk pencarian forum saat development
+# (tanpa tsvector/GIN). Perilaku dibuat mirip versi Postgres: token
+# di-stem ringan (bahasa Indonesia), hasil diranking & diberi snippet.
+
+_TOKEN_RE = re.compile(r"[0-9a-zA-ZÀ-ɏ]+")
+_TAG_RE = re.compile(r"<[^>]+>")
+
+STOPWORDS = {
+    "yang", "dan", "di", "ke", "dari", "ini", "itu", "untuk", "dengan", "pada",
+    "adalah", "atau", "juga", "tidak", "akan", "dalam", "saya", "kami", "kita",
+    "ada", "bisa", "sudah", "apa", "bagaimana", "kenapa", "mengapa", "the", "of",
+}
+_PARTIKEL = ("kah", "lah", "tah", "pun")
+_POSESIF = ("nya", "ku", "mu")
+_SUFIKS = ("kan", "an", "i")
+_PREFIKS = ("meng", "meny", "mem", "men", "me", "peng", "peny", "pem", "pen", "pe",
+            "ber", "be", "ter", "te", "di", "ke", "se")
+MIN_STEM = 3
+
+
+def stem(word):
+    """Stemmer ringan bahasa Indonesia (partikel → posesif → sufiks → prefiks)."""
+    for group in (_PARTIKEL, _POSESIF, _SUFIKS):
+        for suffix in group:
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+                word = word[: -len(suffix)]
+                break
+    for prefix in _PREFIKS:
+        if word.startswith(prefix) and len(word) - len(prefix) >= MIN_STEM:
+            return word[len(prefix):]
+    return word
+
+
+def strip_html(text):
+    return html.unescape(_TAG_RE.sub(" ", text or ""))
+
+
+def tokenize(text):
+    """Teks → list (stem, posisi awal, posisi akhir) dari teks tanpa tag HTML."""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text):
+        word = match.group().lower()
+        if word in STOPWORDS:
+            continue
+        tokens.append((stem(word), match.start(), match.end()))
+    return tokens
+
+
+def make_snippet(text, terms, max_words=20, start_sel="<mark>", stop_sel="</mark>"):
+    """Potongan teks di sekitar kemunculan term pertama, term ditandai start_sel/stop_sel."""
+    words = list(_TOKEN_RE.finditer(text))
+    if not words:
+        return ""
+    hits = {i for i, m in enumerate(words) if stem(m.group().lower()) in terms}
+    first = min(hits) if hits else 0
+    lo = max(first - max_words // 4, 0)
+    hi = min(lo + max_words, len(words))
+    parts = []
+    cursor = words[lo].start()
+    for i in range(lo, hi):
+        m = words[i]
+        parts.append(html.escape(text[cursor:m.start()]))
+        word = html.escape(m.group())
+        parts.append(f"{start_sel}{word}{stop_sel}" if i in hits else word)
+        cursor = m.end()
+    snippet = "".join(parts).strip()
+    return ("… " if lo > 0 else "") + snippet + (" …" if hi < len(words) else "")
+
+
+class InvertedIndex:
+    """
+    Index dokumen berfield dengan bobot, mis. thread: {"judul": 1.0, "isi": 0.4}.
+    Ranking: jumlah log(1 + tf berbobot) × idf per term, dinormalisasi panjang dokumen.
+    Thread-safe untuk satu proses (tidak dibagi antar worker).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)   # term → {doc_id: skor tf berbobot}
+        self._docs = {}                      # doc_id → {"text": ..., "attrs": ..., "terms": set, "length": n}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._docs
+
+    def get_attrs(self, doc_id):
+        doc = self._docs.get(doc_id)
+        return doc["attrs"] if doc else None
+
+    def add(self, doc_id, fields, attrs=None):
+        """
+        fields: {nama_field: (teks, bobot)} — teks HTML akan dibersihkan.
+        attrs: metadata untuk filter & hasil (id_batch, id_materi, ...).
+        Memanggil add untuk doc_id yang sudah ada = update.
+        """
+        with self._lock:
+            self.remove(doc_id)
+            weights = defaultdict(float)
+            texts = {}
+            length = 0
+            for name, (text, weight) in fields.items():
+                clean = strip_html(text)
+                texts[name] = clean
+                tokens = tokenize(clean)
+                length += len(tokens)
+                for term, _, _ in tokens:
+                    weights[term] += weight
+            for term, weight in weights.items():
+                self._postings[term][doc_id] = weight
+            self._docs[doc_id] = {
+                "text": texts,
+                "attrs": dict(attrs or {}),
+                "terms": set(weights),
+                "length": max(length, 1),
+            }
+
+    def update_attrs(self, doc_id, **attrs):
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            if doc:
+                doc["attrs"].update(attrs)
+
+    def remove(self, doc_id):
+        with self._lock:
+            doc = self._docs.pop(doc_id, None)
+            if not doc:
+                return
+            for term in doc["terms"]:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+    def remove_where(self, **attrs):
+        """Hapus semua dokumen yang attrs-nya cocok (mis. seluruh komentar satu thread)."""
+        with self._lock:
+            targets = [
+                doc_id for doc_id, doc in self._docs.items()
+                if all(doc["attrs"].get(k) == v for k, v in attrs.items())
+            ]
+            for doc_id in targets:
+                self.remove(doc_id)
+
+    def search(self, query, filters=None, limit=20, offset=0, snippet_field=None):
+        """
+        Semua term query harus muncul (AND, seperti websearch_to_tsquery).
+        Return (total, [(doc_id, rank, attrs, snippet), ...]).
+        """
+        terms = {term for term, _, _ in tokenize(query)}
+        if not terms:
+            return 0, []
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+
+        with self._lock:
+            postings = [self._postings.get(term, {}) for term in terms]
+            if not all(postings):
+                return 0, []
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for p in postings[1:]:
+                candidates &= p.keys()
+
+            n_docs = len(self._docs)
+            scored = []
+            for doc_id in candidates:
+                doc = self._docs[doc_id]
+                if any(doc["attrs"].get(k) != v for k, v in filters.items()):
+                    continue
+                score = 0.0
+                for p in postings:
+                    score += math.log(1 + p[doc_id]) * math.log(1 + n_docs / len(p))
+                scored.append((score / math.log(2 + doc["length"]), doc_id))
+
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            page = scored[offset:offset + limit]
+            hits = []
+            for rank, doc_id in page:
+                doc = self._docs[doc_id]
+                texts = doc["text"]
+                source = texts.get(snippet_field) if snippet_field else " ".join(texts.values())
+                hits.append((doc_id, round(rank, 6), dict(doc["attrs"]), make_snippet(source or "", terms)))
+            return len(scored), hits
@@ -0,0 +1,99 @@
+import threading
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from .request_timing import timed_stage
+
+
+def _iso(value):
+    return value.isoformat()
+
+
+def _ymd(value):
+    return value.strftime("%Y-%m-%d")
+
+
+# Aturan konversi per mode, sama persis dengan fungsi lama di helper.py.
+# Tipe yang tidak tercantum dikirim apa adanya.
+MODES = {
+    "date": ((datetime, _ymd), (date, _ymd)),                            # = serialize_row
+    "iso": ((datetime, _iso), (uuid.UUID, str), (Decimal, float)),       # = serialize_datetime_uuid
+    "iso_date": ((datetime, _iso), (date, _iso)),                         # = serialize_row_datetime
+}
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+MAX_COMPILED = 512
+
+
+def _converter_for(mode, value_type):
+    for tipe, convert in MODES[mode]:
+        if issubclass(value_type, tipe):
+            return convert
+    return None
+
+
+def _column_types(rows, n_columns, by_key, keys):
+    """Tipe per kolom dari nilai non-None pertama (kolom SQL bertipe tetap)."""
+    types = [None] * n_columns
+    missing = n_columns
+    for row in rows:
+        for i in range(n_columns):
+            if types[i] is None:
+                value = row[keys[i]] if by_key else row[i]
+                if value is not None:
+                    types[i] = type(value)
+                    missing -= 1
+        if not missing:
+            break
+    return tuple(types)
+
+
+def _compile(mode, keys, types, by_key):
+    """Generate fungsi row → dict khusus untuk shape ini (tanpa loop & isinstance per nilai)."""
+    namespace = {}
+    parts = []
+    for i, (key, value_type) in enumerate(zip(keys, types)):
+        access = f"r[{key!r}]" if by_key else f"r[{i}]"
+        convert = _converter_for(mode, value_type) if value_type is not None else None
+        if convert is None:
+            parts.append(f"{key!r}: {access}")
+        else:
+            namespace[f"c{i}"] = convert
+            parts.append(f"{key!r}: (None if {access} is None else c{i}({access}))")
+    source = "def serialize(r):\n    return {" + ", ".join(parts) + "}\n"
+    exec(source, namespace)
+    return namespace["serialize"]
+
+
+def get_row_serializer(mode, keys, types, by_key=False):
+    cache_key = (mode, keys, types, by_key)
+    fn = _compiled.get(cache_key)
+    if fn is None:
+        fn = _compile(mode, keys, types, by_key)
+        with _compiled_lock:
+            if len(_compiled) >= MAX_COMPILED:
+                _compiled.clear()
+            _compiled[cache_key] = fn
+    return fn
+
+
+@timed_stage("serialize")
+def serialize_rows(rows, mode="iso", keys=None):
+    """
+    Serialize banyak row sekaligus dengan satu fungsi hasil compile per shape query.
+    rows: hasil .fetchall() (Row, akses index) atau .mappings().fetchall() (RowMapping/dict).
+    mode: "date" | "iso" | "iso_date" — lihat MODES.
+    """
+    if not rows:
+        return []
+    first = rows[0]
+    by_key = hasattr(first, "keys")
+    if keys is None:
+        keys = tuple(first.keys()) if by_key else tuple(first._fields)
+    else:
+        keys = tuple(keys)
+    types = _column_types(rows, len(keys), by_key, keys)
+    serialize = get_row_serializer(mode, keys, types, by_key)
+    return [serialize(row) for row in rows]
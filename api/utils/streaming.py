@@ -0,0 +1,51 @@
+import os
+
+from flask import Response, request, stream_with_context
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from . import config
+from .json_output import dumps
+from .serializer import serialize_rows
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+
+def wants_ndjson():
+    """Client minta NDJSON lewat ?format=ndjson atau header Accept: application/x-ndjson."""
+    if request.args.get("format") == "ndjson":
+        return True
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def _as_bytes(line):
+    return line if isinstance(line, bytes) else line.encode("utf-8")
+
+
+def stream_query(sql, params=None, mode="iso"):
+    """
+    Generator chunk NDJSON (satu row per baris) dari server-side cursor.
+    Memori & waktu ke byte pertama konstan: row diambil per STREAM_BATCH_SIZE.
+    Koneksi sendiri (bukan unit of work request) karena hidup sampai stream selesai.
+    """
+    target = config.replica_engine if config.replica_engine is not None else config.engine
+    try:
+        with target.connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, max_row_buffer=STREAM_BATCH_SIZE
+            ).execute(text(sql), params or {})
+            for partition in result.partitions(STREAM_BATCH_SIZE):
+                yield b"".join(_as_bytes(dumps(row)) for row in serialize_rows(partition, mode=mode))
+    except SQLAlchemyError as e:
+        print(f"[stream_query] Error: {e}")
+        # Header 200 sudah terkirim → laporkan error sebagai baris terakhir
+        yield _as_bytes(dumps({"status": "error", "message": "Stream terhenti karena kesalahan database"}))
+
+
+def ndjson_response(chunks):
+    return Response(
+        stream_with_context(chunks),
+        mimetype=NDJSON_MIMETYPE,
+        headers={"X-Accel-Buffering": "no", "Cache-Control": "no-store"}
+    )
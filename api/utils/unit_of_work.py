@@ -0,0 +1,170 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g
+
+# Satu koneksi per engine dipakai bersama oleh semua fungsi q_* dalam satu request
+DB_REQUEST_SCOPED_CONNECTION = os.getenv("DB_REQUEST_SCOPED_CONNECTION", "True") == "True"
+
+_current_unit = ContextVar("db_unit_of_work", default=None)
+
+
+class UnitOfWork:
+    """
+    Menyimpan koneksi (lazy, dibuka saat query pertama) per engine selama satu request:
+    semua fungsi q_* dalam request memakai koneksi yang sama, dikembalikan ke pool saat
+    teardown. Kode yang akan melakukan kerja non-DB yang lama di tengah request
+    (verifikasi password, panggilan HTTP) memanggil release_connection() lebih dulu.
+    Thread lain (job email, ThreadPoolExecutor) tidak mewarisi unit ini.
+    """
+
+    def __init__(self):
+        self._connections = {}
+        self._depth = {}
+        self.in_write = set()  # engine yang sedang berada di dalam begin()
+
+    def connection(self, engine):
+        conn = self._connections.get(engine)
+        if conn is None or conn.closed:
+            conn = engine.connect()
+            self._connections[engine] = conn
+        return conn
+
+    def enter(self, engine):
+        self._depth[engine] = self._depth.get(engine, 0) + 1
+        return self.connection(engine)
+
+    def exit(self, engine):
+        depth = self._depth.get(engine, 1) - 1
+        if depth > 0:
+            self._depth[engine] = depth
+        else:
+            self._depth.pop(engine, None)
+
+    def release_idle(self):
+        """Kembalikan ke pool koneksi yang tidak sedang dipakai blok connect()/begin()."""
+        for engine in [e for e in self._connections if e not in self._depth]:
+            conn = self._connections[engine]
+            if not conn.in_transaction():
+                self._release(self._connections.pop(engine))
+
+    @staticmethod
+    def _release(conn):
+        try:
+            if conn.in_transaction():
+                conn.rollback()
+            conn.close()
+        except Exception as e:
+            print(f"[unit_of_work] Gagal menutup koneksi: {e}")
+
+    def close(self):
+        connections, self._connections = self._connections, {}
+        self._depth.clear()
+        for conn in connections.values():
+            self._release(conn)
+
+
+class SharedEngine:
+    """
+    Pengganti engine untuk fungsi q_*: engine.connect() / engine.begin()
+    memakai koneksi milik unit of work, bukan checkout baru dari pool.
+    """
+
+    def __init__(self, engine, unit):
+        self._engine = engine
+        self._unit = unit
+
+    def __getattr__(self, name):
+        return getattr(self._engine, name)
+
+    @contextmanager
+    def connect(self):
+        if self._engine in self._unit.in_write:
+            # Dipanggil dari dalam begin() → ikut transaksi yang sedang berjalan
+            yield self._unit.connection(self._engine)
+            return
+        conn = self._unit.enter(self._engine)
+        try:
+            yield conn
+        finally:
+            # Sama seperti koneksi biasa ditutup: transaksi baca (autobegin) diakhiri
+            if conn.in_transaction():
+                conn.rollback()
+            self._unit.exit(self._engine)
+
+    @contextmanager
+    def begin(self):
+        if self._engine in self._unit.in_write:
+            # begin() bertingkat: tetap satu transaksi, commit oleh yang terluar
+            yield self._unit.connection(self._engine)
+            return
+        conn = self._unit.enter(self._engine)
+        try:
+            if conn.in_transaction():
+                conn.rollback()
+            self._unit.in_write.add(self._engine)
+            try:
+                with conn.begin():
+                    yield conn
+            finally:
+                self._unit.in_write.discard(self._engine)
+        finally:
+            self._unit.exit(self._engine)
+
+
+def current_unit():
+    return _current_unit.get()
+
+
+def release_connection():
+    """
+    Lepas koneksi request yang sedang menganggur sebelum kerja non-DB yang lama;
+    query berikutnya dalam request yang sama mengambil koneksi baru dari pool.
+    """
+    unit = _current_unit.get()
+    if unit is not None:
+        unit.release_idle()
+
+
+def shared(engine):
+    """Bungkus engine dengan koneksi unit of work aktif (jika ada)."""
+    unit = _current_unit.get()
+    return SharedEngine(engine, unit) if unit is not None else engine
+
+
+@contextmanager
+def unit_of_work():
+    """Unit of work manual (script, job background). Bertingkat → pakai unit terluar."""
+    if _current_unit.get() is not None:
+        yield _current_unit.get()
+        return
+    unit = UnitOfWork()
+    token = _current_unit.set(unit)
+    try:
+        yield unit
+    finally:
+        _current_unit.reset(token)
+        unit.close()
+
+
+def init_unit_of_work(app):
+    """Buka unit of work per request; koneksi yang masih dipegang dikembalikan saat teardown."""
+    if not DB_REQUEST_SCOPED_CONNECTION:
+        return
+
+    @app.before_request
+    def _begin_unit_of_work():
+        g._uow_token = _current_unit.set(UnitOfWork())
+
+    @app.teardown_request
+    def _end_unit_of_work(exc=None):
+        unit = _current_unit.get()
+        if unit is not None:
+            unit.close()
+        token = g.pop("_uow_token", None)
+        if token is not None:
+            try:
+                _current_unit.reset(token)
+            except ValueError:
+                _current_unit.set(None)
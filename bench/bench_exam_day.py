@@ -0,0 +1,150 @@
+"""
+Skenario beban hari ujian (in-process terhadap aplikasi Flask, tanpa server HTTP).
+
+Setiap peserta virtual menjalankan alur lengkap secara berurutan:
+    login web → attempts/start → questions → N x attempts/answer → attempts/submit
+lalu dashboard mentor memuat leaderboard tryout yang sama. Antar peserta berjalan
+paralel (--concurrency). Dilaporkan p50/p95/p99 & throughput per endpoint
+(throughput = jumlah request endpoint / durasi seluruh skenario) plus alur lengkap.
+
+Dataset dari bench.seed_data (akun seed-peserta-* / seed-mentor-*, password sama):
+    python -m bench.seed_data --reset
+    python -m bench.bench_exam_day --users 500 --answers 200 --concurrency 50
+
+Rate limit login dimatikan (RATE_LIMIT_ENABLED=False) kecuali di-set di environment,
+karena semua request test_client datang dari satu IP.
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+os.environ.setdefault("RATE_LIMIT_ENABLED", "False")
+
+from sqlalchemy import text  # noqa: E402
+
+from api import api  # noqa: E402
+from api.utils.config import engine  # noqa: E402
+from .common import print_report, run_concurrent, summarize  # noqa: E402
+from .seed_data import EMAIL_DOMAIN, OPSI, SEED_PREFIX  # noqa: E402
+
+ENDPOINTS = ("login", "attempts/start", "questions", "attempts/answer", "attempts/submit", "leaderboard")
+
+
+class Recorder:
+    """Durasi (ms) & error per endpoint, aman dipakai banyak thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, label, fn, ok_status=(200, 201)):
+        start = time.perf_counter()
+        resp = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        ok = resp.status_code in ok_status
+        with self._lock:
+            self.durations[label].append(elapsed)
+            if not ok:
+                self.errors[label] += 1
+        if not ok:
+            raise RuntimeError(f"{label} → HTTP {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+        return resp.get_json()
+
+
+def pick_accounts(n):
+    with engine.connect() as conn:
+        peserta = conn.execute(text("""
+            SELECT email FROM users
+            WHERE email LIKE :e AND role = 'peserta' AND status = 1
+            ORDER BY id_user LIMIT :n
+        """), {"e": f"seed-peserta-%@{EMAIL_DOMAIN}", "n": n}).scalars().all()
+        mentor = conn.execute(text("""
+            SELECT email FROM users WHERE email LIKE :e AND status = 1 ORDER BY id_user LIMIT 1
+        """), {"e": f"seed-mentor-%@{EMAIL_DOMAIN}"}).scalar()
+    return peserta, mentor
+
+
+def pick_tryout():
+    """Tryout seed dengan hasiltryout terbanyak (leaderboard terberat)."""
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT t.id_tryout
+            FROM tryout t
+            LEFT JOIN hasiltryout h ON h.id_tryout = t.id_tryout AND h.status = 1
+            WHERE t.judul LIKE :s AND t.status = 1
+            GROUP BY t.id_tryout
+            ORDER BY COUNT(h.id_hasiltryout) DESC, t.id_tryout
+            LIMIT 1
+        """), {"s": f"{SEED_PREFIX}%"}).scalar()
+
+
+def login(recorder, client, email, password):
+    data = recorder.call("login", lambda: client.post("/auth/login/web", json={"email": email, "password": password}))
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skenario beban hari ujian")
+    parser.add_argument("--users", type=int, default=200, help="Jumlah peserta virtual")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--answers", type=int, default=None, help="Jawaban per peserta (default: semua soal)")
+    parser.add_argument("--id-tryout", type=int, help="Default: tryout seed dengan hasil terbanyak")
+    parser.add_argument("--password", default="bench12345")
+    parser.add_argument("--leaderboard-limit", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    peserta, mentor = pick_accounts(args.users)
+    id_tryout = args.id_tryout or pick_tryout()
+    if not peserta or not mentor or not id_tryout:
+        raise SystemExit("Data seed tidak ditemukan, jalankan python -m bench.seed_data dulu")
+
+    recorder = Recorder()
+    with api.test_client() as client:
+        mentor_headers = login(recorder, client, mentor, args.password)
+
+    def run_user(item):
+        email, seed = item
+        rng = random.Random(seed)
+        with api.test_client() as client:
+            headers = login(recorder, client, email, args.password)
+            attempt = recorder.call("attempts/start", lambda: client.post(
+                f"/tryout/{id_tryout}/attempts/start", headers=headers))
+            token = attempt["data"]["attempt_token"]
+            questions = recorder.call("questions", lambda: client.get(
+                f"/tryout/{id_tryout}/questions", headers=headers))["data"]
+
+            nomor_list = [q["nomor_urut"] for q in questions]
+            if args.answers is not None:
+                nomor_list = nomor_list[:args.answers]
+            for nomor in nomor_list:
+                body = {"attempt_token": token, "nomor": nomor,
+                        "jawaban": rng.choice(OPSI), "ragu": int(rng.random() < 0.1)}
+                recorder.call("attempts/answer", lambda: client.put(
+                    "/tryout/attempts/answer", json=body, headers=headers))
+
+            recorder.call("attempts/submit", lambda: client.post(
+                "/tryout/attempts/submit", json={"attempt_token": token}, headers=headers))
+            recorder.call("leaderboard", lambda: client.get(
+                f"/hasil-tryout/{id_tryout}/leaderboard?limit={args.leaderboard_limit}", headers=mentor_headers))
+        return True
+
+    items = [(email, args.seed + i) for i, email in enumerate(peserta)]
+    print(f"Tryout {id_tryout}: {len(items)} peserta, concurrency {args.concurrency}")
+    durations, errors, wall = run_concurrent(run_user, items, args.concurrency)
+
+    rows = [
+        summarize(label, recorder.durations[label], wall, recorder.errors[label])
+        for label in ENDPOINTS
+    ]
+    rows.append(summarize("alur lengkap", durations, wall, errors))
+    print_report(rows)
+    raise SystemExit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Budget waktu import (cold start) aplikasi: `import api` di proses Python baru,
+seperti saat worker gunicorn dimuat.
+
+Gagal (exit 1) jika:
+    - median waktu import > --budget-ms (default IMPORT_BUDGET_MS atau 1500 ms)
+    - modul berat yang seharusnya lazy (pandas, reportlab, bleach, openpyxl) ikut
+      ter-import saat start; cek ini tidak tergantung kecepatan mesin
+
+Tiap run memakai `python -X importtime`, jadi bisa ditampilkan juga modul dengan
+waktu import kumulatif terbesar (--top):
+    python -m bench.bench_import --runs 5 --budget-ms 1200 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+LAZY_MODULES = ("pandas", "reportlab", "bleach", "openpyxl")
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import api
+elapsed = (time.perf_counter() - start) * 1000
+loaded = sorted(m for m in {LAZY_MODULES!r} if m in sys.modules)
+print(json.dumps({{"ms": elapsed, "lazy_loaded": loaded}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Baris `import time: self | cumulative | package` → list (cumulative_us, package top-level)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Modul bersarang diberi indentasi tambahan; hanya level teratas yang dihitung
+        if not name[1:].startswith(" "):
+            rows.append((int(cumulative_us), name.strip()))
+    return rows
+
+
+def run_once():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import api gagal:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["modules"] = parse_importtime(proc.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Budget waktu import aplikasi (cold start)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="Tampilkan N modul top-level terlama")
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    durations = [r["ms"] for r in results]
+    median = statistics.median(durations)
+    lazy_loaded = sorted({m for r in results for m in r["lazy_loaded"]})
+
+    print(f"import api: median {median:.1f} ms, min {min(durations):.1f} ms, "
+          f"max {max(durations):.1f} ms ({args.runs} run, budget {args.budget_ms:.0f} ms)")
+    if args.top:
+        print(f"\n{'cumulative_ms':>14}  modul (run terakhir)")
+        for cumulative_us, name in sorted(results[-1]["modules"], reverse=True)[:args.top]:
+            print(f"{cumulative_us / 1000:>14.1f}  {name}")
+
+    problems = []
+    if median > args.budget_ms:
+        problems.append(f"median {median:.1f} ms melebihi budget {args.budget_ms:.0f} ms")
+    if lazy_loaded:
+        problems.append(f"modul berat ter-import saat start: {', '.join(lazy_loaded)}")
+    for problem in problems:
+        print(f"[GAGAL] {problem}")
+    print("\nHASIL:", "OK" if not problems else "GAGAL")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark beban login (simulasi pagi hari ujian: satu kohort login bersamaan).
+
+Jalankan dari root repo dengan database yang sudah berisi user:
+    python -m bench.bench_login --accounts akun.csv --concurrency 50 --rounds 3
+
+akun.csv berisi kolom: email,password
+"""
+import argparse
+import csv
+
+from api import api
+from .common import print_report, run_concurrent, summarize
+
+
+def load_accounts(path):
+    with open(path, newline="") as f:
+        return [(row["email"], row["password"]) for row in csv.DictReader(f)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark endpoint login")
+    parser.add_argument("--accounts", required=True, help="CSV email,password")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=1, help="Berapa kali setiap akun login")
+    parser.add_argument(
+        "--endpoints", default="/auth/login/web,/auth/login/mobile",
+        help="Daftar endpoint login dipisah koma"
+    )
+    args = parser.parse_args()
+
+    accounts = load_accounts(args.accounts) * args.rounds
+    rows = []
+
+    for endpoint in args.endpoints.split(","):
+        def do_login(account, endpoint=endpoint):
+            email, password = account
+            with api.test_client() as client:
+                resp = client.post(endpoint, json={"email": email, "password": password})
+                return resp.status_code == 200
+
+        durations, errors, wall = run_concurrent(do_login, accounts, args.concurrency)
+        rows.append(summarize(endpoint, durations, wall, errors))
+
+    print_report(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Micro-benchmark per fungsi panas (gaya pytest-benchmark, dijalankan sebagai script
+karena repo tidak memakai pytest):
+    save_tryout_answer, submit_tryout_attempt, get_leaderboard_tryout,
+    get_all_peserta_aktif, get_forum_thread_detail, insert_bulk_peserta,
+    serialize_value, load_question_file
+
+Setiap case: setup per round (tidak diukur) → panggil fungsi → catat durasi.
+Statistik (min/median/mean/stddev) dibandingkan dengan baseline tersimpan;
+regresi = median > baseline × (1 + --tolerance).
+
+Case database memakai fixture kecil dari bench.seed_data yang dibuat di database
+disposable (nama database harus berakhiran _bench / _test, atau --force) lalu
+dihapus lagi di akhir (--keep-fixture untuk membiarkannya):
+    python -m bench.bench_micro --update            # tulis baseline
+    python -m bench.bench_micro                     # bandingkan dengan baseline
+    python -m bench.bench_micro -k leaderboard -k serialize --rounds 50
+    python -m bench.bench_micro --no-db             # hanya serializer & file loader
+Exit code 1 jika ada regresi.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+from werkzeug.datastructures import FileStorage
+
+from api.query.q_forum import get_forum_thread_detail
+from api.query.q_hasiltryout import get_leaderboard_tryout
+from api.query.q_peserta import get_all_peserta_aktif, insert_bulk_peserta
+from api.query.q_tryout import save_tryout_answer, start_tryout_attempt, submit_tryout_attempt
+from api.utils.config import engine, get_wita
+from api.utils.file_loader import load_question_file
+from api.utils.helper import serialize_value
+from .bench_serialize import make_hasiltryout_rows
+from .seed_data import EMAIL_DOMAIN, OPSI, analyze, build_parser, check_disposable, copy_rows, reset, seed
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+
+# Fixture kecil tapi cukup untuk plan yang realistis (±20k hasiltryout)
+FIXTURE_ARGS = [
+    "--users", "500", "--mentors", "10", "--batches", "2", "--kelas-per-batch", "5",
+    "--tryouts", "3", "--tryouts-per-kelas", "3", "--soal", "200",
+    "--attempts", "20000", "--answers-ratio", "0.1", "--reset",
+]
+FORUM_COMMENTS = 200
+
+
+class Case:
+    """Satu benchmark: fn(*setup()) diukur per round; max_rounds membatasi case yang mahal."""
+
+    def __init__(self, name, fn, setup=None, max_rounds=None):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.max_rounds = max_rounds
+
+
+def run_case(case, rounds, warmup):
+    if case.max_rounds:
+        rounds = min(rounds, case.max_rounds)
+        warmup = min(warmup, 1)
+    durations = []
+    for i in range(warmup + rounds):
+        args = case.setup() if case.setup else ()
+        start = time.perf_counter()
+        case.fn(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        if i >= warmup:
+            durations.append(elapsed)
+    median = statistics.median(durations)
+    return {
+        "rounds": len(durations),
+        "min_ms": round(min(durations), 3),
+        "median_ms": round(median, 3),
+        "mean_ms": round(statistics.fmean(durations), 3),
+        "stddev_ms": round(statistics.stdev(durations), 3) if len(durations) > 1 else 0.0,
+        "ops": round(1000 / median, 2) if median else 0.0,
+    }
+
+
+""" #=== Fixture database ===# """
+
+def seed_forum(id_user, id_paketkelas, id_batch, rng):
+    """Satu thread dengan komentar level atas + balasan, counter diisi seperti q_forum."""
+    now = get_wita().replace(microsecond=0)
+    with engine.begin() as conn:
+        id_thread = conn.execute(text("""
+            INSERT INTO forum_thread (
+                id_user, judul, isi, id_materi, id_paketkelas, id_batch,
+                is_solved, status, created_at, updated_at, comment_count, last_activity
+            )
+            VALUES (:id_user, '[seed] Thread micro-benchmark', 'Isi thread', NULL, :id_paketkelas, :id_batch,
+                    FALSE, 1, :now, :now, 0, :now)
+            RETURNING id_thread
+        """), {"id_user": id_user, "id_paketkelas": id_paketkelas, "id_batch": id_batch, "now": now}).scalar()
+
+    replies = [rng.randint(0, 5) for _ in range(FORUM_COMMENTS)]
+    copy_rows("forum_comment", ("id_user", "id_thread", "isi", "parent_id", "reply_count", "created_at"), (
+        (id_user, id_thread, f"Komentar {i + 1}", None, replies[i], now) for i in range(FORUM_COMMENTS)
+    ))
+    with engine.begin() as conn:
+        parents = conn.execute(text("""
+            SELECT id_comment FROM forum_comment WHERE id_thread = :id_thread ORDER BY id_comment
+        """), {"id_thread": id_thread}).scalars().all()
+    copy_rows("forum_comment", ("id_user", "id_thread", "isi", "parent_id", "created_at"), (
+        (id_user, id_thread, f"Balasan {r + 1}", parent, now)
+        for parent, count in zip(parents, replies) for r in range(count)
+    ))
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE forum_thread SET comment_count = :total WHERE id_thread = :id_thread
+        """), {"total": FORUM_COMMENTS + sum(replies), "id_thread": id_thread})
+    return id_thread
+
+
+def build_fixture(rng, force=False):
+    ids, kunci, tryout_kelas = seed(build_parser().parse_args(FIXTURE_ARGS + (["--force"] if force else [])))
+    with engine.connect() as conn:
+        kelas = conn.execute(text("""
+            SELECT id_paketkelas, id_batch, nama_kelas FROM paketkelas WHERE id_paketkelas = :id
+        """), {"id": ids["kelas"][0]}).mappings().first()
+        peserta = conn.execute(text("""
+            SELECT id_user FROM users WHERE id_user = ANY(:ids) AND status = 1 ORDER BY id_user
+        """), {"ids": ids["peserta"]}).scalars().all()
+    id_tryout = sorted(kunci)[0]
+    id_thread = seed_forum(ids["mentor"][0], kelas["id_paketkelas"], kelas["id_batch"], rng)
+    analyze(("forum_thread", "forum_comment"))
+
+    # Attempt ongoing untuk save_tryout_answer (peserta pertama)
+    attempt, _, status_code = start_tryout_attempt(id_tryout, peserta[0])
+    if status_code not in (200, 201):
+        raise SystemExit("Fixture gagal membuat attempt ongoing")
+    return {
+        "id_tryout": id_tryout,
+        "kunci": kunci[id_tryout],
+        "peserta": peserta,
+        "kelas": kelas,
+        "id_thread": id_thread,
+        "answer_user": peserta[0],
+        "answer_token": str(attempt["attempt_token"]),
+    }
+
+
+""" #=== Case ===# """
+
+def question_file_bytes(rng, n, fmt):
+    header = ["no", "pertanyaan", "pilihan_a", "pilihan_b", "pilihan_c",
+              "pilihan_d", "pilihan_e", "jawaban_benar", "pembahasan"]
+    rows = [
+        [i, f"\ufeffKasus klinis {i}:\xa0pilih terapi yang tepat ", *(f" Opsi {o} {i}" for o in OPSI),
+         rng.choice(OPSI), f"Pembahasan {i}\xa0"]
+        for i in range(1, n + 1)
+    ]
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf, delimiter=";")
+        writer.writerow(header)
+        writer.writerows(rows)
+        return buf.getvalue().encode("utf-8")
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def pure_cases(rng):
+    rows = [r._asdict() for r in make_hasiltryout_rows(2000, rng)]
+    cases = [Case("serialize_value[2000 hasiltryout]", serialize_value, setup=lambda: (rows,))]
+    for fmt in ("csv", "xlsx"):
+        data = question_file_bytes(rng, 200, fmt)
+        cases.append(Case(
+            f"load_question_file[{fmt} 200 soal]", load_question_file,
+            setup=lambda data=data, fmt=fmt: (FileStorage(stream=io.BytesIO(data), filename=f"soal.{fmt}"),)
+        ))
+    return cases
+
+
+def db_cases(fx, rng):
+    counter = {"answer": 0, "submit": 0, "bulk": 0}
+
+    def next_answer():
+        counter["answer"] += 1
+        nomor = (counter["answer"] - 1) % len(fx["kunci"]) + 1
+        return fx["answer_token"], fx["answer_user"], nomor, rng.choice(OPSI), 0
+
+    def fresh_attempt():
+        # Attempt ongoing lengkap 200 jawaban, dibuat langsung agar setup tidak ikut terukur
+        counter["submit"] += 1
+        id_user = fx["peserta"][counter["submit"] % len(fx["peserta"])]
+        now = get_wita()
+        jawaban = {
+            f"soal_{i}": {"jawaban": rng.choice(OPSI), "ragu": 0, "timestamp": now.isoformat()}
+            for i in range(1, len(fx["kunci"]) + 1)
+        }
+        with engine.begin() as conn:
+            token = conn.execute(text("""
+                INSERT INTO hasiltryout (
+                    id_tryout, id_user, attempt_token, attempt_ke, start_time, end_time,
+                    tanggal_pengerjaan, jawaban_user, status_pengerjaan, status, created_at, updated_at
+                )
+                VALUES (:id_tryout, :id_user, :token, :attempt_ke, :now, NULL, :now, :jawaban,
+                        'ongoing', 1, :now, :now)
+                RETURNING attempt_token
+            """), {
+                "id_tryout": fx["id_tryout"], "id_user": id_user, "token": str(uuid.uuid4()),
+                "attempt_ke": 10_000 + counter["submit"], "now": now, "jawaban": json.dumps(jawaban),
+            }).scalar()
+        return str(token), id_user
+
+    def bulk_list():
+        counter["bulk"] += 1
+        formats = ("+62812{:07d}", "812{:07d}", "'0812{:07d}", "0812-{:07d}")
+        return ([
+            {
+                "nama": f"Peserta Bulk {counter['bulk']}-{i}",
+                "email": f"micro-bulk-{counter['bulk']:04d}-{i:02d}@{EMAIL_DOMAIN}",
+                "no_hp": formats[i % len(formats)].format(rng.randint(0, 9_999_999)),
+                "kelas": fx["kelas"]["nama_kelas"],
+            }
+            for i in range(20)
+        ],)
+
+    def quiet_bulk(peserta_list):
+        # insert_bulk_peserta mencetak seluruh input; output dibuang tapi biayanya tetap terukur
+        with contextlib.redirect_stdout(io.StringIO()):
+            return insert_bulk_peserta(peserta_list)
+
+    return [
+        Case("save_tryout_answer", save_tryout_answer, setup=next_answer),
+        Case("submit_tryout_attempt[200 soal]", submit_tryout_attempt, setup=fresh_attempt),
+        Case("get_leaderboard_tryout[limit 100]", get_leaderboard_tryout,
+             setup=lambda: (fx["id_tryout"], 100)),
+        Case("get_all_peserta_aktif[page 1]", get_all_peserta_aktif, setup=lambda: (1, 20)),
+        Case("get_all_peserta_aktif[search]", get_all_peserta_aktif, setup=lambda: (1, 20, "Peserta 4")),
+        Case("get_forum_thread_detail", get_forum_thread_detail, setup=lambda: (fx["id_thread"],)),
+        Case("insert_bulk_peserta[20 baris]", quiet_bulk, setup=bulk_list, max_rounds=5),
+    ]
+
+
+""" #=== Laporan ===# """
+
+def compare(baseline, current, tolerance):
+    problems = []
+    header = f"{'case':<38} {'rounds':>6} {'min':>9} {'median':>9} {'stddev':>9} {'baseline':>9} {'delta':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in current.items():
+        base = (baseline or {}).get(name)
+        delta = ""
+        if base:
+            change = stats["median_ms"] / max(base["median_ms"], 1e-9) - 1
+            delta = f"{change:+.1%}"
+            if change > tolerance:
+                problems.append(f"{name}: median {base['median_ms']} → {stats['median_ms']} ms ({delta})")
+        print(
+            f"{name:<38} {stats['rounds']:>6} {stats['min_ms']:>9} {stats['median_ms']:>9} "
+            f"{stats['stddev_ms']:>9} {base['median_ms'] if base else '-':>9} {delta:>8}"
+        )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark fungsi q_* & serializer")
+    parser.add_argument("-k", dest="keywords", action="append", help="Hanya case yang namanya memuat teks ini")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-db", action="store_true", help="Lewati case yang butuh database")
+    parser.add_argument("--force", action="store_true", help="Izinkan database yang bukan *_bench / *_test")
+    parser.add_argument("--keep-fixture", action="store_true", help="Jangan hapus data fixture di akhir")
+    parser.add_argument("--update", action="store_true", help="Tulis ulang baseline dari hasil run ini")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Regresi jika median naik lebih dari porsi ini (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = pure_cases(rng)
+    fx = None
+    if not args.no_db:
+        check_disposable(args.force)
+        fx = build_fixture(rng, args.force)
+        cases += db_cases(fx, rng)
+    if args.keywords:
+        cases = [c for c in cases if any(k in c.name for k in args.keywords)]
+
+    current = {}
+    try:
+        for case in cases:
+            current[case.name] = run_case(case, args.rounds, args.warmup)
+    finally:
+        if fx is not None and not args.keep_fixture:
+            reset(args.force)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    problems = compare(baseline, current, args.tolerance)
+
+    if args.update:
+        # Case yang tidak dijalankan kali ini (-k / --no-db) tetap dipertahankan
+        merged = {**(baseline or {}), **current}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+        print(f"\nBaseline ditulis: {args.baseline} ({len(current)} case diperbarui)")
+        return
+
+    for problem in problems:
+        print(f"[REGRESI] {problem}")
+    if baseline is None:
+        print(f"\nBaseline {args.baseline} belum ada, jalankan dengan --update")
+    print(f"\n{len(current)} case, {len(problems)} regresi")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Regresi query plan untuk query q_* yang paling sering dipanggil.
+
+Setiap skenario memanggil fungsi q_* yang sebenarnya (cache aplikasi dikosongkan
+dulu), semua SELECT yang dieksekusi ditangkap lalu di-EXPLAIN (FORMAT JSON).
+Yang dibandingkan dengan baseline per statement:
+    - bentuk plan: jenis node, tipe join & tabel yang di-scan (mis. Seq Scan baru
+      pada pesertakelas, Nested Loop → Hash Join, statement bertambah)
+    - estimasi jumlah row node teratas (gagal jika > baseline × --row-factor)
+
+Baseline dibuat terhadap database lokal yang sudah di-seed & di-ANALYZE
+(data berbeda → plan berbeda, jadi baseline hanya berlaku untuk seed yang sama):
+    python -m bench.bench_plans --update
+Lalu setiap perubahan query / migrasi dicek dengan:
+    python -m bench.bench_plans
+Exit code 1 jika ada regresi.
+"""
+import argparse
+import json
+import os
+
+from sqlalchemy import event, text
+
+from api.query.q_forum import get_all_forum_thread, get_forum_notifications, get_forum_thread_detail
+from api.query.q_hasiltryout import get_leaderboard_tryout, get_rekap_tryout_user
+from api.query.q_komentarmateri import get_komentar_by_materi
+from api.query.q_materi import (
+    get_materi_by_mentor, get_materi_by_mentor_and_kelas, get_materi_by_peserta_web
+)
+from api.query.q_modul import get_all_modul_by_user
+from api.query.q_tryout import get_tryout_list_by_user
+from api.utils.cache import catalog_cache, komentar_cache, membership_cache
+from api.utils.config import engine, replica_engine
+from api.utils.db_instrumentation import find_query_caller
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "plans.json")
+
+# Sampel id diambil dari data: entitas "terbesar" supaya plan mewakili kasus terberat
+SAMPLE_QUERIES = {
+    "peserta": """
+        SELECT id_user FROM pesertakelas WHERE status = 1
+        GROUP BY id_user ORDER BY COUNT(*) DESC, id_user LIMIT 1
+    """,
+    "mentor_kelas": """
+        SELECT id_user, id_paketkelas FROM mentorkelas WHERE status = 1
+        ORDER BY id_paketkelas, id_user LIMIT 1
+    """,
+    "tryout": """
+        SELECT id_tryout FROM hasiltryout WHERE status = 1
+        GROUP BY id_tryout ORDER BY COUNT(*) DESC, id_tryout LIMIT 1
+    """,
+    "thread": """
+        SELECT id_thread FROM forum_thread WHERE status = 1
+        ORDER BY comment_count DESC, id_thread LIMIT 1
+    """,
+    "komentar": """
+        SELECT id_materi, id_paketkelas FROM komentarmateri WHERE status = 1
+        GROUP BY id_materi, id_paketkelas ORDER BY COUNT(*) DESC LIMIT 1
+    """,
+}
+
+
+def load_samples():
+    samples = {}
+    with engine.connect() as conn:
+        for name, sql in SAMPLE_QUERIES.items():
+            samples[name] = conn.execute(text(sql)).first()
+    return samples
+
+
+def scenarios(s):
+    """nama → callable; skenario yang sampelnya tidak ada di database dilewati."""
+    items = {}
+    if s["peserta"]:
+        id_user = s["peserta"].id_user
+        items["materi_peserta"] = lambda: get_materi_by_peserta_web(id_user)
+        items["modul_peserta"] = lambda: get_all_modul_by_user(id_user, "peserta")
+        items["tryout_peserta"] = lambda: get_tryout_list_by_user(id_user, "peserta")
+        items["rekap_tryout_peserta"] = lambda: get_rekap_tryout_user(id_user)
+        items["notifikasi_forum"] = lambda: get_forum_notifications(id_user)
+    if s["mentor_kelas"]:
+        id_mentor, id_paketkelas = s["mentor_kelas"]
+        items["materi_mentor"] = lambda: get_materi_by_mentor(id_mentor)
+        items["materi_mentor_kelas"] = lambda: get_materi_by_mentor_and_kelas(id_mentor, id_paketkelas)
+    if s["tryout"]:
+        id_tryout = s["tryout"].id_tryout
+        items["leaderboard"] = lambda: get_leaderboard_tryout(id_tryout, 100)
+    if s["thread"]:
+        id_thread = s["thread"].id_thread
+        items["forum_thread_list"] = lambda: get_all_forum_thread(limit=20)
+        items["forum_thread_detail"] = lambda: get_forum_thread_detail(id_thread)
+    if s["komentar"]:
+        id_materi, id_paketkelas = s["komentar"]
+        items["komentar_materi"] = lambda: get_komentar_by_materi(id_materi, id_paketkelas)
+    return items
+
+
+def capture_selects(fn):
+    """Jalankan fn, return list (fungsi q_*, statement, parameter) untuk setiap SELECT."""
+    captured = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((find_query_caller(), statement, parameters))
+
+    engines = [e for e in (engine, replica_engine) if e is not None]
+    for e in engines:
+        event.listen(e, "before_cursor_execute", before)
+    try:
+        fn()
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", before)
+    return captured
+
+
+def plan_shape(node):
+    """Representasi ringkas plan: 'Hash Join(Seq Scan[materi], Index Scan[modul])'."""
+    label = node["Node Type"]
+    if node.get("Join Type"):
+        label += f"/{node['Join Type']}"
+    if node.get("Relation Name"):
+        label += f"[{node['Relation Name']}]"
+    children = [plan_shape(child) for child in node.get("Plans", ())]
+    return f"{label}({', '.join(children)})" if children else label
+
+
+def explain(statement, parameters):
+    with engine.connect() as conn:
+        result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    plan = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+    return {"shape": plan_shape(plan), "rows": plan["Plan Rows"], "cost": plan["Total Cost"]}
+
+
+def collect():
+    # Cache aplikasi dikosongkan agar semua query benar-benar dieksekusi
+    for cache in (catalog_cache, membership_cache, komentar_cache):
+        cache.clear()
+    plans = {}
+    for name, fn in scenarios(load_samples()).items():
+        plans[name] = [
+            {"fn": caller, **explain(statement, parameters)}
+            for caller, statement, parameters in capture_selects(fn)
+        ]
+    return plans
+
+
+def compare(baseline, current, row_factor):
+    """Return list pesan regresi (kosong = lolos)."""
+    problems = []
+    for name, statements in current.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"[baru] {name}: belum ada di baseline (jalankan --update)")
+            continue
+        if len(statements) != len(base):
+            problems.append(f"{name}: jumlah query {len(base)} → {len(statements)}")
+        for i, (old, new) in enumerate(zip(base, statements)):
+            where = f"{name}#{i} ({new['fn']})"
+            if old["shape"] != new["shape"]:
+                problems.append(f"{where}: bentuk plan berubah\n    lama: {old['shape']}\n    baru: {new['shape']}")
+            if new["rows"] > max(old["rows"], 1) * row_factor:
+                problems.append(f"{where}: estimasi row {old['rows']} → {new['rows']}")
+    for name in baseline.keys() - current.keys():
+        print(f"[hilang] {name}: ada di baseline tapi tidak dijalankan (sampel data kosong?)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regresi query plan q_*")
+    parser.add_argument("--update", action="store_true", help="Tulis ulang baseline dari database sekarang")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--row-factor", type=float, default=2.0,
+                        help="Gagal jika estimasi row > baseline × faktor ini")
+    args = parser.parse_args()
+
+    current = collect()
+    total = sum(len(v) for v in current.values())
+
+    if args.update:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"Baseline ditulis: {args.baseline} ({len(current)} skenario, {total} query)")
+        return
+
+    if not os.path.exists(args.baseline):
+        raise SystemExit(f"Baseline {args.baseline} belum ada, jalankan dengan --update")
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    problems = compare(baseline, current, args.row_factor)
+    for problem in problems:
+        print(f"[REGRESI] {problem}")
+    print(f"\n{len(current)} skenario, {total} query diperiksa, {len(problems)} regresi")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Microbenchmark serialisasi response list (tanpa database).
+
+Membandingkan jalur lama (dict(row) → serialize_* per row → json.dumps bawaan restx)
+dengan jalur baru (serialize_rows hasil compile per shape → json_output.dumps)
+untuk shape hasil get_hasiltryout_list dan get_all_peserta_aktif:
+    python -m bench.bench_serialize --rows 10000 --repeat 7
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from api.utils.helper import serialize_datetime_uuid, serialize_row
+from api.utils.json_output import dumps, orjson
+from api.utils.serializer import serialize_rows
+
+HASILTRYOUT_COLUMNS = (
+    "id_hasiltryout", "id_tryout", "id_user", "attempt_token", "attempt_ke", "start_time",
+    "end_time", "tanggal_pengerjaan", "nilai", "benar", "salah", "kosong",
+    "ragu_ragu", "status_pengerjaan", "nama_user", "nickname", "judul_tryout"
+)
+PESERTA_AKTIF_COLUMNS = (
+    "id_user", "nama", "email", "kode_pemulihan", "no_hp",
+    "nama_batch", "tanggal_mulai", "tanggal_selesai", "batch_status",
+    "tanggal_join", "status_enroll",
+    "nama_kelas", "id_paketkelas", "id_batch",
+    "id_paket", "nama_paket"
+)
+
+
+def make_hasiltryout_rows(n, rng):
+    Row = namedtuple("Row", HASILTRYOUT_COLUMNS)
+    base = datetime(2025, 1, 1, 7, 0)
+    rows = []
+    for i in range(n):
+        start = base + timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        rows.append(Row(
+            i + 1, rng.randint(1, 50), rng.randint(1, 5000), uuid.uuid4(), rng.randint(1, 3), start,
+            start + timedelta(minutes=rng.randint(30, 120)), start,
+            Decimal(f"{rng.uniform(0, 100):.2f}"), rng.randint(0, 100), rng.randint(0, 100),
+            rng.randint(0, 20), rng.randint(0, 10), "selesai", f"Peserta {i}", f"p{i}",
+            f"Tryout {rng.randint(1, 50)}"
+        ))
+    return rows
+
+
+def make_peserta_rows(n, rng):
+    Row = namedtuple("Row", PESERTA_AKTIF_COLUMNS)
+    rows = []
+    for i in range(n):
+        tanggal_mulai = date(2025, rng.randint(1, 12), rng.randint(1, 28))
+        punya_batch = rng.random() < 0.8
+        rows.append(Row(
+            i + 1, f"Peserta {i}", f"peserta{i}@mail.test", f"{rng.randint(0, 999999):06d}",
+            f"08{rng.randint(100000000, 999999999)}",
+            "Batch A" if punya_batch else None,
+            tanggal_mulai if punya_batch else None,
+            tanggal_mulai + timedelta(days=90) if punya_batch else None,
+            1 if punya_batch else None,
+            datetime(2025, 1, 1) + timedelta(hours=i) if punya_batch else None,
+            "approved" if punya_batch else None,
+            "Kelas Reguler", rng.randint(1, 20), rng.randint(1, 5), rng.randint(1, 3), "Paket UKAI"
+        ))
+    return rows
+
+
+def legacy_hasiltryout(rows):
+    # Meniru .mappings(): setiap row menjadi mapping dulu
+    data = [serialize_datetime_uuid(r._asdict()) for r in rows]
+    return json.dumps(data) + "\n"
+
+
+def legacy_peserta(rows):
+    data = [serialize_row(r._asdict()) for r in rows]
+    return json.dumps(data) + "\n"
+
+
+def fast_hasiltryout(rows):
+    return dumps(serialize_rows(rows, mode="iso"))
+
+
+def fast_peserta(rows):
+    return dumps(serialize_rows(rows, mode="date"))
+
+
+def measure(fn, rows, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark serialisasi row → JSON")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [
+        ("get_hasiltryout_list", make_hasiltryout_rows(args.rows, rng), legacy_hasiltryout, fast_hasiltryout),
+        ("get_all_peserta_aktif", make_peserta_rows(args.rows, rng), legacy_peserta, fast_peserta),
+    ]
+
+    print(f"rows={args.rows} repeat={args.repeat} encoder={'orjson' if orjson else 'json'}")
+    header = f"{'shape':<24} {'jalur':<8} {'min_ms':>9} {'median_ms':>10} {'speedup':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, rows, legacy, fast in cases:
+        # Hasil harus identik secara isi sebelum dibandingkan kecepatannya
+        assert json.loads(legacy(rows)) == json.loads(fast(rows)), f"Output berbeda untuk {name}"
+        old = measure(legacy, rows, args.repeat)
+        new = measure(fast, rows, args.repeat)
+        speedup = statistics.median(old) / statistics.median(new)
+        print(f"{name:<24} {'lama':<8} {min(old):>9.2f} {statistics.median(old):>10.2f} {'':>8}")
+        print(f"{name:<24} {'baru':<8} {min(new):>9.2f} {statistics.median(new):>10.2f} {speedup:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark konkurensi vote forum (simulasi klik paralel / klik ganda).
+
+Banyak user memberi vote ke satu komentar secara bersamaan, masing-masing
+beberapa kali (upvote, downvote, batal) dengan urutan acak. Setelah selesai
+diverifikasi bahwa tidak ada vote yang hilang:
+    - forum_comment.vote_score == SUM(forum_vote.vote_type)
+    - maksimal satu baris forum_vote per (komentar, user)
+    - vote_score == jumlah vote akhir yang diharapkan dari klik terakhir tiap user
+
+Jalankan dari root repo terhadap database development (sudah migrasi 004 & 006):
+    python -m bench.bench_votes --id-comment 123 --users 200 --clicks 5 --concurrency 50
+Vote milik user bench dihapus lagi di akhir (--keep untuk membiarkannya).
+"""
+import argparse
+import random
+from collections import defaultdict
+
+from sqlalchemy import text
+
+from api.query.q_forum import add_or_update_vote, delete_vote
+from api.utils.config import engine
+from .common import print_report, run_concurrent, summarize
+
+
+def pick_users(n):
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT id_user FROM users WHERE status = 1 ORDER BY id_user LIMIT :n
+        """), {"n": n}).scalars().all()
+
+
+def read_state(id_comment, users):
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT
+                (SELECT vote_score FROM forum_comment WHERE id_comment = :id_comment) AS vote_score,
+                (SELECT COALESCE(SUM(vote_type), 0) FROM forum_vote WHERE id_comment = :id_comment) AS total_vote,
+                (SELECT COALESCE(SUM(vote_type), 0) FROM forum_vote
+                  WHERE id_comment = :id_comment AND id_user = ANY(:users)) AS bench_vote,
+                (SELECT COUNT(*) FROM (
+                    SELECT id_user FROM forum_vote WHERE id_comment = :id_comment
+                    GROUP BY id_user HAVING COUNT(*) > 1
+                ) d) AS duplikat
+        """), {"id_comment": id_comment, "users": list(users)}).mappings().first()
+
+
+def cleanup(id_comment, users):
+    for id_user in users:
+        delete_vote(id_comment, id_user)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark konkurensi vote forum")
+    parser.add_argument("--id-comment", type=int, required=True)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--clicks", type=int, default=5, help="Jumlah klik per user")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Jangan hapus vote hasil bench")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    users = pick_users(args.users)
+    if not users:
+        raise SystemExit("Tidak ada user aktif untuk bench")
+
+    cleanup(args.id_comment, users)
+    before = read_state(args.id_comment, users)
+    if before["vote_score"] is None:
+        raise SystemExit(f"Komentar {args.id_comment} tidak ditemukan")
+
+    # Klik per user dieksekusi berurutan (seperti satu browser), antar user paralel.
+    # Klik ganda disimulasikan dengan mengulang aksi yang sama.
+    plans = []
+    for id_user in users:
+        clicks = []
+        for _ in range(args.clicks):
+            action = rng.choice((1, -1, 0))
+            clicks.append(action)
+            if rng.random() < 0.3:
+                clicks.append(action)
+        plans.append((id_user, clicks))
+
+    expected = defaultdict(int)
+
+    def run_user(plan):
+        id_user, clicks = plan
+        for action in clicks:
+            if action == 0:
+                result = delete_vote(args.id_comment, id_user)
+            else:
+                result = add_or_update_vote(args.id_comment, id_user, action)
+            if result is None:
+                return False
+        expected[id_user] = clicks[-1]
+        return True
+
+    durations, errors, wall = run_concurrent(run_user, plans, args.concurrency)
+    total_clicks = sum(len(c) for _, c in plans)
+    report = summarize(f"vote x{total_clicks} klik ({len(users)} user)", durations, wall, errors)
+    print_report([report])
+
+    after = read_state(args.id_comment, users)
+    expected_bench = sum(expected.values())
+    print(f"\nvote_score sebelum : {before['vote_score']}")
+    print(f"vote_score sesudah : {after['vote_score']}")
+    print(f"SUM(forum_vote)    : {after['total_vote']}")
+    print(f"vote user bench    : {after['bench_vote']} (diharapkan {expected_bench})")
+    print(f"duplikat vote      : {after['duplikat']}")
+
+    ok = (
+        errors == 0
+        and after["vote_score"] == after["total_vote"]
+        and after["bench_vote"] == expected_bench
+        and after["duplikat"] == 0
+    )
+    if not args.keep:
+        cleanup(args.id_comment, users)
+    print("\nHASIL:", "OK, tidak ada vote hilang" if ok else "GAGAL, counter/vote tidak konsisten")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
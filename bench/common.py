@@ -0,0 +1,63 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, pct):
+    """Percentile sederhana (nearest-rank) dari list durasi."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+def summarize(label, durations_ms, wall_seconds, errors=0):
+    total = len(durations_ms)
+    return {
+        "label": label,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / wall_seconds, 2) if wall_seconds else 0.0,
+        "mean_ms": round(statistics.fmean(durations_ms), 2) if durations_ms else 0.0,
+        "p50_ms": round(percentile(durations_ms, 50), 2),
+        "p95_ms": round(percentile(durations_ms, 95), 2),
+        "p99_ms": round(percentile(durations_ms, 99), 2),
+    }
+
+
+def print_report(rows):
+    header = f"{'label':<40} {'req':>7} {'err':>5} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['label']:<40} {r['requests']:>7} {r['errors']:>5} {r['throughput_rps']:>9} "
+            f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}"
+        )
+
+
+def run_concurrent(fn, items, concurrency):
+    """
+    Jalankan fn(item) secara paralel, return (durations_ms, errors, wall_seconds).
+    fn dianggap gagal jika raise atau return False.
+    """
+    durations = []
+    errors = 0
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            ok = fn(item)
+        except Exception as e:
+            print(f"[bench] error: {e}")
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok is not False
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for duration, ok in executor.map(timed, items):
+            durations.append(duration)
+            if not ok:
+                errors += 1
+    return durations, errors, time.perf_counter() - wall_start
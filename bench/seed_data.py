@@ -0,0 +1,364 @@
+"""
+Generator dataset sintetis (deterministik per --seed) untuk database Postgres lokal.
+
+Volume default mendekati hari ujian: 20k peserta, 200 mentor, beberapa batch &
+paket kelas, tryout 200 soal dan jutaan baris hasiltryout. Data dimasukkan lewat
+COPY (psycopg2) per potongan sehingga jutaan baris tetap cepat, lalu di-ANALYZE.
+
+Semua akun memakai password yang sama (--password), di-hash sekali dengan
+PASSWORD_HASH_METHOD aplikasi sehingga login tidak memicu rehash:
+    peserta : seed-peserta-00001@bench.local ...
+    mentor  : seed-mentor-0001@bench.local ...
+Tryout hasil seed berjudul "[seed] ..." dengan visibility open & max_attempt besar,
+jadi bisa langsung dipakai bench.bench_exam_day.
+
+Hanya untuk database disposable: nama database harus berakhiran _bench / _test
+(atau --force), dicek sebelum insert maupun --reset:
+    python -m bench.seed_data --reset
+    python -m bench.seed_data --users 2000 --attempts 100000 --accounts-out akun.csv
+
+hasiltryout: hanya sebagian kecil baris (--answers-ratio) yang menyimpan jawaban_user
+lengkap (±12 KB per 200 soal); sisanya cukup kolom agregat (nilai, benar, ...)
+yang dibaca leaderboard & rekap, agar ukuran database tetap wajar.
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+from api.utils.config import engine, get_wita
+from api.utils.password import PASSWORD_HASH_METHOD
+
+EMAIL_DOMAIN = "bench.local"
+SEED_PREFIX = "[seed]"
+COPY_CHUNK = 50_000
+DISPOSABLE_SUFFIXES = ("_bench", "_test")
+OPSI = "ABCDE"
+SEEDED_TABLES = (
+    "batch", "paket", "paketkelas", "users", "userbatch", "pesertakelas",
+    "mentorkelas", "tryout", "soaltryout", "to_paketkelas", "hasiltryout",
+)
+
+
+def copy_rows(table, columns, rows):
+    """COPY rows (iterable tuple) ke table per potongan, return jumlah baris."""
+    raw = engine.raw_connection()
+    total = 0
+    try:
+        cursor = raw.cursor()
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        buf, pending = io.StringIO(), 0
+        writer = csv.writer(buf)
+        for row in rows:
+            writer.writerow(["" if v is None else v for v in row])
+            pending += 1
+            if pending >= COPY_CHUNK:
+                buf.seek(0)
+                cursor.copy_expert(sql, buf)
+                total += pending
+                buf, pending = io.StringIO(), 0
+                writer = csv.writer(buf)
+        if pending:
+            buf.seek(0)
+            cursor.copy_expert(sql, buf)
+            total += pending
+        raw.commit()
+    finally:
+        raw.close()
+    return total
+
+
+def fetch_ids(sql, params=None):
+    with engine.connect() as conn:
+        return conn.execute(text(sql), params or {}).scalars().all()
+
+
+def check_disposable(force=False):
+    database = engine.url.database or ""
+    if not force and not database.endswith(DISPOSABLE_SUFFIXES):
+        raise SystemExit(
+            f"Database '{database}' tidak tampak disposable (akhiran {DISPOSABLE_SUFFIXES}); "
+            "pakai database khusus benchmark atau --force"
+        )
+
+
+def reset(force=False):
+    """Hapus data seed sebelumnya (dikenali dari domain email & prefix judul/nama)."""
+    check_disposable(force)
+    like_email = f"%@{EMAIL_DOMAIN}"
+    like_seed = f"{SEED_PREFIX}%"
+    with engine.begin() as conn:
+        users = {"users": conn.execute(text(
+            "SELECT id_user FROM users WHERE email LIKE :e"), {"e": like_email}).scalars().all()}
+        tryouts = {"ids": conn.execute(text(
+            "SELECT id_tryout FROM tryout WHERE judul LIKE :s"), {"s": like_seed}).scalars().all()}
+        conn.execute(text("DELETE FROM hasiltryout WHERE id_tryout = ANY(:ids)"), tryouts)
+        conn.execute(text("DELETE FROM hasiltryout WHERE id_user = ANY(:users)"), users)
+        conn.execute(text("DELETE FROM to_paketkelas WHERE id_tryout = ANY(:ids)"), tryouts)
+        conn.execute(text("DELETE FROM soaltryout WHERE id_tryout = ANY(:ids)"), tryouts)
+        conn.execute(text("DELETE FROM tryout WHERE id_tryout = ANY(:ids)"), tryouts)
+        threads = {"threads": conn.execute(text(
+            "SELECT id_thread FROM forum_thread WHERE id_user = ANY(:users)"), users).scalars().all()}
+        conn.execute(text("""
+            DELETE FROM forum_vote WHERE id_user = ANY(:users)
+               OR id_comment IN (SELECT id_comment FROM forum_comment WHERE id_thread = ANY(:threads))
+        """), {**users, **threads})
+        conn.execute(text("""
+            DELETE FROM forum_notification WHERE id_user = ANY(:users) OR id_thread = ANY(:threads)
+        """), {**users, **threads})
+        conn.execute(text("""
+            DELETE FROM forum_thread_subscription WHERE id_user = ANY(:users) OR id_thread = ANY(:threads)
+        """), {**users, **threads})
+        conn.execute(text("DELETE FROM forum_notification_counter WHERE id_user = ANY(:users)"), users)
+        # Balasan dulu baru komentar induknya (parent_id mereferensikan forum_comment)
+        conn.execute(text("""
+            DELETE FROM forum_comment WHERE parent_id IS NOT NULL
+              AND (id_user = ANY(:users) OR id_thread = ANY(:threads))
+        """), {**users, **threads})
+        conn.execute(text("""
+            DELETE FROM forum_comment WHERE id_user = ANY(:users) OR id_thread = ANY(:threads)
+        """), {**users, **threads})
+        conn.execute(text("DELETE FROM forum_thread WHERE id_thread = ANY(:threads)"), threads)
+        for table in ("sessions", "userbatch", "pesertakelas", "mentorkelas"):
+            conn.execute(text(f"DELETE FROM {table} WHERE id_user = ANY(:users)"), users)
+        conn.execute(text("""
+            DELETE FROM paketkelas WHERE nama_kelas LIKE :s
+        """), {"s": like_seed})
+        conn.execute(text("DELETE FROM users WHERE id_user = ANY(:users)"), users)
+        conn.execute(text("DELETE FROM paket WHERE nama_paket LIKE :s"), {"s": like_seed})
+        conn.execute(text("DELETE FROM batch WHERE nama_batch LIKE :s"), {"s": like_seed})
+    print(f"Reset: {len(users['users'])} user & {len(tryouts['ids'])} tryout seed dihapus")
+
+
+def seed_struktur(rng, args, now, password_hash):
+    """Batch, paket, user, paket kelas & keanggotaan. Return dict id yang dipakai tahap berikutnya."""
+    copy_rows("batch", ("nama_batch", "tanggal_mulai", "tanggal_selesai", "status", "created_at", "updated_at"), (
+        (f"{SEED_PREFIX} Batch {b + 1}", (now - timedelta(days=30 * (b + 1))).date(),
+         (now + timedelta(days=180)).date(), 1, now, now)
+        for b in range(args.batches)
+    ))
+    batch_ids = fetch_ids("SELECT id_batch FROM batch WHERE nama_batch LIKE :s ORDER BY id_batch",
+                          {"s": f"{SEED_PREFIX}%"})
+    copy_rows("paket", ("nama_paket", "status"), (
+        (f"{SEED_PREFIX} Paket {p + 1}", 1) for p in range(args.pakets)
+    ))
+    paket_ids = fetch_ids("SELECT id_paket FROM paket WHERE nama_paket LIKE :s ORDER BY id_paket",
+                          {"s": f"{SEED_PREFIX}%"})
+
+    user_columns = ("nama", "nickname", "email", "password", "kode_pemulihan", "role",
+                    "status", "created_at", "updated_at", "no_hp")
+    copy_rows("users", user_columns, (
+        (f"Mentor {i + 1}", f"mentor{i + 1}", f"seed-mentor-{i + 1:04d}@{EMAIL_DOMAIN}", password_hash,
+         uuid.UUID(int=rng.getrandbits(128)).hex[:8], "mentor", 1, now, now, f"0812{i:08d}")
+        for i in range(args.mentors)
+    ))
+    copy_rows("users", user_columns, (
+        (f"Peserta {i + 1}", None, f"seed-peserta-{i + 1:05d}@{EMAIL_DOMAIN}", password_hash,
+         uuid.UUID(int=rng.getrandbits(128)).hex[:8], "peserta",
+         1 if rng.random() > args.inactive_ratio else 0, now, now, f"0813{i:08d}")
+        for i in range(args.users)
+    ))
+    mentor_ids = fetch_ids("SELECT id_user FROM users WHERE email LIKE :e ORDER BY id_user",
+                           {"e": f"seed-mentor-%@{EMAIL_DOMAIN}"})
+    peserta_ids = fetch_ids("SELECT id_user FROM users WHERE email LIKE :e ORDER BY id_user",
+                            {"e": f"seed-peserta-%@{EMAIL_DOMAIN}"})
+
+    kelas_rows = []
+    for id_batch in batch_ids:
+        for k in range(args.kelas_per_batch):
+            kelas_rows.append((id_batch, rng.choice(paket_ids), rng.choice(mentor_ids),
+                               f"{SEED_PREFIX} Kelas {id_batch}-{k + 1}", "Kelas hasil seed", 1, now, now))
+    copy_rows("paketkelas", ("id_batch", "id_paket", "id_user", "nama_kelas", "deskripsi",
+                             "status", "created_at", "updated_at"), kelas_rows)
+    with engine.connect() as conn:
+        kelas = conn.execute(text("""
+            SELECT id_paketkelas, id_batch FROM paketkelas WHERE nama_kelas LIKE :s ORDER BY id_paketkelas
+        """), {"s": f"{SEED_PREFIX}%"}).fetchall()
+
+    # Peserta: satu kelas aktif (+ riwayat kelas lama nonaktif), batch kelasnya di userbatch
+    kelas_peserta = {}
+    pk_rows, ub_rows = [], []
+    for id_user in peserta_ids:
+        id_paketkelas, id_batch = rng.choice(kelas)
+        kelas_peserta[id_user] = id_paketkelas
+        pk_rows.append((id_user, id_paketkelas, 1, now, now))
+        ub_rows.append((id_user, id_batch, now - timedelta(days=rng.randint(1, 120)), 1, now, now))
+        if rng.random() < args.history_ratio:
+            lama, _ = rng.choice(kelas)
+            if lama != id_paketkelas:
+                pk_rows.append((id_user, lama, 0, now, now))
+    copy_rows("pesertakelas", ("id_user", "id_paketkelas", "status", "created_at", "updated_at"), pk_rows)
+    copy_rows("userbatch", ("id_user", "id_batch", "tanggal_join", "status", "created_at", "updated_at"), ub_rows)
+    copy_rows("mentorkelas", ("id_user", "id_paketkelas", "status", "created_at", "updated_at"), (
+        (rng.choice(mentor_ids), id_paketkelas, 1, now, now) for id_paketkelas, _ in kelas
+    ))
+    return {
+        "peserta": peserta_ids,
+        "mentor": mentor_ids,
+        "kelas": [id_paketkelas for id_paketkelas, _ in kelas],
+        "kelas_peserta": kelas_peserta,
+    }
+
+
+def seed_tryout(rng, args, now, ids):
+    copy_rows("tryout", ("judul", "jumlah_soal", "durasi", "max_attempt", "status", "visibility",
+                         "access_start_at", "access_end_at", "created_at", "updated_at"), (
+        (f"{SEED_PREFIX} Tryout {t + 1}", args.soal, 200, args.max_attempt, 1, "open",
+         now - timedelta(days=60), now + timedelta(days=60), now - timedelta(days=60 - t), now)
+        for t in range(args.tryouts)
+    ))
+    tryout_ids = fetch_ids("SELECT id_tryout FROM tryout WHERE judul LIKE :s ORDER BY id_tryout",
+                           {"s": f"{SEED_PREFIX}%"})
+
+    kunci = {}
+    soal_rows = []
+    for id_tryout in tryout_ids:
+        kunci[id_tryout] = [rng.choice(OPSI) for _ in range(args.soal)]
+        for nomor, jawaban in enumerate(kunci[id_tryout], start=1):
+            soal_rows.append((
+                id_tryout, nomor, f"Soal {nomor}: kasus klinis sintetis nomor {nomor} tryout {id_tryout}?",
+                *(f"Pilihan {o} soal {nomor}" for o in OPSI),
+                jawaban, f"Pembahasan soal {nomor}", 1, now, now,
+            ))
+    copy_rows("soaltryout", ("id_tryout", "nomor_urut", "pertanyaan", "pilihan_a", "pilihan_b", "pilihan_c",
+                             "pilihan_d", "pilihan_e", "jawaban_benar", "pembahasan", "status",
+                             "created_at", "updated_at"), soal_rows)
+
+    tryout_kelas = {}
+    tp_rows = []
+    for id_paketkelas in ids["kelas"]:
+        chosen = rng.sample(tryout_ids, min(args.tryouts_per_kelas, len(tryout_ids)))
+        tryout_kelas[id_paketkelas] = chosen
+        tp_rows.extend((id_tryout, id_paketkelas, 1, now, now) for id_tryout in chosen)
+    copy_rows("to_paketkelas", ("id_tryout", "id_paketkelas", "status", "created_at", "updated_at"), tp_rows)
+    return kunci, tryout_kelas
+
+
+def hasil_rows(rng, args, now, ids, kunci, tryout_kelas):
+    """Generator baris hasiltryout: attempt submitted tersebar di tryout kelas masing-masing peserta."""
+    per_user = max(1, args.attempts // max(1, len(ids["peserta"])))
+    for id_user in ids["peserta"]:
+        tryouts = tryout_kelas.get(ids["kelas_peserta"][id_user])
+        if not tryouts:
+            continue
+        attempt_ke = {}
+        for _ in range(per_user):
+            id_tryout = rng.choice(tryouts)
+            attempt_ke[id_tryout] = attempt_ke.get(id_tryout, 0) + 1
+            start = now - timedelta(days=rng.randint(0, 59), minutes=rng.randint(0, 1440))
+            end = start + timedelta(minutes=rng.randint(30, 200))
+            kemampuan = rng.random()
+            benar = salah = kosong = ragu_ragu = 0
+            jawaban_user = {}
+            lengkap = rng.random() < args.answers_ratio
+            for nomor, kunci_soal in enumerate(kunci[id_tryout], start=1):
+                r = rng.random()
+                if r < 0.05:
+                    jawaban = None
+                    kosong += 1
+                elif r < 0.05 + kemampuan * 0.9:
+                    jawaban = kunci_soal
+                    benar += 1
+                else:
+                    jawaban = rng.choice([o for o in OPSI if o != kunci_soal])
+                    salah += 1
+                ragu = 1 if rng.random() < 0.1 else 0
+                ragu_ragu += ragu
+                if lengkap:
+                    jawaban_user[f"soal_{nomor}"] = {"jawaban": jawaban, "ragu": ragu, "timestamp": end.isoformat()}
+            nilai = round(benar / len(kunci[id_tryout]) * 100, 2)
+            yield (
+                id_tryout, id_user, uuid.UUID(int=rng.getrandbits(128), version=4), attempt_ke[id_tryout],
+                start, end, start, json.dumps(jawaban_user, separators=(",", ":")), "submitted",
+                nilai, benar, salah, kosong, ragu_ragu, 1, end, end,
+            )
+
+
+def write_accounts(path, ids, password, limit):
+    with engine.connect() as conn:
+        emails = conn.execute(text("""
+            SELECT email FROM users WHERE id_user = ANY(:ids) AND status = 1 ORDER BY id_user LIMIT :n
+        """), {"ids": ids["peserta"], "n": limit}).scalars().all()
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["email", "password"])
+        writer.writerows((email, password) for email in emails)
+    print(f"Akun peserta ditulis: {path} ({len(emails)} akun)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Seed dataset sintetis untuk benchmark")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=20_000, help="Jumlah peserta")
+    parser.add_argument("--mentors", type=int, default=200)
+    parser.add_argument("--batches", type=int, default=8)
+    parser.add_argument("--pakets", type=int, default=4)
+    parser.add_argument("--kelas-per-batch", type=int, default=25)
+    parser.add_argument("--tryouts", type=int, default=40)
+    parser.add_argument("--tryouts-per-kelas", type=int, default=10)
+    parser.add_argument("--soal", type=int, default=200, help="Jumlah soal per tryout")
+    parser.add_argument("--max-attempt", type=int, default=1000)
+    parser.add_argument("--attempts", type=int, default=2_000_000, help="Target jumlah baris hasiltryout")
+    parser.add_argument("--answers-ratio", type=float, default=0.02,
+                        help="Porsi hasiltryout dengan jawaban_user lengkap")
+    parser.add_argument("--inactive-ratio", type=float, default=0.02)
+    parser.add_argument("--history-ratio", type=float, default=0.2, help="Porsi peserta dengan kelas lama nonaktif")
+    parser.add_argument("--password", default="bench12345")
+    parser.add_argument("--accounts-out", help="Tulis CSV email,password peserta (untuk bench_login / exam_day)")
+    parser.add_argument("--accounts-limit", type=int, default=2000)
+    parser.add_argument("--reset", action="store_true", help="Hapus data seed lama sebelum seed")
+    parser.add_argument("--force", action="store_true", help="Izinkan database yang bukan *_bench / *_test")
+    return parser
+
+
+def seed(args):
+    """Jalankan seluruh tahap seed, return (ids, kunci jawaban per tryout, tryout per kelas)."""
+    check_disposable(args.force)
+    rng = random.Random(args.seed)
+    now = get_wita().replace(microsecond=0)
+    if args.reset:
+        reset(args.force)
+
+    password_hash = generate_password_hash(args.password, method=PASSWORD_HASH_METHOD)
+    ids = seed_struktur(rng, args, now, password_hash)
+    print(f"Struktur: {len(ids['peserta'])} peserta, {len(ids['mentor'])} mentor, {len(ids['kelas'])} kelas")
+
+    kunci, tryout_kelas = seed_tryout(rng, args, now, ids)
+    print(f"Tryout: {len(kunci)} tryout x {args.soal} soal")
+
+    total = copy_rows("hasiltryout", (
+        "id_tryout", "id_user", "attempt_token", "attempt_ke", "start_time", "end_time", "tanggal_pengerjaan",
+        "jawaban_user", "status_pengerjaan", "nilai", "benar", "salah", "kosong", "ragu_ragu",
+        "status", "created_at", "updated_at",
+    ), hasil_rows(rng, args, now, ids, kunci, tryout_kelas))
+    print(f"hasiltryout: {total} baris")
+
+    analyze(SEEDED_TABLES)
+    return ids, kunci, tryout_kelas
+
+
+def analyze(tables):
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in tables:
+            conn.execute(text(f"ANALYZE {table}"))
+
+
+def main():
+    args = build_parser().parse_args()
+    started = time.perf_counter()
+    ids, _, _ = seed(args)
+    if args.accounts_out:
+        write_accounts(args.accounts_out, ids, args.password, args.accounts_limit)
+    print(f"Selesai dalam {time.perf_counter() - started:.1f} detik")
+
+
+if __name__ == "__main__":
+    main()
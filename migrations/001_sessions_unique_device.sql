@@ -0,0 +1,12 @@
+-- Satu baris session per (user, device) agar login bisa memakai
+-- INSERT ... ON CONFLICT (id_user, device_type) DO UPDATE.
+
+-- Bersihkan duplikat lama, sisakan session terbaru per (id_user, device_type)
+DELETE FROM sessions s
+USING sessions s2
+WHERE s.id_user = s2.id_user
+  AND s.device_type = s2.device_type
+  AND s.id_session < s2.id_session;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_sessions_user_device
+    ON sessions (id_user, device_type);
@@ -0,0 +1,53 @@
+-- Counter denormalisasi per thread forum agar daftar thread tidak perlu
+-- JOIN + GROUP BY ke seluruh forum_comment.
+--   comment_count : jumlah komentar yang belum dihapus (is_deleted = FALSE)
+--   last_activity : waktu komentar terakhir (atau waktu thread dibuat), jam aplikasi
+--                   (get_wita(), Asia/Jakarta) seperti created_at thread & komentar;
+--                   default di bawah memakai zona yang sama, bukan NOW() zona database
+--   is_solved     : sudah ada, dijaga oleh mark/unmark solved & hapus komentar
+-- Dijaga transaksional oleh q_forum.create_forum_comment / soft_delete_forum_comment.
+
+ALTER TABLE forum_thread
+    ADD COLUMN IF NOT EXISTS comment_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS last_activity TIMESTAMP;
+
+-- Backfill dari data lama
+UPDATE forum_thread ft
+SET comment_count = c.total,
+    last_activity = GREATEST(ft.created_at, c.terakhir)
+FROM (
+    SELECT id_thread,
+           COUNT(*) FILTER (WHERE is_deleted = FALSE) AS total,
+           MAX(created_at) AS terakhir
+    FROM forum_comment
+    GROUP BY id_thread
+) c
+WHERE c.id_thread = ft.id_thread;
+
+UPDATE forum_thread SET last_activity = COALESCE(created_at, NOW() AT TIME ZONE 'Asia/Jakarta') WHERE last_activity IS NULL;
+
+ALTER TABLE forum_thread
+    ALTER COLUMN last_activity SET DEFAULT (NOW() AT TIME ZONE 'Asia/Jakarta'),
+    ALTER COLUMN last_activity SET NOT NULL;
+
+-- Solved answer yang komentarnya sudah dihapus tidak lagi dihitung solved
+UPDATE forum_comment SET is_solved_answer = FALSE
+WHERE is_deleted = TRUE AND is_solved_answer = TRUE;
+
+UPDATE forum_thread ft SET is_solved = EXISTS (
+    SELECT 1 FROM forum_comment fc
+    WHERE fc.id_thread = ft.id_thread AND fc.is_solved_answer = TRUE
+);
+
+-- Keyset paging: ORDER BY last_activity DESC, id_thread DESC
+CREATE INDEX IF NOT EXISTS ix_forum_thread_activity
+    ON forum_thread (last_activity DESC, id_thread DESC)
+    WHERE status = 1;
+
+CREATE INDEX IF NOT EXISTS ix_forum_thread_batch_activity
+    ON forum_thread (id_batch, last_activity DESC, id_thread DESC)
+    WHERE status = 1;
+
+CREATE INDEX IF NOT EXISTS ix_forum_thread_materi_activity
+    ON forum_thread (id_materi, last_activity DESC, id_thread DESC)
+    WHERE status = 1;
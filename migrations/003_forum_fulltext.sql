@@ -0,0 +1,41 @@
+-- Full-text search forum: kolom tsvector (generated, otomatis terjaga saat
+-- INSERT/UPDATE) + index GIN, menggantikan ILIKE '%term%' (sequential scan).
+-- Config "forum_search" memakai stemmer Snowball "indonesian" bila tersedia
+-- di server Postgres, selain itu "simple" (tanpa stemming).
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'forum_search') THEN
+        IF EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'indonesian') THEN
+            CREATE TEXT SEARCH CONFIGURATION forum_search (COPY = indonesian);
+        ELSE
+            CREATE TEXT SEARCH CONFIGURATION forum_search (COPY = simple);
+        END IF;
+    END IF;
+END
+$$;
+
+-- Judul berbobot A, isi berbobot B (ts_rank memberi judul skor lebih tinggi).
+-- Tag HTML dibuang agar tidak ikut terindeks.
+ALTER TABLE forum_thread
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('forum_search'::regconfig, COALESCE(judul, '')), 'A') ||
+        setweight(to_tsvector('forum_search'::regconfig,
+                  regexp_replace(COALESCE(isi, ''), '<[^>]+>', ' ', 'g')), 'B')
+    ) STORED;
+
+ALTER TABLE forum_comment
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('forum_search'::regconfig,
+                  regexp_replace(COALESCE(isi, ''), '<[^>]+>', ' ', 'g')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_forum_thread_search
+    ON forum_thread USING GIN (search_vector)
+    WHERE status = 1;
+
+CREATE INDEX IF NOT EXISTS ix_forum_comment_search
+    ON forum_comment USING GIN (search_vector)
+    WHERE is_deleted = FALSE;
@@ -0,0 +1,42 @@
+-- Counter denormalisasi per komentar forum agar pohon komentar bisa
+-- dipaging per level tanpa SUM(forum_vote) & tanpa memuat seluruh thread.
+--   vote_score  : SUM(forum_vote.vote_type), dijaga add_or_update_vote / delete_vote
+--   reply_count : jumlah balasan langsung, dijaga create_forum_comment
+
+ALTER TABLE forum_comment
+    ADD COLUMN IF NOT EXISTS vote_score INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS reply_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill dari data lama
+UPDATE forum_comment fc
+SET vote_score = v.total
+FROM (
+    SELECT id_comment, SUM(vote_type) AS total
+    FROM forum_vote
+    GROUP BY id_comment
+) v
+WHERE v.id_comment = fc.id_comment;
+
+UPDATE forum_comment fc
+SET reply_count = r.total
+FROM (
+    SELECT parent_id, COUNT(*) AS total
+    FROM forum_comment
+    WHERE parent_id IS NOT NULL
+    GROUP BY parent_id
+) r
+WHERE r.parent_id = fc.id_comment;
+
+-- Komentar level atas per thread: urut waktu & urut vote
+CREATE INDEX IF NOT EXISTS ix_forum_comment_root_time
+    ON forum_comment (id_thread, created_at, id_comment)
+    WHERE parent_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_forum_comment_root_votes
+    ON forum_comment (id_thread, vote_score DESC, id_comment)
+    WHERE parent_id IS NULL;
+
+-- Balasan per komentar induk
+CREATE INDEX IF NOT EXISTS ix_forum_comment_replies
+    ON forum_comment (parent_id, created_at, id_comment)
+    WHERE parent_id IS NOT NULL;
@@ -0,0 +1,41 @@
+-- Fan-out notifikasi forum:
+--   forum_thread_subscription  : penerima notifikasi per thread (pembuat thread,
+--                                 user yang berkomentar, atau subscribe manual)
+--   forum_notification_counter : jumlah notifikasi belum dibaca per user (badge O(1))
+-- Dijaga oleh q_forum (create thread/komentar, mark solved, read/delete notifikasi).
+
+CREATE TABLE IF NOT EXISTS forum_thread_subscription (
+    id_thread  INTEGER   NOT NULL REFERENCES forum_thread (id_thread),
+    id_user    INTEGER   NOT NULL REFERENCES users (id_user),
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id_thread, id_user)
+);
+
+CREATE TABLE IF NOT EXISTS forum_notification_counter (
+    id_user      INTEGER PRIMARY KEY REFERENCES users (id_user),
+    unread_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Backfill subscription: pembuat thread + semua yang pernah berkomentar
+INSERT INTO forum_thread_subscription (id_thread, id_user)
+SELECT id_thread, id_user FROM forum_thread
+UNION
+SELECT id_thread, id_user FROM forum_comment
+ON CONFLICT DO NOTHING;
+
+-- Backfill counter unread
+INSERT INTO forum_notification_counter (id_user, unread_count)
+SELECT id_user, COUNT(*)
+FROM forum_notification
+WHERE is_read = FALSE
+GROUP BY id_user
+ON CONFLICT (id_user) DO UPDATE SET unread_count = EXCLUDED.unread_count;
+
+-- Keyset paging daftar notifikasi: ORDER BY created_at DESC, id_notification DESC
+CREATE INDEX IF NOT EXISTS ix_forum_notification_user_time
+    ON forum_notification (id_user, created_at DESC, id_notification DESC);
+
+-- Mark-all-read hanya menyentuh yang belum dibaca
+CREATE INDEX IF NOT EXISTS ix_forum_notification_user_unread
+    ON forum_notification (id_user)
+    WHERE is_read = FALSE;
@@ -0,0 +1,18 @@
+-- Satu vote per (komentar, user) agar add_or_update_vote bisa memakai
+-- INSERT ... ON CONFLICT (id_comment, id_user) DO UPDATE secara idempoten.
+
+-- Bersihkan duplikat lama (hasil klik ganda sebelum constraint ini ada),
+-- sisakan vote terbaru per (id_comment, id_user)
+DELETE FROM forum_vote v
+USING forum_vote v2
+WHERE v.id_comment = v2.id_comment
+  AND v.id_user = v2.id_user
+  AND (v.created_at, v.ctid) < (v2.created_at, v2.ctid);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_forum_vote_comment_user
+    ON forum_vote (id_comment, id_user);
+
+-- Counter vote_score disesuaikan ulang setelah duplikat dibuang
+UPDATE forum_comment fc
+SET vote_score = COALESCE((SELECT SUM(v.vote_type) FROM forum_vote v WHERE v.id_comment = fc.id_comment), 0)
+WHERE fc.vote_score <> COALESCE((SELECT SUM(v.vote_type) FROM forum_vote v WHERE v.id_comment = fc.id_comment), 0);
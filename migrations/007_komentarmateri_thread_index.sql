@@ -0,0 +1,5 @@
+-- Komentar materi berbentuk pohon: halaman komentar utama (parent_id IS NULL)
+-- dan balasan per komentar induk diambil lewat index yang sama.
+CREATE INDEX IF NOT EXISTS ix_komentarmateri_thread
+    ON komentarmateri (id_materi, id_paketkelas, parent_id, created_at)
+    WHERE status = 1;
@@ -0,0 +1,22 @@
+-- Jalur akses daftar materi/modul (query/q_catalog.py):
+-- user → kelas aktif (pesertakelas / mentorkelas) → batch aktif (userbatch)
+-- kelas → modul (modulkelas) → materi.
+CREATE INDEX IF NOT EXISTS ix_pesertakelas_user_kelas
+    ON pesertakelas (id_user, id_paketkelas)
+    WHERE status = 1;
+
+CREATE INDEX IF NOT EXISTS ix_mentorkelas_user_kelas
+    ON mentorkelas (id_user, id_paketkelas)
+    WHERE status = 1;
+
+CREATE INDEX IF NOT EXISTS ix_userbatch_user_batch
+    ON userbatch (id_user, id_batch)
+    WHERE status = 1;
+
+CREATE INDEX IF NOT EXISTS ix_modulkelas_kelas_modul
+    ON modulkelas (id_paketkelas, id_modul)
+    WHERE status = 1;
+
+CREATE INDEX IF NOT EXISTS ix_materi_modul
+    ON materi (id_modul)
+    WHERE status = 1;
@@ -0,0 +1,27 @@
+-- Progress job pengiriman email kredensial hasil upload peserta (utils/credential_jobs.py).
+-- Ditulis thread job, dibaca GET /peserta/upload/email-job/<id_job> dari worker mana pun.
+-- Hanya MAIL_MAX_JOBS_TERSIMPAN job terbaru yang disimpan (dibersihkan q_credential_job).
+
+CREATE TABLE IF NOT EXISTS credential_email_job (
+    id_job      VARCHAR(32) PRIMARY KEY,
+    status      VARCHAR(16) NOT NULL,   -- antri | berjalan | selesai | error
+    total       INTEGER     NOT NULL,
+    terkirim    INTEGER     NOT NULL DEFAULT 0,
+    gagal       INTEGER     NOT NULL DEFAULT 0,
+    created_at  TIMESTAMP   NOT NULL,
+    updated_at  TIMESTAMP   NOT NULL,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_credential_email_job_created
+    ON credential_email_job (created_at DESC);
+
+CREATE TABLE IF NOT EXISTS credential_email_job_detail (
+    id_job  VARCHAR(32)  NOT NULL REFERENCES credential_email_job (id_job) ON DELETE CASCADE,
+    urutan  INTEGER      NOT NULL,
+    id_user INTEGER      NOT NULL,
+    email   VARCHAR(255) NOT NULL,
+    status  VARCHAR(16)  NOT NULL,      -- antri | terkirim | gagal
+    error   TEXT,
+    PRIMARY KEY (id_job, id_user)
+);